@@ -0,0 +1,140 @@
+"""
+Offline geocoding aur distance helpers
+
+WHY: max_travel_distance / max_distance store hote the par kabhi use nahi hote the -
+     engine sirf city strings compare karta tha
+WHERE: CustomUser.save city / zip se latitude, longitude, geo_cell bharta hai;
+       find_matches grid cells se candidate donors filter karta hai, engine haversine se refine
+HOW: Bundled gazetteer (accounts/data/gazetteer.csv) - city + state, phir PIN code prefix.
+     Grid index: duniya GEO_CELL_DEGREES ke cells mein; ek row ke cells ke ids lagataar hain,
+     isliye radius ka bounding box har row ke liye ek indexed range query ban jata hai.
+"""
+import csv
+import math
+import os
+from functools import lru_cache
+
+import numpy as np
+from django.db.models import Q
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), 'data', 'gazetteer.csv')
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE = 69.17
+
+GEO_CELL_DEGREES = 1.0
+GRID_ROWS = int(180 / GEO_CELL_DEGREES)
+GRID_COLUMNS = int(360 / GEO_CELL_DEGREES)
+
+
+def normalize(value):
+    return ' '.join(str(value or '').lower().split())
+
+
+@lru_cache(maxsize=1)
+def load_gazetteer():
+    """
+    Gazetteer file ek baar (per process) padhega.
+    Returns (cities, city_names, pins):
+    (city, state) -> (lat, lon), city -> (lat, lon) (sirf ek hi state wale naam), PIN prefix -> (lat, lon)
+    """
+    cities, city_names, pins = {}, {}, {}
+    ambiguous = set()
+
+    with open(GAZETTEER_PATH, newline='') as f:
+        for row in csv.DictReader(f):
+            point = (float(row['latitude']), float(row['longitude']))
+            key = normalize(row['key'])
+            if row['kind'] == 'pin':
+                pins[key] = point
+                continue
+
+            cities[(key, normalize(row['state']))] = point
+            if key in city_names and city_names[key] != point:
+                ambiguous.add(key)
+            city_names[key] = point
+
+    for key in ambiguous:
+        del city_names[key]
+    return cities, city_names, pins
+
+
+def resolve_location(city, state='', zip_code=''):
+    """City / state / PIN code se (latitude, longitude); gazetteer mein na ho to None"""
+    cities, city_names, pins = load_gazetteer()
+    city, state = normalize(city), normalize(state)
+
+    if (city, state) in cities:
+        return cities[(city, state)]
+
+    # PIN code ke pehle 3 digits (sorting district) - city ke naam se zyada specific
+    digits = ''.join(ch for ch in str(zip_code or '') if ch.isdigit())
+    if len(digits) >= 3 and digits[:3] in pins:
+        return pins[digits[:3]]
+
+    return city_names.get(city)
+
+
+def _row_col(latitude, longitude):
+    row = min(GRID_ROWS - 1, max(0, int(math.floor((latitude + 90) / GEO_CELL_DEGREES))))
+    col = min(GRID_COLUMNS - 1, max(0, int(math.floor((longitude + 180) / GEO_CELL_DEGREES))))
+    return row, col
+
+
+def geo_cell(latitude, longitude):
+    """Point ka grid cell id (row-major)"""
+    row, col = _row_col(latitude, longitude)
+    return row * GRID_COLUMNS + col
+
+
+def cell_ranges(latitude, longitude, radius_miles):
+    """
+    Point ke aas-paas radius_miles ke bounding box ko cover karne wale cell id ranges -
+    har grid row ke liye ek (lo, hi)
+    """
+    lat_span = radius_miles / MILES_PER_DEGREE
+    row_lo, _ = _row_col(latitude - lat_span, longitude)
+    row_hi, _ = _row_col(latitude + lat_span, longitude)
+
+    # Box ke sabse polar edge par longitude degree sabse chhoti hoti hai
+    edge = min(89.0, abs(latitude) + lat_span)
+    lon_span = radius_miles / (MILES_PER_DEGREE * math.cos(math.radians(edge)))
+    if lon_span >= 180 or longitude - lon_span < -180 or longitude + lon_span >= 180:
+        # Antimeridian paar karta box - poori rows
+        col_lo, col_hi = 0, GRID_COLUMNS - 1
+    else:
+        _, col_lo = _row_col(latitude, longitude - lon_span)
+        _, col_hi = _row_col(latitude, longitude + lon_span)
+
+    return [(row * GRID_COLUMNS + col_lo, row * GRID_COLUMNS + col_hi) for row in range(row_lo, row_hi + 1)]
+
+
+def within_radius_filter(field, latitude, longitude, radius_miles):
+    """
+    Grid index par Q filter - radius ke bounding box ke cells, aur jinki location unknown hai.
+    Sirf candidate pruning hai (box > circle); exact check haversine_miles se hota hai.
+    """
+    if latitude is None or longitude is None or radius_miles is None or math.isinf(radius_miles):
+        return Q()
+
+    cells = Q(**{f'{field}__isnull': True})
+    for lo, hi in cell_ranges(latitude, longitude, radius_miles):
+        cells |= Q(**{f'{field}__range': (lo, hi)})
+    return cells
+
+
+def travel_radius(*limits):
+    """Kai travel limits (None = koi limit nahi) mein se sabse chhoti; koi na ho to inf"""
+    limits = [limit for limit in limits if limit is not None]
+    return min(limits) if limits else math.inf
+
+
+def haversine_miles(latitude, longitude, latitudes, longitudes):
+    """Ek point se points ki array tak great-circle distance (miles, vectorized). NaN input par NaN"""
+    lat1 = np.radians(latitude)
+    lat2 = np.radians(np.asarray(latitudes, dtype=float))
+    dlat = lat2 - lat1
+    dlon = np.radians(np.asarray(longitudes, dtype=float) - longitude)
+
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
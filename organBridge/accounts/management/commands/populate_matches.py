@@ -1,6 +1,7 @@
 import random
 from django.core.management.base import BaseCommand
 from accounts.models import CustomUser
+from ml_model.blood_compatibility import compatible_donor_types
 from matches.models import Match  # Adjust import based on your actual model name
 
 class Command(BaseCommand):
@@ -63,20 +64,8 @@ class Command(BaseCommand):
         """Find donors compatible with the recipient based on blood type"""
         compatible_donors = []
         
-        # Blood type compatibility rules
-        compatibility_rules = {
-            'A+': ['A+', 'A-', 'O+', 'O-'],
-            'A-': ['A-', 'O-'],
-            'B+': ['B+', 'B-', 'O+', 'O-'],
-            'B-': ['B-', 'O-'],
-            'AB+': ['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-'],  # Universal recipient
-            'AB-': ['A-', 'B-', 'AB-', 'O-'],
-            'O+': ['O+', 'O-'],
-            'O-': ['O-']  # Universal donor
-        }
-        
         recipient_blood_type = recipient.blood_type
-        compatible_blood_types = compatibility_rules.get(recipient_blood_type, [])
+        compatible_blood_types = compatible_donor_types(recipient_blood_type)
         
         for donor in donors:
             if (donor.blood_type in compatible_blood_types and 
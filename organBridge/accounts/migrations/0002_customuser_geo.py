@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-17 20:43
+
+from django.db import migrations, models
+
+from accounts.geo import geo_cell, resolve_location
+
+
+def resolve_user_locations(apps, schema_editor):
+    """Existing users ki city / state / zip_code gazetteer se resolve karega"""
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+
+    users = []
+    for user in CustomUser.objects.only('id', 'city', 'state', 'zip_code').iterator():
+        point = resolve_location(user.city, user.state, user.zip_code)
+        if point:
+            user.latitude, user.longitude = point
+            user.geo_cell = geo_cell(*point)
+            users.append(user)
+
+    CustomUser.objects.bulk_update(users, ['latitude', 'longitude', 'geo_cell'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='geo_cell',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(resolve_user_locations, migrations.RunPython.noop),
+    ]
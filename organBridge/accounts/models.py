@@ -1,5 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
+
+from .geo import geo_cell, resolve_location
 
 class CustomUser(AbstractUser):
     USER_TYPES = (
@@ -18,12 +21,39 @@ class CustomUser(AbstractUser):
     city = models.CharField(max_length=50, blank=True)
     state = models.CharField(max_length=50, blank=True)
     zip_code = models.CharField(max_length=10, blank=True)
+    # city / state / zip_code se gazetteer lookup (save par) - distance filtering ke liye
+    latitude = models.FloatField(null=True, blank=True, editable=False)
+    longitude = models.FloatField(null=True, blank=True, editable=False)
+    geo_cell = models.PositiveIntegerField(null=True, blank=True, editable=False, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.username} ({self.get_user_type_display()})"
     
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'city', 'state', 'zip_code'} & set(update_fields):
+            self.resolve_location()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'latitude', 'longitude', 'geo_cell'}
+        super().save(*args, **kwargs)
+    
+    def resolve_location(self):
+        """Gazetteer se latitude / longitude / geo_cell set karega (na mile to teeno None)"""
+        point = resolve_location(self.city, self.state, self.zip_code)
+        self.latitude, self.longitude = point if point else (None, None)
+        self.geo_cell = geo_cell(*point) if point else None
+    
+    @property
+    def age(self):
+        """date_of_birth se aaj ki umar (saal); date_of_birth na ho to None"""
+        if not self.date_of_birth:
+            return None
+        today = timezone.localdate()
+        born = self.date_of_birth
+        return today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+    
     def is_donor(self):
         return self.user_type == 'donor'
     
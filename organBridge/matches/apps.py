@@ -3,4 +3,8 @@ from django.apps import AppConfig
 class MatchesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'matches'
-    verbose_name = 'Matches'
\ No newline at end of file
+    verbose_name = 'Matches'
+    
+    def ready(self):
+        # Cached match rankings ko donor / recipient changes par invalidate karne wale signals
+        from . import signals  # noqa: F401
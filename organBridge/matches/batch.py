@@ -0,0 +1,117 @@
+"""
+All-pairs batch matching (`manage.py run_matching`) ke worker-side helpers
+
+Har worker process available donors ka ek columnar snapshot (DonorPool) ek baar load karta hai,
+phir recipients ke chunks score karta hai. Results parent process ko wapas jaate hain,
+jo unhe bulk writes se OrganMatch mein likhta hai.
+"""
+import numpy as np
+
+from ml_model.blood_compatibility import BLOOD_TYPE_INDEX, compatibility_mask
+from ml_model.candidates import DonorSnapshot
+from ml_model.matching_algorithm import get_matching_engine
+from profiles.models import DonorProfile, RecipientProfile, organ_list
+from .models import MatchPreference
+
+
+class DonorPool:
+    """
+    Available donors ka snapshot + per-organ aur per-blood-type boolean masks
+
+    WHY: Har recipient ke liye alag candidate query (100k recipients = 100k queries) nahi chahiye
+    WHERE: score_chunk har recipient ke candidates isi se nikalta hai
+    HOW: find_matches view wala hi filter (organ overlap + blood compatibility), lekin
+         numpy masks par - ek recipient ke candidates ek OR / AND se mil jaate hain
+    """
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.organ_masks = {}
+        self.blood_masks = {}
+
+        for i, organs in enumerate(snapshot.organs):
+            for organ in organs:
+                if organ not in self.organ_masks:
+                    self.organ_masks[organ] = np.zeros(len(snapshot), dtype=bool)
+                self.organ_masks[organ][i] = True
+
+    @classmethod
+    def load(cls):
+        """Saare available donors ek values_list query mein (id order - find_matches jaisa tie order)"""
+        return cls(DonorSnapshot.from_queryset(DonorProfile.objects.filter(is_available=True).order_by('id')))
+
+    def candidates(self, recipient):
+        """Recipient ke candidate donors ka snapshot"""
+        mask = np.zeros(len(self.snapshot), dtype=bool)
+        for organ in organ_list(recipient.organs_needed):
+            if organ in self.organ_masks:
+                mask |= self.organ_masks[organ]
+
+        # Recipient ka blood type unknown ho to filter nahi lagta (view jaisa)
+        blood_type = recipient.user.blood_type
+        if blood_type in BLOOD_TYPE_INDEX:
+            if blood_type not in self.blood_masks:
+                self.blood_masks[blood_type] = compatibility_mask(self.snapshot.blood_types, blood_type)
+            mask &= self.blood_masks[blood_type]
+
+        return self.snapshot.take(np.flatnonzero(mask))
+
+
+# Process-wide donor pool (fork par parent se inherit hota hai)
+_pool = None
+
+
+def prepare():
+    """Donor pool load aur engine warm karega - har process mein sirf ek baar"""
+    global _pool
+    if _pool is None:
+        _pool = DonorPool.load()
+        # Batch scoring exhaustive hai - retrieval index ki zaroorat nahi
+        get_matching_engine().warm(_pool.snapshot, index=False)
+    return _pool
+
+
+def init_worker():
+    """ProcessPoolExecutor initializer (spawn start method par Django setup bhi yahin)"""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+    prepare()
+
+
+def score_chunk(recipient_ids, top_n):
+    """
+    Recipients ke ek chunk ko saare compatible donors ke against score karega - exhaustive, approximate
+    donor index nahi (find_matches(exhaustive=True)).
+    Returns (recipients, pairs_scored, rows) - pairs travel limits ke baad wale; rows OrganMatch.bulk_upsert format mein
+    """
+    pool = prepare()
+    engine = get_matching_engine()
+
+    recipients = list(RecipientProfile.objects.select_related('user').filter(id__in=recipient_ids))
+    thresholds = MatchPreference.thresholds_for([recipient.user_id for recipient in recipients])
+
+    rows = []
+    pairs = 0
+    for recipient in recipients:
+        min_score, max_distance = thresholds[recipient.user_id]
+        candidates = pool.candidates(recipient)
+        # Travel limits yahin - pairs mein sirf wahi donors jo sach mein score hote hain
+        candidates = candidates.take(np.flatnonzero(engine.reachable_mask(candidates, recipient, max_distance)))
+        pairs += len(candidates)
+        if not len(candidates):
+            continue
+
+        matches = engine.find_matches(
+            recipient, candidates, top_n=top_n, load_donors=False, min_score=min_score, max_distance=max_distance,
+            exhaustive=True,
+        )
+        for match in matches:
+            rows.append((
+                match['donor_user_id'], recipient.user_id,
+                match['final_score'], match['compatibility_details']['organs_matched'],
+            ))
+
+    return len(recipient_ids), pairs, rows
@@ -0,0 +1,159 @@
+import logging
+
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.geo import within_radius_filter
+from ml_model.blood_compatibility import BLOOD_TYPES, compatible_recipient_types
+from ml_model.matching_algorithm import get_matching_engine
+from profiles.models import DonorProfile, RecipientProfile, organ_list
+from .match_cache import (
+    bump_donor_generation, cached_recipients, forget_donor, patch_ranking, ranked_recipients, ranking_entry,
+)
+from .models import MatchPreference, OrganMatch
+
+logger = logging.getLogger(__name__)
+
+
+# Ek donor change par isse zyada recipients re-score karne hon to patch ki jagah global flush
+REMATCH_LIMIT = 500
+
+# Donor ke woh fields jinse decide hota hai ki kaun se recipients use rank kar sakte hain
+STATE_FIELDS = {
+    'organs': 'organs_donating',
+    'is_available': 'is_available',
+    'max_travel_distance': 'max_travel_distance',
+    'blood_type': 'user__blood_type',
+    'latitude': 'user__latitude',
+    'longitude': 'user__longitude',
+}
+
+
+def donor_state(donor):
+    """Donor instance ki matching state (dict) - organs list, availability, travel limit, blood type, location"""
+    return {
+        'organs': organ_list(donor.organs_donating),
+        'is_available': donor.is_available,
+        'max_travel_distance': donor.max_travel_distance,
+        'blood_type': donor.user.blood_type,
+        'latitude': donor.user.latitude,
+        'longitude': donor.user.longitude,
+    }
+
+
+def stored_donor_state(donor_id):
+    """DB mein abhi ki matching state (save se pehle) - ek query; naya donor ho to None"""
+    row = DonorProfile.objects.filter(pk=donor_id).values(*STATE_FIELDS.values()).first()
+    if row is None:
+        return None
+    state = {name: row[field] for name, field in STATE_FIELDS.items()}
+    state['organs'] = organ_list(state['organs'])
+    return state
+
+
+def affected_recipients(state):
+    """
+    Recipients (user ids queryset) jinhe donor ke organs mein se koi chahiye, jinke liye donor ka blood
+    type compatible hai aur jo donor ke max_travel_distance ke grid cells mein hain
+    (RecipientOrgan + geo_cell index se - poori recipients table scan nahi).
+    state: donor_state() dict
+    """
+    if not state['organs']:
+        return RecipientProfile.objects.none().values_list('user_id', flat=True)
+
+    # Recipient ka blood type unknown ho to find_matches bhi blood filter nahi lagata
+    blood_filter = ~Q(user__blood_type__in=BLOOD_TYPES)
+    compatible_types = compatible_recipient_types(state['blood_type'])
+    if compatible_types:
+        blood_filter |= Q(user__blood_type__in=compatible_types)
+
+    location_filter = within_radius_filter(
+        'user__geo_cell', state['latitude'], state['longitude'], state['max_travel_distance']
+    )
+    return RecipientProfile.objects.filter(
+        blood_filter, location_filter, organ_entries__organ__in=state['organs']
+    ).values_list('user_id', flat=True).distinct()
+
+
+def rematch_donor(donor, previous=None, removed=False):
+    """
+    Ek donor ke change par incremental re-matching
+
+    WHY: Donor ke toggle_availability / edit_profile ke baad kuch recompute nahi hota tha,
+         aur sab recipients refresh karna O(donors x recipients) hai
+    WHERE: matches.signals DonorProfile save / delete par (transaction commit ke baad) call karta hai
+    HOW: Sirf wahi recipients re-score hote hain jo donor ke range / organs / blood type mein hain
+         aur jinki ranking cache mein hai ya jinka is donor ke saath pending match hai - ek batch mein.
+         Cached rankings sirf unki patch hoti hain jo re-score hue ya jinme donor pehle se hai
+         (donor -> recipients reverse index). REMATCH_LIMIT se zyada recipients hon to patch ki jagah
+         donor generation bump (request thread bounded rehta hai).
+    previous: save se pehle ki state (stored_donor_state) - reverse index evict ho gaya ho aur
+              organs / location / blood type / availability badle hon to purane set ki cached rankings se
+              donor hatane ke kaam aati hai
+    Returns re-scored recipients ki count
+    """
+    current = donor_state(donor)
+    live = current['is_available'] and not removed
+    in_range = set(affected_recipients(current)) if live else set()
+
+    pending = OrganMatch.objects.filter(donor_id=donor.user_id, status='pending')
+    pending_ids = set(pending.values_list('recipient_id', flat=True))
+    # Bina cached ranking / pending match wale recipient ka re-score kisi kaam ka nahi
+    scored_ids = in_range & (cached_recipients(in_range) | pending_ids)
+
+    now = timezone.now()
+    if len(scored_ids) > REMATCH_LIMIT:
+        expired = pending.exclude(recipient_id__in=list(in_range)).update(status='expired', updated_at=now)
+        bump_donor_generation()
+        logger.info(
+            f"Re-matching donor {donor.id} would touch {len(scored_ids)} recipients - "
+            f"flushed cached rankings instead, {expired} expired"
+        )
+        return 0
+
+    organs = current['organs']
+    recipients = list(RecipientProfile.objects.filter(user_id__in=scored_ids).select_related('user'))
+    entries = {}
+    if recipients:
+        thresholds = MatchPreference.thresholds_for([recipient.user_id for recipient in recipients])
+        scores = get_matching_engine().score_donor_for_recipients(
+            donor, recipients, [thresholds[recipient.user_id] for recipient in recipients]
+        )
+        for recipient, score in zip(recipients, scores):
+            if score is None:
+                continue  # travel limits / recipient ki preferences se bahar
+            ml_score, final_score, blood_match, location_same = score
+            needed = organ_list(recipient.organs_needed)
+            organs_matched = [organ for organ in organs if organ in needed]
+            entries[recipient.user_id] = ranking_entry(
+                donor, ml_score, final_score, blood_match, organs_matched, location_same
+            )
+
+    # Pending matches: jo ab match nahi karte woh expire, baaki naye score ke saath update
+    expired = pending.exclude(recipient_id__in=list(entries)).update(status='expired', updated_at=now)
+
+    updated = list(pending.filter(recipient_id__in=list(entries)))
+    for match in updated:
+        match.match_score = entries[match.recipient_id]['final_score']
+        match.organs_matched = entries[match.recipient_id]['organs_matched']
+        match.updated_at = now
+    OrganMatch.objects.bulk_update(updated, ['match_score', 'organs_matched', 'updated_at'])
+
+    # Cached rankings: re-score hue recipients (None = ab match nahi) + jinme donor pehle se hai
+    touched = set(scored_ids)
+    ranked = ranked_recipients(donor.id)
+    if ranked is not None:
+        touched |= ranked
+    elif previous is not None and previous['is_available'] and (removed or previous != current):
+        # Reverse index evict ho gaya - purani state ke set mein se sirf cached rankings
+        touched |= cached_recipients(affected_recipients(previous))
+    for recipient_user_id in touched:
+        patch_ranking(recipient_user_id, donor.id, entries.get(recipient_user_id))
+    if removed:
+        forget_donor(donor.id)
+
+    logger.info(
+        f"Re-matched donor {donor.id}: {len(entries)} recipients scored, {len(touched)} rankings checked, "
+        f"{len(updated)} matches updated, {expired} expired"
+    )
+    return len(entries)
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from matches.models import OrganMatch
+
+
+class Command(BaseCommand):
+    help = 'expires_at nikal chuke pending matches ko expired mark karega (cron ya long-running sweeper)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Ek UPDATE mein kitne matches')
+        parser.add_argument('--loop', action='store_true', help='Exit mat karo, har --interval seconds par sweep karo')
+        parser.add_argument('--interval', type=float, default=300.0, help='Sweep interval in seconds (--loop ke saath)')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            expired = OrganMatch.expire_stale(batch_size=max(1, options['batch_size']))
+            elapsed = time.monotonic() - started
+
+            if expired or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f'Expired {expired} matches in {elapsed:.2f}s'))
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
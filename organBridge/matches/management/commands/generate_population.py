@@ -0,0 +1,110 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.models import CustomUser
+from matches.match_cache import bump_donor_generation
+from matches.models import OrganMatch
+from matches.signals import REMATCH_RECEIVERS, receivers_disconnected
+from matches.synthetic import PopulationGenerator
+from ml_model.signals import INDEX_RECEIVERS
+from profiles.models import DonorOrgan, DonorProfile, RecipientOrgan, RecipientProfile
+
+
+class Command(BaseCommand):
+    help = 'Load testing ke liye synthetic donors, recipients aur OrganMatch rows batches mein banayega (bulk_create)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--donors', type=int, default=1000, help='Kitne donor users + profiles')
+        parser.add_argument('--recipients', type=int, default=1000, help='Kitne recipient users + profiles')
+        parser.add_argument('--matches-per-recipient', type=int, default=5, help='Har recipient ke OrganMatch rows (0 = koi nahi)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Ek transaction / bulk_create batch mein kitne users')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (same seed + options = same population)')
+        parser.add_argument('--prefix', default='synth', help='Usernames ka prefix (<prefix>_d123, <prefix>_r45)')
+        parser.add_argument('--password', default='password123', help='Saare users ka password (ek baar hash hota hai)')
+        parser.add_argument('--distributions', default=None,
+                            help='JSON object ya JSON file path - default distributions ke keys override karega, '
+                                 'e.g. \'{"urgency_level": {"critical": 50, "low": 50}}\'')
+        parser.add_argument('--clear', action='store_true', help='Isi prefix ke pichhle synthetic users pehle delete karo')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        batch_size = max(1, options['batch_size'])
+        distributions = self.load_distributions(options['distributions'])
+
+        existing = CustomUser.objects.filter(username__startswith=f'{prefix}_')
+        if options['clear']:
+            self.clear(existing)
+        elif existing.exists():
+            raise CommandError(f"Users with prefix '{prefix}_' already exist - use --clear or a different --prefix")
+
+        generator = PopulationGenerator(
+            seed=options['seed'], distributions=distributions, prefix=prefix,
+            password=options['password'], batch_size=batch_size,
+        )
+        started = time.monotonic()
+
+        donors = 0
+        for start in range(0, options['donors'], batch_size):
+            donors += generator.create_donors(start, min(batch_size, options['donors'] - start))
+            self.progress('donors', donors, options['donors'], started)
+
+        pools = generator.recipient_pools()
+        recipients = matches = 0
+        for start in range(0, options['recipients'], batch_size):
+            created, match_count = generator.create_recipients(
+                start, min(batch_size, options['recipients'] - start), pools, options['matches_per_recipient']
+            )
+            recipients += created
+            matches += match_count
+            self.progress('recipients', recipients, options['recipients'], started)
+
+        # bulk_create signals nahi bhejta - cached rankings ko stale maan lo
+        bump_donor_generation()
+
+        elapsed = time.monotonic() - started
+        total = donors + recipients + matches
+        self.stdout.write(self.style.SUCCESS(
+            f'Done in {elapsed:.1f}s: {donors} donors, {recipients} recipients, {matches} matches '
+            f'({total / max(elapsed, 1e-9):.0f} rows/s)'
+        ))
+
+    def load_distributions(self, value):
+        if not value:
+            return None
+        try:
+            if os.path.exists(value):
+                with open(value) as f:
+                    value = f.read()
+            distributions = json.loads(value)
+        except ValueError as e:
+            raise CommandError(f'--distributions must be a JSON object: {e}')
+        if not isinstance(distributions, dict):
+            raise CommandError('--distributions must be a JSON object')
+        return distributions
+
+    def clear(self, users):
+        """
+        Isi prefix ke synthetic rows delete - bade tables pehle (OrganMatch -> organ rows -> profiles -> users).
+        Rematch / index receivers band rehte hain: warna har donor ka post_delete sab recipients re-score
+        karta (donors x recipients queries). Uski jagah end mein ek baar donor generation bump
+        """
+        user_ids = users.values('id')
+        with receivers_disconnected(REMATCH_RECEIVERS + INDEX_RECEIVERS), transaction.atomic():
+            OrganMatch.objects.filter(recipient_id__in=user_ids).delete()
+            OrganMatch.objects.filter(donor_id__in=user_ids).delete()
+            DonorOrgan.objects.filter(donor__user_id__in=user_ids).delete()
+            RecipientOrgan.objects.filter(recipient__user_id__in=user_ids).delete()
+            DonorProfile.objects.filter(user_id__in=user_ids).delete()
+            RecipientProfile.objects.filter(user_id__in=user_ids).delete()
+            deleted, _ = users.delete()
+        # Cached rankings mein ab deleted donors ho sakte hain
+        bump_donor_generation()
+        self.stdout.write(f'Cleared {deleted} existing synthetic rows')
+
+    def progress(self, label, done, total, started):
+        elapsed = time.monotonic() - started
+        self.stdout.write(f'  {done}/{total} {label} ({done / max(elapsed, 1e-9):.0f}/s overall)')
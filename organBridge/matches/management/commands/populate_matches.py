@@ -2,6 +2,7 @@ import random
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from accounts.models import CustomUser
+from ml_model.blood_compatibility import compatible_donor_types
 from matches.models import Match
 
 class Command(BaseCommand):
@@ -21,24 +22,12 @@ class Command(BaseCommand):
         
         matches_created = 0
         
-        # Blood type compatibility rules (simplified)
-        compatibility_rules = {
-            'A+': ['A+', 'A-', 'O+', 'O-'],
-            'A-': ['A-', 'O-'],
-            'B+': ['B+', 'B-', 'O+', 'O-'],
-            'B-': ['B-', 'O-'],
-            'AB+': ['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-'],
-            'AB-': ['A-', 'B-', 'AB-', 'O-'],
-            'O+': ['O+', 'O-'],
-            'O-': ['O-']
-        }
-        
         # Common organ types with weights (more common organs appear more frequently)
         organ_types = ['kidney'] * 5 + ['liver'] * 3 + ['cornea'] * 4 + ['bone_marrow'] * 2 + ['heart', 'lung', 'pancreas']
         
         for recipient in recipients:
             # Find compatible donors based on blood type
-            compatible_blood_types = compatibility_rules.get(recipient.blood_type, [])
+            compatible_blood_types = compatible_donor_types(recipient.blood_type)
             compatible_donors = [
                 donor for donor in donors 
                 if donor.blood_type in compatible_blood_types
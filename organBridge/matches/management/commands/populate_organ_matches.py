@@ -3,6 +3,7 @@ from datetime import timedelta
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from accounts.models import CustomUser
+from ml_model.blood_compatibility import compatible_donor_types
 from matches.models import OrganMatch
 
 class Command(BaseCommand):
@@ -29,24 +30,12 @@ class Command(BaseCommand):
         
         # Common organs for matching
         all_organs = ['kidney', 'liver', 'heart', 'lung', 'pancreas', 'cornea', 'bone_marrow']
-        
-        # Blood type compatibility rules
-        compatibility_rules = {
-            'A+': ['A+', 'A-', 'O+', 'O-'],
-            'A-': ['A-', 'O-'],
-            'B+': ['B+', 'B-', 'O+', 'O-'],
-            'B-': ['B-', 'O-'],
-            'AB+': ['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-'],
-            'AB-': ['A-', 'B-', 'AB-', 'O-'],
-            'O+': ['O+', 'O-'],
-            'O-': ['O-']
-        }
 
         for recipient in recipients:
             compatible_donors = []
 
             # Find compatible donors based on blood type
-            compatible_blood_types = compatibility_rules.get(recipient.blood_type, [])
+            compatible_blood_types = compatible_donor_types(recipient.blood_type)
             for donor in donors:
                 # Skip if same user (shouldn't happen but just in case)
                 if donor.id == recipient.id:
@@ -0,0 +1,99 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from matches.batch import init_worker, prepare, score_chunk
+from matches.models import OrganMatch
+from profiles.models import RecipientProfile
+
+
+class Command(BaseCommand):
+    help = 'Saare active recipients ko saare compatible available donors ke against score karke OrganMatch likhega'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes (1 = same process mein, bina pool ke)')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Ek task mein kitne recipients')
+        parser.add_argument('--top-n', type=int, default=10, help='Har recipient ke kitne matches save honge')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Bulk insert / update batch size')
+        parser.add_argument('--expires-days', type=int, default=30, help='Naye matches kitne din mein expire honge')
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options['chunk_size'])
+        workers = max(1, options['workers'])
+
+        # Sirf ids memory mein - recipients har worker apne chunk ke liye khud load karta hai
+        recipient_ids = list(
+            RecipientProfile.objects.filter(user__is_active=True, organ_entries__isnull=False)
+            .distinct().order_by('id').values_list('id', flat=True)
+        )
+        chunks = [recipient_ids[i:i + chunk_size] for i in range(0, len(recipient_ids), chunk_size)]
+        self.stdout.write(f'Matching {len(recipient_ids)} recipients in {len(chunks)} chunks with {workers} worker(s)')
+
+        self.started = time.monotonic()
+        self.totals = {'recipients': 0, 'pairs': 0, 'created': 0, 'updated': 0}
+        self.total_recipients = len(recipient_ids)
+        self.options = options
+
+        # Donor pool + engine parent mein ek baar; fork hue workers ise inherit karte hain
+        prepare()
+
+        if workers == 1:
+            for chunk in chunks:
+                self.write_results(score_chunk(chunk, options['top_n']))
+        else:
+            self.run_pool(chunks, workers)
+
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(self.style.SUCCESS(
+            f"Done in {elapsed:.1f}s: {self.totals['recipients']} recipients, "
+            f"{self.totals['pairs']} pairs scored ({self.totals['pairs'] / max(elapsed, 1e-9):.0f} pairs/s), "
+            f"{self.totals['created']} matches created, {self.totals['updated']} updated"
+        ))
+
+    def run_pool(self, chunks, workers):
+        """
+        Chunks ko process pool par chalayega. In-flight tasks workers x 2 tak seemit hain,
+        taki pending results se parent ki memory na badhe.
+        """
+        # Fork se pehle DB connections band - har process apna connection kholega
+        connections.close_all()
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+            in_flight = set()
+            for chunk in chunks:
+                in_flight.add(executor.submit(score_chunk, chunk, self.options['top_n']))
+                if len(in_flight) >= workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self.write_results(future.result())
+
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.write_results(future.result())
+
+    def write_results(self, result):
+        """Ek chunk ke results bulk upsert aur progress report"""
+        recipients, pairs, rows = result
+        created, updated = OrganMatch.bulk_upsert(
+            rows,
+            expires_in=timedelta(days=self.options['expires_days']),
+            batch_size=self.options['batch_size'],
+        )
+
+        self.totals['recipients'] += recipients
+        self.totals['pairs'] += pairs
+        self.totals['created'] += created
+        self.totals['updated'] += updated
+
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(
+            f"  {self.totals['recipients']}/{self.total_recipients} recipients "
+            f"({self.totals['recipients'] / max(elapsed, 1e-9):.0f} recipients/s, "
+            f"{self.totals['pairs'] / max(elapsed, 1e-9):.0f} pairs/s)"
+        )
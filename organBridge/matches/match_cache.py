@@ -0,0 +1,152 @@
+import threading
+import uuid
+
+from django.core.cache import cache
+
+# Ek baar mein kitne ranked matches cache honge, aur page par kitne dikhenge
+RANKING_SIZE = 50
+PAGE_SIZE = 10
+RANKING_TIMEOUT = 60 * 60
+# Ranking ke waqt candidate donors itne-itne ke chunks mein stream hote hain (bounded memory)
+STREAM_CHUNK_SIZE = 5000
+
+DONOR_GENERATION_KEY = 'matches:donor-generation'
+
+# Reverse index (donor -> recipients jinki cached ranking mein woh hai) ka read-modify-write
+_index_lock = threading.Lock()
+
+
+def ranking_entry(donor, ml_score, final_score, blood_match, organs_matched, location_same):
+    """Cached ranking ki ek entry (plain dict - kisi bhi cache backend mein pickle ho sakti hai)"""
+    return {
+        'donor_id': donor.id,
+        'donor_user_id': donor.user_id,
+        'ml_score': ml_score,
+        'final_score': final_score,
+        'blood_match': blood_match,
+        'organs_matched': organs_matched,
+        'location_same': location_same,
+    }
+
+
+def ranking_key(recipient_user_id):
+    return f'matches:ranking:{recipient_user_id}'
+
+
+def donor_rankings_key(donor_id):
+    return f'matches:donor-rankings:{donor_id}'
+
+
+def donor_generation():
+    """
+    Donor pool ka current generation token.
+    Koi bhi donor side change (profile / user save ya delete) naya token banata hai,
+    jisse saare recipients ki cached rankings ek saath stale ho jati hain.
+    """
+    generation = cache.get(DONOR_GENERATION_KEY)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        # add - doosre process ne isi beech token set kar diya ho to wahi use hoga
+        if not cache.add(DONOR_GENERATION_KEY, generation, None):
+            generation = cache.get(DONOR_GENERATION_KEY, generation)
+    return generation
+
+
+def bump_donor_generation():
+    cache.set(DONOR_GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+def get_ranking(recipient_user_id, model_version, generation):
+    """Cached ranking (list of dicts) ya None - donor generation / model version badla ho to None"""
+    entry = cache.get(ranking_key(recipient_user_id))
+    if not entry:
+        return None
+    if entry['donor_generation'] != generation or entry['model_version'] != model_version:
+        return None
+    return entry['matches']
+
+
+def set_ranking(recipient_user_id, model_version, generation, matches):
+    """
+    Ranking cache karega. generation scoring shuru hone se pehle padha hua hona chahiye -
+    beech mein donor badla to entry agli request par stale maani jayegi.
+    """
+    cache.set(
+        ranking_key(recipient_user_id),
+        {'donor_generation': generation, 'model_version': model_version, 'matches': matches},
+        RANKING_TIMEOUT
+    )
+    index_ranking(recipient_user_id, [match['donor_id'] for match in matches])
+
+
+def index_ranking(recipient_user_id, donor_ids):
+    """
+    Reverse index mein recipient ko in donors ke neeche jodega - donor change par sirf wahi
+    rankings patch hoti hain jinme donor hai. Purani entries (ranking se donor hat gaya) harmless
+    hain - patch_ranking unpar kuch nahi karta
+    """
+    keys = [donor_rankings_key(donor_id) for donor_id in donor_ids]
+    if not keys:
+        return
+    with _index_lock:
+        current = cache.get_many(keys)
+        cache.set_many({key: current.get(key, set()) | {recipient_user_id} for key in keys}, RANKING_TIMEOUT)
+
+
+def ranked_recipients(donor_id):
+    """Recipients (user ids) jinki cached ranking mein donor hai; index entry na ho (evict / kabhi rank nahi hua) to None"""
+    return cache.get(donor_rankings_key(donor_id))
+
+
+def forget_donor(donor_id):
+    cache.delete(donor_rankings_key(donor_id))
+
+
+def cached_recipients(recipient_user_ids):
+    """In recipients mein se jinki ranking cache mein hai (ek get_many)"""
+    keys = {ranking_key(user_id): user_id for user_id in recipient_user_ids}
+    return {keys[key] for key in cache.get_many(list(keys))}
+
+
+def invalidate_recipient(recipient_user_id):
+    cache.delete(ranking_key(recipient_user_id))
+
+
+def patch_ranking(recipient_user_id, donor_id, entry):
+    """
+    Cached ranking mein ek donor ki entry replace / remove karega (poori ranking recompute kiye bina).
+    entry None ho to donor hat jata hai. Ranking RANKING_SIZE par truncated hai, isliye jab
+    tail ke neeche wale donors ka pata na ho (full ranking se donor hata) to entry delete -
+    agli request recompute karegi.
+    """
+    key = ranking_key(recipient_user_id)
+    cached = cache.get(key)
+    if not cached:
+        return
+
+    full = len(cached['matches']) >= RANKING_SIZE
+    matches = [match for match in cached['matches'] if match['donor_id'] != donor_id]
+    removed = len(matches) != len(cached['matches'])
+
+    if entry is not None:
+        # Ranking order: final_score desc, barabar score par donor id asc (find_matches jaisa)
+        rank_key = (-entry['final_score'], donor_id)
+        position = next(
+            (i for i, match in enumerate(matches) if (-match['final_score'], match['donor_id']) > rank_key),
+            len(matches)
+        )
+        if full and position == len(matches):
+            # Truncated tail ke neeche - yahan rakhna sahi hai ya nahi, pata nahi
+            if removed:
+                cache.delete(key)
+            return
+        matches.insert(position, entry)
+        index_ranking(recipient_user_id, [donor_id])
+    elif not removed:
+        return
+    elif full:
+        cache.delete(key)
+        return
+
+    cached['matches'] = matches[:RANKING_SIZE]
+    cache.set(key, cached, RANKING_TIMEOUT)
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-17 20:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0003_alter_organmatch_donor_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='organmatch',
+            index=models.Index(fields=['status', 'expires_at'], name='match_status_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='organmatch',
+            index=models.Index(fields=['recipient', 'status'], name='match_recipient_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='organmatch',
+            index=models.Index(fields=['donor', 'status'], name='match_donor_status_idx'),
+        ),
+    ]
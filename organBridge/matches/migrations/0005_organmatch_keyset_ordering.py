@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-17 21:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0004_organmatch_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='organmatch',
+            options={'ordering': ['-match_score', '-created_at', '-id']},
+        ),
+        migrations.RemoveIndex(
+            model_name='organmatch',
+            name='match_recipient_status_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='organmatch',
+            name='match_donor_status_idx',
+        ),
+        migrations.AddIndex(
+            model_name='organmatch',
+            index=models.Index(fields=['recipient', 'status', '-match_score', '-created_at', '-id'], name='match_recipient_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='organmatch',
+            index=models.Index(fields=['donor', 'status', '-match_score', '-created_at', '-id'], name='match_donor_status_idx'),
+        ),
+    ]
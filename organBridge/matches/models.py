@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import timedelta
@@ -45,7 +45,22 @@ class OrganMatch(models.Model):
     
     class Meta:
         unique_together = ('donor', 'recipient')
-        ordering = ['-match_score', '-created_at']
+        # id - barabar score aur created_at par bhi stable order (keyset pagination ke liye zaroori)
+        ordering = ['-match_score', '-created_at', '-id']
+        indexes = [
+            # expire_stale sweeper: status='pending' AND expires_at <= now
+            models.Index(fields=['status', 'expires_at'], name='match_status_expiry_idx'),
+            # Dashboards: ek user ke matches status ke hisaab se, ordering ke saath
+            # (status counts aur keyset pages dono isi index se; bina sort ke)
+            models.Index(
+                fields=['recipient', 'status', '-match_score', '-created_at', '-id'],
+                name='match_recipient_status_idx',
+            ),
+            models.Index(
+                fields=['donor', 'status', '-match_score', '-created_at', '-id'],
+                name='match_donor_status_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"Match: {self.donor.username} -> {self.recipient.username} ({self.match_score}%)"
@@ -58,6 +73,108 @@ class OrganMatch(models.Model):
         if not self.expires_at:
             self.expires_at = timezone.now() + timedelta(days=30)
         super().save(*args, **kwargs)
+    
+    @classmethod
+    def bulk_get_or_create(cls, recipient, entries, expires_in=timedelta(days=30)):
+        """
+        get_or_create ka bulk version - ek recipient ke kai donors ke liye.
+        entries: [{'donor_id', 'match_score', 'organs_matched'}]
+        Existing (donor, recipient) rows waise hi rehte hain, sirf naye pairs insert hote hain.
+        Constant queries (existing fetch + bulk insert + naye ids fetch), chahe kitne bhi entries hon.
+        Returns {donor_id: match_id}
+        """
+        donor_ids = [entry['donor_id'] for entry in entries]
+        if not donor_ids:
+            return {}
+        
+        with transaction.atomic():
+            match_ids = dict(
+                cls.objects.filter(recipient=recipient, donor_id__in=donor_ids).values_list('donor_id', 'id')
+            )
+            expires_at = timezone.now() + expires_in
+            new_matches = [
+                cls(
+                    donor_id=entry['donor_id'],
+                    recipient=recipient,
+                    match_score=entry['match_score'],
+                    organs_matched=entry['organs_matched'],
+                    expires_at=expires_at,
+                    status='pending',
+                )
+                for entry in entries if entry['donor_id'] not in match_ids
+            ]
+            if new_matches:
+                # Concurrent request ne isi beech pair bana diya ho to conflict ignore hoga
+                cls.objects.bulk_create(new_matches, ignore_conflicts=True)
+                match_ids.update(
+                    cls.objects.filter(
+                        recipient=recipient,
+                        donor_id__in=[match.donor_id for match in new_matches]
+                    ).values_list('donor_id', 'id')
+                )
+        
+        return match_ids
+    
+    @classmethod
+    def bulk_upsert(cls, rows, expires_in=timedelta(days=30), batch_size=1000):
+        """
+        Batch matching ke results likhega. rows: [(donor_id, recipient_id, match_score, organs_matched)]
+        Naye pairs pending insert hote hain, existing pending rows ka score / organs update hota hai.
+        Accepted / rejected / expired rows nahi chhue jate.
+        Returns (created, updated)
+        """
+        if not rows:
+            return 0, 0
+        
+        with transaction.atomic():
+            existing = {
+                (donor_id, recipient_id): (match_id, status)
+                for match_id, donor_id, recipient_id, status in cls.objects.filter(
+                    recipient_id__in={row[1] for row in rows}
+                ).values_list('id', 'donor_id', 'recipient_id', 'status')
+            }
+            
+            now = timezone.now()
+            expires_at = now + expires_in
+            new_matches, changed = [], []
+            for donor_id, recipient_id, match_score, organs_matched in rows:
+                current = existing.get((donor_id, recipient_id))
+                if current is None:
+                    new_matches.append(cls(
+                        donor_id=donor_id, recipient_id=recipient_id, match_score=match_score,
+                        organs_matched=organs_matched, expires_at=expires_at, status='pending',
+                    ))
+                elif current[1] == 'pending':
+                    changed.append(cls(
+                        id=current[0], match_score=match_score, organs_matched=organs_matched, updated_at=now
+                    ))
+            
+            cls.objects.bulk_create(new_matches, batch_size=batch_size, ignore_conflicts=True)
+            cls.objects.bulk_update(changed, ['match_score', 'organs_matched', 'updated_at'], batch_size=batch_size)
+        
+        return len(new_matches), len(changed)
+    
+    @classmethod
+    def expire_stale(cls, now=None, batch_size=1000):
+        """
+        expires_at nikal chuke pending matches ko 'expired' mark karega.
+        Har batch: (status, expires_at) index se ids fetch + ek UPDATE, taki badi table par
+        ek lamba lock na lage. Returns expired matches ki ginti
+        """
+        now = now or timezone.now()
+        stale = cls.objects.filter(status='pending', expires_at__lte=now)
+        
+        total = 0
+        while True:
+            ids = list(stale.order_by('expires_at').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            # status='pending' dobara - beech mein accept / reject hua match expire nahi hoga
+            total += cls.objects.filter(id__in=ids, status='pending').update(status='expired', updated_at=now)
+            if len(ids) < batch_size:
+                break
+        
+        return total
 
 
 class MatchMessage(models.Model):
@@ -82,4 +199,23 @@ class MatchPreference(models.Model):
     notify_messages = models.BooleanField(default=True)
     
     def __str__(self):
-        return f"Preferences for {self.user.username}"
\ No newline at end of file
+        return f"Preferences for {self.user.username}"
+    
+    def thresholds(self):
+        """Engine ke liye (min_score, max_distance) cut-offs"""
+        return self.min_match_score, self.max_distance
+    
+    @classmethod
+    def thresholds_for(cls, user_ids):
+        """
+        Kai users ke thresholds ek query mein: {user_id: (min_score, max_distance)}.
+        Jin users ki preference row nahi hai unke liye (None, None) - koi cut-off nahi
+        """
+        thresholds = {user_id: (None, None) for user_id in user_ids}
+        thresholds.update(
+            (user_id, (min_score, max_distance))
+            for user_id, min_score, max_distance in cls.objects.filter(user_id__in=list(thresholds)).values_list(
+                'user_id', 'min_match_score', 'max_distance'
+            )
+        )
+        return thresholds
\ No newline at end of file
@@ -0,0 +1,54 @@
+"""
+OrganMatch lists ke liye keyset (cursor) pagination
+
+WHY: OFFSET pagination har page par pichhle saare rows scan karti hai - 10k purane
+     matches wale donor ka aakhri page 10k rows padhta tha
+WHERE: my_matches dashboard ke tabs
+HOW: OrganMatch.Meta.ordering (-match_score, -created_at, -id) par seek - agla page
+     "pichhle page ki aakhri row ke baad wale rows" hai, jo (user, status, ordering)
+     index se seedha mil jaate hain. Cursor us aakhri row ke teeno values ka token hai.
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+KEYSET_ORDERING = ('-match_score', '-created_at', '-id')
+
+
+def encode_cursor(match):
+    """Match ke (score, created_at, id) ka URL-safe token"""
+    raw = f'{match.match_score!r}|{match.created_at.isoformat()}|{match.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Token se (score, created_at, id); khali ya kharab token par None (pehla page)"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        score, created_at, match_id = raw.split('|')
+        return float(score), datetime.fromisoformat(created_at), int(match_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_page(queryset, cursor=None, size=10):
+    """
+    Cursor ke baad ke `size` matches. Returns (matches, next_cursor) -
+    next_cursor None hai agar aage koi page nahi. size + 1 rows fetch hote hain, COUNT nahi.
+    """
+    queryset = queryset.order_by(*KEYSET_ORDERING)
+    if cursor:
+        score, created_at, match_id = cursor
+        queryset = queryset.filter(
+            Q(match_score__lt=score)
+            | Q(match_score=score, created_at__lt=created_at)
+            | Q(match_score=score, created_at=created_at, id__lt=match_id)
+        )
+
+    matches = list(queryset[:size + 1])
+    if len(matches) > size:
+        return matches[:size], encode_cursor(matches[size - 1])
+    return matches, None
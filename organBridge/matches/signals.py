@@ -0,0 +1,146 @@
+import logging
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from profiles.models import DonorProfile, RecipientProfile
+from .match_cache import bump_donor_generation, invalidate_recipient
+from .models import MatchPreference
+
+CustomUser = get_user_model()
+logger = logging.getLogger(__name__)
+
+
+def _rematch(donor, previous, removed=False):
+    from .incremental import rematch_donor
+
+    try:
+        rematch_donor(donor, previous, removed=removed)
+    except Exception as e:
+        # Incremental patch fail hua to saari cached rankings stale maan lo
+        logger.error(f"Incremental re-matching failed for donor {donor.pk}: {str(e)}")
+        bump_donor_generation()
+
+
+@receiver(pre_save, sender=DonorProfile)
+def remember_previous_state(sender, instance, **kwargs):
+    """Save se pehle ki matching state - organs / location badle to purane recipients ki rankings se donor hatana pad sakta hai"""
+    from .incremental import stored_donor_state
+
+    instance._previous_state = stored_donor_state(instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=DonorProfile)
+def rematch_on_donor_change(sender, instance, **kwargs):
+    """Donor badla - sirf affected recipients re-score (commit ke baad, DonorOrgan sync ho chuka hoga)"""
+    previous = getattr(instance, '_previous_state', None)
+    transaction.on_commit(lambda: _rematch(instance, previous))
+
+
+@receiver(post_delete, sender=DonorProfile)
+def rematch_on_donor_delete(sender, instance, **kwargs):
+    """Donor delete - uske pending matches expire aur cached rankings se hatao"""
+    from .incremental import donor_state
+
+    previous = donor_state(instance)
+    transaction.on_commit(lambda: _rematch(instance, previous, removed=True))
+
+
+@receiver(post_save, sender=RecipientProfile)
+@receiver(post_delete, sender=RecipientProfile)
+def invalidate_on_recipient_change(sender, instance, **kwargs):
+    """Recipient badla - sirf usi ki cached ranking hategi"""
+    invalidate_recipient(instance.user_id)
+
+
+@receiver(post_save, sender=MatchPreference)
+@receiver(post_delete, sender=MatchPreference)
+def invalidate_on_preference_change(sender, instance, **kwargs):
+    """min_match_score / max_distance ranking ke cut-offs hain - user ki cached ranking hategi"""
+    invalidate_recipient(instance.user_id)
+
+
+# CustomUser ke woh fields jo scoring / candidate filters mein jaate hain (features, blood rule, distance)
+MATCHING_USER_FIELDS = ('city', 'blood_type', 'date_of_birth', 'latitude', 'longitude')
+
+
+@receiver(pre_save, sender=CustomUser)
+def remember_previous_user_fields(sender, instance, update_fields=None, **kwargs):
+    """Save se pehle ke matching fields - naam / phone jaise edits par kuch invalidate nahi hoga"""
+    instance._previous_matching_fields = None
+    # Login (sirf last_login) jaise saves par query bhi nahi
+    if not instance.pk or (update_fields is not None and not set(update_fields) & set(MATCHING_USER_FIELDS)):
+        return
+    instance._previous_matching_fields = CustomUser.objects.filter(pk=instance.pk).values(*MATCHING_USER_FIELDS).first()
+
+
+@receiver(post_save, sender=CustomUser)
+def rematch_on_user_change(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+    Blood type / umar / location badli tabhi ranking par asar: donor ke liye rematch_donor (sirf
+    affected rankings patch), recipient ki apni cached ranking hategi. Naya user - abhi profile nahi
+    """
+    previous = getattr(instance, '_previous_matching_fields', None)
+    if created or previous is None:
+        return
+    if all(getattr(instance, field) == previous[field] for field in MATCHING_USER_FIELDS):
+        return
+
+    if not instance.is_donor():
+        invalidate_recipient(instance.pk)
+        return
+
+    from .incremental import donor_state
+
+    donor = DonorProfile.objects.filter(user_id=instance.pk).first()
+    if donor is None:
+        return
+    donor.user = instance
+    # Profile wahi, user fields purane - purane set ki rankings se donor hatane ke liye
+    state = {**donor_state(donor), 'blood_type': previous['blood_type'],
+             'latitude': previous['latitude'], 'longitude': previous['longitude']}
+    transaction.on_commit(lambda: _rematch(donor, state))
+
+
+@receiver(post_delete, sender=CustomUser)
+def invalidate_on_user_delete(sender, instance, **kwargs):
+    """Donor user ka delete DonorProfile cascade (rematch_on_donor_delete) sambhalta hai"""
+    if not instance.is_donor():
+        invalidate_recipient(instance.pk)
+
+
+# Per-row rematch / invalidation receivers - bulk maintenance (generate_population --clear) inhe
+# band karke ek baar bump_donor_generation karta hai
+REMATCH_RECEIVERS = (
+    (pre_save, remember_previous_state, DonorProfile),
+    (post_save, rematch_on_donor_change, DonorProfile),
+    (post_delete, rematch_on_donor_delete, DonorProfile),
+    (post_save, invalidate_on_recipient_change, RecipientProfile),
+    (post_delete, invalidate_on_recipient_change, RecipientProfile),
+    (post_save, invalidate_on_preference_change, MatchPreference),
+    (post_delete, invalidate_on_preference_change, MatchPreference),
+    (pre_save, remember_previous_user_fields, CustomUser),
+    (post_save, rematch_on_user_change, CustomUser),
+    (post_delete, invalidate_on_user_delete, CustomUser),
+)
+
+
+@contextmanager
+def receivers_disconnected(receivers):
+    """
+    Block ke dauraan (signal, receiver, sender) receivers disconnect rahenge, phir wapas connect.
+    Bina listeners ke Django ka delete collector rows ko bulk (fast) delete karta hai, per-row nahi.
+    Caller ko baad mein caches khud invalidate karne honge
+    """
+    disconnected = [
+        (signal, handler, sender) for signal, handler, sender in receivers
+        if signal.disconnect(handler, sender=sender)
+    ]
+    try:
+        yield
+    finally:
+        for signal, handler, sender in disconnected:
+            signal.connect(handler, sender=sender)
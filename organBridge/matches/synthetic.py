@@ -0,0 +1,318 @@
+"""
+Synthetic population generator (`manage.py generate_population`) ke helpers
+
+populate_users / populate_*_profiles 40 rows ek-ek save() se banate the, har row par
+make_password (sabse mehenga step) aur ek print line - load testing ke liye 10^5-10^6
+profiles banana practically possible nahi tha.
+
+Yahan saare random columns numpy Generator (seeded, reproducible) se ek batch mein banti hain,
+rows bulk_create se likhi jaati hain aur password sirf ek baar hash hota hai. bulk_create save()
+aur signals bypass karta hai, isliye jo kaam save() karta hai woh yahin hota hai - gazetteer se
+latitude / longitude / geo_cell, BMI, aur DonorOrgan / RecipientOrgan index rows.
+"""
+import csv
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.geo import GAZETTEER_PATH, geo_cell, resolve_location
+from accounts.models import CustomUser
+from ml_model.blood_compatibility import BLOOD_TYPES, compatible_donor_types
+from profiles.models import DonorOrgan, DonorProfile, RecipientOrgan, RecipientProfile
+from .models import OrganMatch
+
+# Har distribution {value: weight} hai (weights normalize hote hain); ranges (low, high) hain
+DEFAULT_DISTRIBUTIONS = {
+    # India mein approximate ABO/Rh frequencies
+    'blood_type': {'O+': 37, 'B+': 32, 'A+': 22, 'AB+': 7, 'O-': 0.8, 'B-': 0.6, 'A-': 0.4, 'AB-': 0.2},
+    # Khali = gazetteer ki saari cities barabar weight se
+    'city': {},
+    'age': (18, 70),
+    'donor_organs': {'kidney': 30, 'liver': 20, 'cornea': 20, 'bone': 10, 'skin': 10, 'pancreas': 5,
+                     'heart': 2, 'lungs': 2, 'intestine': 1},
+    'donor_organ_count': {1: 35, 2: 35, 3: 20, 4: 10},
+    'recipient_organs': {'kidney': 55, 'liver': 20, 'cornea': 12, 'heart': 4, 'lungs': 3, 'pancreas': 3,
+                         'bone': 1, 'skin': 1, 'intestine': 1},
+    'recipient_organ_count': {1: 85, 2: 12, 3: 3},
+    'health_status': {'excellent': 30, 'good': 45, 'fair': 20, 'poor': 5},
+    'smoking_status': {'never': 70, 'former': 20, 'current': 10},
+    'alcohol_use': {'never': 50, 'occasional': 40, 'regular': 10},
+    'drug_use': {True: 5, False: 95},
+    'donor_available': {True: 80, False: 20},
+    'urgency_level': {'low': 20, 'medium': 40, 'high': 28, 'critical': 12},
+    'travel_distance': (50, 500),
+    'avg_sleep': (5.0, 9.0),
+    'height': (150, 190),
+    'weight': (50, 100),
+    'match_score': (40, 100),
+    'match_status': {'pending': 70, 'accepted': 10, 'rejected': 10, 'expired': 10},
+    'match_expires_days': (1, 60),
+}
+
+# JSON object keys hamesha strings hote hain - in distributions ke keys bool mein badlenge
+BOOLEAN_DISTRIBUTIONS = ('drug_use', 'donor_available')
+
+MEDICAL_CONDITIONS = [
+    'Chronic kidney disease (stage 5)', 'End-stage liver disease', 'Corneal scarring',
+    'Dilated cardiomyopathy', 'Pulmonary fibrosis', 'Type 1 diabetes with complications',
+]
+
+
+def gazetteer_cities():
+    """Gazetteer ki cities (display naam, state) - default city distribution"""
+    with open(GAZETTEER_PATH, newline='') as f:
+        return [(row['key'], row['state']) for row in csv.DictReader(f) if row['kind'] == 'city']
+
+
+class Categorical:
+    """{value: weight} distribution - numpy se vectorized sampling"""
+
+    def __init__(self, weights):
+        self.values = list(weights)
+        p = np.asarray([float(weight) for weight in weights.values()])
+        self.p = p / p.sum()
+        # Object array ek-ek element se - tuple values (city, state) 2-D array na ban jaayein
+        self.array = np.empty(len(self.values), dtype=object)
+        for i, value in enumerate(self.values):
+            self.array[i] = value
+
+    def codes(self, rng, size):
+        return rng.choice(len(self.values), size=size, p=self.p)
+
+    def sample(self, rng, size):
+        return self.array[self.codes(rng, size)]
+
+    def subsets(self, rng, counts):
+        """
+        Har row ke liye counts[i] alag values bina replacement (weighted) - Gumbel top-k trick,
+        ek hi argsort, per-row rng.choice nahi
+        """
+        keys = np.log(self.p) + rng.gumbel(size=(len(counts), len(self.values)))
+        order = np.argsort(-keys, axis=1)
+        return [[self.values[j] for j in row[:count]] for row, count in zip(order.tolist(), counts.tolist())]
+
+
+class PopulationGenerator:
+    """
+    Donors, recipients aur unke OrganMatch rows batches mein banayega
+
+    WHY: Matching / dashboards ko production scale (10^5-10^6 profiles) par benchmark karna
+    WHERE: generate_population command
+    HOW: Pehle saare donors (user + profile + DonorOrgan, har batch ek transaction); unke user ids
+         (organ, blood type) pools mein rehte hain. Phir recipients batches mein, aur har recipient ke
+         matches usi organ ke compatible-blood donor pool se sample hote hain.
+    """
+
+    def __init__(self, seed=42, distributions=None, prefix='synth', password='password123', batch_size=5000):
+        self.rng = np.random.default_rng(seed)
+        self.distributions = {**DEFAULT_DISTRIBUTIONS, **(distributions or {})}
+        for name in BOOLEAN_DISTRIBUTIONS:
+            self.distributions[name] = {
+                (str(value).lower() == 'true'): weight for value, weight in self.distributions[name].items()
+            }
+        self.prefix = prefix
+        self.batch_size = batch_size
+        # Ek hi hash saare users ke liye (make_password har row par sabse mehenga step tha)
+        self.password = make_password(password)
+        self.today = timezone.localdate()
+
+        self.blood = Categorical(self.distributions['blood_type'])
+        self.city = Categorical(self.distributions['city'] or {city: 1 for city in gazetteer_cities()})
+        # City -> (latitude, longitude, geo_cell) - save() wala hi gazetteer lookup, har city ek baar
+        self.locations = {}
+        for city in self.city.values:
+            name, state = city if isinstance(city, tuple) else (city, '')
+            point = resolve_location(name, state)
+            self.locations[city] = (name, state, *(point + (geo_cell(*point),) if point else (None, None, None)))
+
+        # (organ, donor blood type) -> donor user id arrays
+        self.donor_pools = {}
+
+    def uniform(self, name, size, integer=False):
+        low, high = self.distributions[name]
+        if integer:
+            return self.rng.integers(low, high + 1, size=size)
+        return self.rng.uniform(low, high, size=size)
+
+    def build_users(self, user_type, start, count):
+        """CustomUser objects (unsaved) - location fields gazetteer se pehle hi bhare"""
+        blood_types = self.blood.sample(self.rng, count)
+        cities = self.city.sample(self.rng, count)
+        ages = self.uniform('age', count, integer=True)
+        # Umar + saal ke andar random din -> date_of_birth
+        offsets = (ages * 365.25).astype(np.int64) + self.rng.integers(0, 365, size=count)
+        births = (np.datetime64(self.today, 'D') - offsets.astype('timedelta64[D]')).astype(object)
+        phones = self.rng.integers(6_000_000_000, 9_999_999_999, size=count)
+
+        users = []
+        for i in range(count):
+            number = start + i
+            name, state, latitude, longitude, cell = self.locations[cities[i]]
+            username = f'{self.prefix}_{user_type[0]}{number}'
+            users.append(CustomUser(
+                username=username,
+                email=f'{username}@example.com',
+                first_name=user_type.capitalize(),
+                last_name=str(number),
+                password=self.password,
+                user_type=user_type,
+                phone_number=str(phones[i]),
+                date_of_birth=births[i],
+                blood_type=blood_types[i],
+                city=name,
+                state=state,
+                latitude=latitude,
+                longitude=longitude,
+                geo_cell=cell,
+            ))
+        return users
+
+    def create_donors(self, start, count):
+        """Ek batch: donor users + DonorProfile + DonorOrgan rows. Returns batch ke donor user ids"""
+        users = self.build_users('donor', start, count)
+        organ_counts = Categorical(self.distributions['donor_organ_count']).sample(self.rng, count).astype(np.int64)
+        organs = Categorical(self.distributions['donor_organs']).subsets(self.rng, organ_counts)
+        health = Categorical(self.distributions['health_status']).sample(self.rng, count)
+        smoking = Categorical(self.distributions['smoking_status']).sample(self.rng, count)
+        alcohol = Categorical(self.distributions['alcohol_use']).sample(self.rng, count)
+        drugs = Categorical(self.distributions['drug_use']).sample(self.rng, count)
+        available = Categorical(self.distributions['donor_available']).sample(self.rng, count)
+        heights = np.round(self.uniform('height', count), 1)
+        weights = np.round(self.uniform('weight', count), 1)
+        # DonorProfile.save() wala BMI formula
+        bmis = np.round(weights / (heights / 100) ** 2, 2)
+        sleep = np.round(self.uniform('avg_sleep', count), 1)
+        travel = self.uniform('travel_distance', count, integer=True)
+
+        with transaction.atomic():
+            CustomUser.objects.bulk_create(users, batch_size=self.batch_size)
+            profiles = [
+                DonorProfile(
+                    user=user,
+                    organs_donating=organs[i],
+                    health_status=health[i],
+                    smoking_status=smoking[i],
+                    alcohol_use=alcohol[i],
+                    drug_use=bool(drugs[i]),
+                    height=float(heights[i]),
+                    weight=float(weights[i]),
+                    bmi=float(bmis[i]),
+                    avg_sleep=float(sleep[i]),
+                    is_available=bool(available[i]),
+                    max_travel_distance=int(travel[i]),
+                )
+                for i, user in enumerate(users)
+            ]
+            DonorProfile.objects.bulk_create(profiles, batch_size=self.batch_size)
+            DonorOrgan.objects.bulk_create(
+                [DonorOrgan(donor=profile, organ=organ) for profile in profiles for organ in profile.organs_donating],
+                batch_size=self.batch_size,
+            )
+
+        # Sirf available donors matches ke pools mein
+        for user, profile in zip(users, profiles):
+            if profile.is_available:
+                for organ in profile.organs_donating:
+                    self.donor_pools.setdefault((organ, user.blood_type), []).append(user.id)
+        return len(users)
+
+    def recipient_pools(self):
+        """(organ, recipient blood type) -> compatible donors ke user ids (numpy) - donors ke baad ek baar"""
+        pools = {}
+        organs = {organ for organ, _ in self.donor_pools}
+        for organ in organs:
+            for blood_type in BLOOD_TYPES:
+                ids = [
+                    donor_id
+                    for donor_type in compatible_donor_types(blood_type)
+                    for donor_id in self.donor_pools.get((organ, donor_type), ())
+                ]
+                if ids:
+                    pools[(organ, blood_type)] = np.asarray(ids, dtype=np.int64)
+        return pools
+
+    def create_recipients(self, start, count, pools, matches_per_recipient):
+        """Ek batch: recipient users + RecipientProfile + RecipientOrgan + OrganMatch rows. Returns (recipients, matches)"""
+        users = self.build_users('recipient', start, count)
+        organ_counts = Categorical(self.distributions['recipient_organ_count']).sample(self.rng, count).astype(np.int64)
+        organs = Categorical(self.distributions['recipient_organs']).subsets(self.rng, organ_counts)
+        urgency = Categorical(self.distributions['urgency_level']).sample(self.rng, count)
+        smoking = self.rng.random(count) < 0.15
+        alcohol = self.rng.random(count) < 0.3
+        drugs = self.rng.random(count) < 0.05
+        sleep = np.round(self.uniform('avg_sleep', count), 1)
+        travel = self.uniform('travel_distance', count, integer=True)
+        conditions = self.rng.integers(0, len(MEDICAL_CONDITIONS), size=count)
+        diagnosed = self.rng.integers(30, 5 * 365, size=count)
+
+        with transaction.atomic():
+            CustomUser.objects.bulk_create(users, batch_size=self.batch_size)
+            profiles = [
+                RecipientProfile(
+                    user=user,
+                    organs_needed=organs[i],
+                    urgency_level=urgency[i],
+                    medical_condition=MEDICAL_CONDITIONS[conditions[i]],
+                    diagnosis_date=self.today - timedelta(days=int(diagnosed[i])),
+                    max_travel_distance=int(travel[i]),
+                    smoking_status=bool(smoking[i]),
+                    alcohol_use=bool(alcohol[i]),
+                    drug_use=bool(drugs[i]),
+                    avg_sleep=float(sleep[i]),
+                )
+                for i, user in enumerate(users)
+            ]
+            RecipientProfile.objects.bulk_create(profiles, batch_size=self.batch_size)
+            RecipientOrgan.objects.bulk_create(
+                [RecipientOrgan(recipient=profile, organ=organ) for profile in profiles for organ in profile.organs_needed],
+                batch_size=self.batch_size,
+            )
+
+            matches = self.build_matches(users, organs, pools, matches_per_recipient)
+            OrganMatch.objects.bulk_create(matches, batch_size=self.batch_size, ignore_conflicts=True)
+
+        return len(users), len(matches)
+
+    def build_matches(self, recipients, organs, pools, matches_per_recipient):
+        """Har recipient ke liye uske organs ke compatible-blood donor pools se distinct donors"""
+        if not matches_per_recipient or not pools:
+            return []
+
+        statuses = Categorical(self.distributions['match_status'])
+        now = timezone.now()
+        matches = []
+        for recipient, needed in zip(recipients, organs):
+            candidates = [(organ, pools[(organ, recipient.blood_type)]) for organ in needed
+                          if (organ, recipient.blood_type) in pools]
+            if not candidates:
+                continue
+
+            chosen = {}
+            for organ, pool in candidates:
+                picks = pool[self.rng.integers(0, len(pool), size=matches_per_recipient)]
+                for donor_id in picks.tolist():
+                    chosen.setdefault(donor_id, []).append(organ)
+                    if len(chosen) >= matches_per_recipient:
+                        break
+                if len(chosen) >= matches_per_recipient:
+                    break
+
+            count = len(chosen)
+            scores = np.round(self.uniform('match_score', count), 2)
+            status = statuses.sample(self.rng, count)
+            expires = self.uniform('match_expires_days', count, integer=True)
+            for j, (donor_id, matched) in enumerate(chosen.items()):
+                # expired rows ki expiry beet chuki ho (expire_stale jaisi state)
+                days = -int(expires[j]) if status[j] == 'expired' else int(expires[j])
+                matches.append(OrganMatch(
+                    donor_id=donor_id,
+                    recipient_id=recipient.id,
+                    match_score=float(scores[j]),
+                    organs_matched=sorted(set(matched)),
+                    status=status[j],
+                    expires_at=now + timedelta(days=days),
+                ))
+        return matches
@@ -1,3 +1,184 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db.models import Count
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from .match_cache import (
+    RANKING_SIZE, get_ranking, patch_ranking, ranked_recipients, ranking_entry, ranking_key, set_ranking,
+)
+from .models import OrganMatch
+from .pagination import decode_cursor, encode_cursor, keyset_page
+
+
+def make_users(prefix, count, user_type):
+    return [
+        CustomUser.objects.create(username=f'{prefix}{i}', user_type=user_type, blood_type='O+')
+        for i in range(count)
+    ]
+
+
+class ExpireStaleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipient = make_users('recipient', 1, 'recipient')[0]
+        cls.donors = make_users('donor', 30, 'donor')
+        cls.now = timezone.now()
+
+    def create_matches(self, statuses_and_expiry):
+        OrganMatch.objects.bulk_create([
+            OrganMatch(donor=donor, recipient=self.recipient, match_score=80, status=status, expires_at=expires_at)
+            for donor, (status, expires_at) in zip(self.donors, statuses_and_expiry)
+        ])
+
+    def test_expires_only_stale_pending_in_batches(self):
+        past, future = self.now - timedelta(days=1), self.now + timedelta(days=1)
+        self.create_matches([('pending', past)] * 25 + [('pending', future)] * 3 + [('accepted', past)] * 2)
+
+        # 10 + 10 + 5: har batch ek ids SELECT + ek UPDATE, chhota batch aakhri
+        with self.assertNumQueries(6):
+            expired = OrganMatch.expire_stale(now=self.now, batch_size=10)
+
+        self.assertEqual(expired, 25)
+        counts = dict(OrganMatch.objects.values_list('status').annotate(total=Count('id')))
+        self.assertEqual(counts, {'expired': 25, 'pending': 3, 'accepted': 2})
+
+    def test_match_accepted_between_select_and_update_is_not_expired(self):
+        self.create_matches([('pending', self.now - timedelta(days=1))] * 5)
+        original_filter = OrganMatch.objects.filter
+        accepted = []
+
+        def accept_first(*args, **kwargs):
+            # Sweeper ne ids padh liye, UPDATE se pehle doosri request ne ek match accept kiya
+            if 'id__in' in kwargs and not accepted:
+                accepted.append(kwargs['id__in'][0])
+                original_filter(id=accepted[0]).update(status='accepted')
+            return original_filter(*args, **kwargs)
+
+        with mock.patch.object(OrganMatch.objects, 'filter', side_effect=accept_first):
+            expired = OrganMatch.expire_stale(now=self.now)
+
+        self.assertEqual(expired, 4)
+        self.assertEqual(OrganMatch.objects.get(id=accepted[0]).status, 'accepted')
+
+
+class KeysetPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        recipient = make_users('recipient', 1, 'recipient')[0]
+        donors = make_users('donor', 8, 'donor')
+        expires_at = timezone.now() + timedelta(days=30)
+        # Score aur created_at dono par ties - sirf id order decide karta hai
+        scores = [91.5, 87.35, 87.35, 87.35, 87.35, 70.0, 70.0, 55.25]
+        OrganMatch.objects.bulk_create([
+            OrganMatch(donor=donor, recipient=recipient, match_score=score, expires_at=expires_at)
+            for donor, score in zip(donors, scores)
+        ])
+        cls.created_at = timezone.now().replace(microsecond=123456)
+        OrganMatch.objects.update(created_at=cls.created_at)
+        # Kuch 87.35 / 70.0 rows pehle bani - score tie par created_at se order
+        earlier = OrganMatch.objects.filter(match_score__in=[87.35, 70.0]).order_by('id').values_list('id', flat=True)
+        OrganMatch.objects.filter(id__in=list(earlier)[::2]).update(created_at=cls.created_at - timedelta(seconds=1))
+        cls.matches = OrganMatch.objects.all()
+
+    def collect(self, size):
+        ids, cursor, pages = [], None, 0
+        while True:
+            page, token = keyset_page(self.matches, cursor, size)
+            ids.extend(match.id for match in page)
+            pages += 1
+            if token is None:
+                return ids, pages
+            cursor = decode_cursor(token)
+
+    def test_pages_follow_ordering_across_ties(self):
+        expected = list(self.matches.order_by('-match_score', '-created_at', '-id').values_list('id', flat=True))
+        for size in (1, 3, 5, 8, 20):
+            with self.subTest(size=size):
+                ids, _ = self.collect(size)
+                self.assertEqual(ids, expected)
+
+    def test_exact_multiple_has_no_empty_trailing_page(self):
+        # 8 rows, size 4: size + 1 fetch dusre page par aage kuch nahi dekhta
+        _, pages = self.collect(4)
+        self.assertEqual(pages, 2)
+        with self.assertNumQueries(1):
+            page, token = keyset_page(self.matches, None, 8)
+        self.assertEqual((len(page), token), (8, None))
+
+    def test_cursor_round_trip(self):
+        match = self.matches.get(match_score=55.25)
+        self.assertEqual(decode_cursor(encode_cursor(match)), (55.25, self.created_at, match.id))
+        self.assertEqual(decode_cursor(encode_cursor(self.matches.filter(match_score=87.35).first()))[0], 87.35)
+
+    def test_bad_cursor_means_first_page(self):
+        self.assertIsNone(decode_cursor('not-a-cursor'))
+        self.assertIsNone(decode_cursor(''))
+
+
+def entry(donor_id, final_score):
+    donor = mock.Mock(id=donor_id, user_id=1000 + donor_id)
+    return ranking_entry(donor, final_score, final_score, True, ['kidney'], False)
+
+
+class PatchRankingTests(SimpleTestCase):
+    recipient = 7
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def cache_ranking(self, scores):
+        set_ranking(self.recipient, 'v1', 'gen', [entry(donor_id, score) for donor_id, score in scores])
+
+    def ranking(self):
+        matches = get_ranking(self.recipient, 'v1', 'gen')
+        return None if matches is None else [(match['donor_id'], match['final_score']) for match in matches]
+
+    def test_insert_keeps_score_then_donor_id_order(self):
+        self.cache_ranking([(1, 90), (3, 80), (4, 70)])
+        patch_ranking(self.recipient, 2, entry(2, 80))
+        self.assertEqual(self.ranking(), [(1, 90), (2, 80), (3, 80), (4, 70)])
+        self.assertIn(self.recipient, ranked_recipients(2))
+
+    def test_rescored_donor_moves(self):
+        self.cache_ranking([(1, 90), (2, 80), (3, 70)])
+        patch_ranking(self.recipient, 3, entry(3, 95))
+        self.assertEqual(self.ranking(), [(3, 95), (1, 90), (2, 80)])
+
+    def test_remove_from_partial_ranking(self):
+        self.cache_ranking([(1, 90), (2, 80)])
+        patch_ranking(self.recipient, 1, None)
+        self.assertEqual(self.ranking(), [(2, 80)])
+
+    def test_remove_from_full_ranking_drops_it(self):
+        # Truncated tail ke neeche ka agla donor pata nahi - agli request recompute karegi
+        self.cache_ranking([(donor_id, 100 - donor_id) for donor_id in range(RANKING_SIZE)])
+        patch_ranking(self.recipient, 5, None)
+        self.assertIsNone(cache.get(ranking_key(self.recipient)))
+
+    def test_below_tail_of_full_ranking(self):
+        self.cache_ranking([(donor_id, 100 - donor_id) for donor_id in range(RANKING_SIZE)])
+        patch_ranking(self.recipient, 999, entry(999, 1))
+        self.assertEqual(len(self.ranking()), RANKING_SIZE)
+        self.assertNotIn(999, [donor_id for donor_id, _ in self.ranking()])
+
+        # Ranking mein tha aur ab tail ke neeche gira - jagah ka pata nahi
+        patch_ranking(self.recipient, 3, entry(3, 1))
+        self.assertIsNone(cache.get(ranking_key(self.recipient)))
+
+    def test_unknown_donor_or_uncached_ranking_is_noop(self):
+        patch_ranking(self.recipient, 1, entry(1, 90))
+        self.assertIsNone(cache.get(ranking_key(self.recipient)))
+
+        self.cache_ranking([(1, 90)])
+        patch_ranking(self.recipient, 2, None)
+        self.assertEqual(self.ranking(), [(1, 90)])
+
+    def test_set_ranking_indexes_donors(self):
+        self.cache_ranking([(1, 90), (2, 80)])
+        self.assertEqual(ranked_recipients(1), {self.recipient})
+        self.assertIsNone(ranked_recipients(3))
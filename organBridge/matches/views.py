@@ -1,18 +1,76 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.paginator import Paginator
+from django.db.models import Count
 from django.http import JsonResponse
 from django.utils import timezone
 from datetime import timedelta
-from profiles.models import DonorProfile, RecipientProfile
-from ml_model.matching_algorithm import OrganMatchingEngine
+from accounts.geo import travel_radius, within_radius_filter
+from profiles.models import DonorProfile, RecipientProfile, organ_list
+from ml_model.blood_compatibility import compatible_donor_types
+from ml_model.matching_algorithm import get_matching_engine
+from .match_cache import PAGE_SIZE, RANKING_SIZE, STREAM_CHUNK_SIZE, donor_generation, get_ranking, ranking_entry, set_ranking
 from .models import OrganMatch, MatchMessage, MatchPreference
+from .pagination import decode_cursor, keyset_page
 from .forms import MatchPreferenceForm, MessageForm
 
+def rank_matches(recipient_profile, preference=None):
+    """
+    Recipient ke liye poori ranking (top RANKING_SIZE) calculate karega - scorer yahin chalta hai.
+    preference (MatchPreference) ho to uske min_match_score / max_distance cut-offs lagte hain.
+    Returns (ranking, donors) - ranking plain dicts ki list (cache ho sakti hai),
+    donors {donor_profile_id: DonorProfile} (already loaded instances)
+    """
+    # Sirf wahi available donors jo recipient ka koi organ donate kar rahe hain (DonorOrgan index)
+    donor_profiles = DonorProfile.objects.filter(
+        is_available=True,
+        organ_entries__organ__in=organ_list(recipient_profile.organs_needed)
+    )
+    
+    # Blood type incompatible donors load / score hi nahi honge
+    # (recipient ka blood type unknown ho to filter nahi lagta)
+    compatible_blood_types = compatible_donor_types(recipient_profile.user.blood_type)
+    if compatible_blood_types:
+        donor_profiles = donor_profiles.filter(user__blood_type__in=compatible_blood_types)
+    
+    min_score, max_distance = preference.thresholds() if preference else (None, None)
+    
+    # Recipient ke travel radius ke grid cells (geo_cell index); exact distance aur donor ki
+    # apni limit engine haversine se check karta hai
+    user = recipient_profile.user
+    radius = travel_radius(recipient_profile.max_travel_distance, max_distance)
+    donor_profiles = donor_profiles.filter(
+        within_radius_filter('user__geo_cell', user.latitude, user.longitude, radius)
+    )
+    donor_profiles = donor_profiles.distinct().order_by('id')
+    
+    # Use ML matching engine to find best matches
+    matches_data = get_matching_engine().find_matches(
+        recipient_profile, donor_profiles, top_n=RANKING_SIZE,
+        min_score=min_score, max_distance=max_distance, chunk_size=STREAM_CHUNK_SIZE
+    )
+    
+    ranking = [
+        ranking_entry(
+            match_data['donor'],
+            match_data['ml_score'],
+            match_data['final_score'],
+            match_data['compatibility_details']['blood_match'],
+            match_data['compatibility_details']['organs_matched'],
+            match_data['compatibility_details']['location_same'],
+        )
+        for match_data in matches_data
+    ]
+    return ranking, {match_data['donor'].id: match_data['donor'] for match_data in matches_data}
+
+
 @login_required
 def find_matches(request):
     """
     Find matches for recipient using ML algorithm
+    Ranking per-recipient cache hoti hai (donor generation + model version ke saath);
+    repeat views aur pagination scorer ko touch nahi karte
     """
     if not request.user.is_recipient():
         messages.error(request, 'Only recipients can search for matches.')
@@ -20,56 +78,64 @@ def find_matches(request):
     
     try:
         # Get recipient profile
-        recipient_profile = get_object_or_404(RecipientProfile, user=request.user)
+        recipient_profile = get_object_or_404(RecipientProfile.objects.select_related('user'), user=request.user)
         
-        # Get all available donors
-        donor_profiles = DonorProfile.objects.filter(is_available=True)
+        matching_engine = get_matching_engine()
+        model_version = matching_engine.manifest['version'] if matching_engine.manifest else 'legacy'
+        # Generation scoring se pehle padhna zaroori hai (beech ke donor changes miss na hon)
+        generation = donor_generation()
         
-        if not donor_profiles.exists():
-            messages.warning(request, 'No donors are currently available.')
-            return render(request, 'matches/find_matches.html', {
-                'recipient': recipient_profile,
-                'matches': []
-            })
+        ranking = get_ranking(request.user.id, model_version, generation)
+        donors = {}
+        if ranking is None:
+            # Preference badalne par signal cached ranking hata deta hai
+            preference = MatchPreference.objects.filter(user=request.user).first()
+            ranking, donors = rank_matches(recipient_profile, preference)
+            set_ranking(request.user.id, model_version, generation, ranking)
+        
+        if not ranking:
+            messages.warning(request, 'No available donors match your organ needs, blood type and match preferences.')
+        
+        page = Paginator(ranking, PAGE_SIZE).get_page(request.GET.get('page'))
         
-        # Use ML matching engine to find best matches
-        matching_engine = OrganMatchingEngine()
-        matches_data = matching_engine.find_matches(recipient_profile, donor_profiles, top_n=10)
+        # Is page ke donors (cache hit par ek in_bulk query)
+        missing = [entry['donor_id'] for entry in page if entry['donor_id'] not in donors]
+        if missing:
+            donors.update(DonorProfile.objects.select_related('user').in_bulk(missing))
+        page_entries = [entry for entry in page if entry['donor_id'] in donors]
+        
+        # Is page ke OrganMatch rows ek bulk upsert mein (per-match get_or_create nahi)
+        match_ids = OrganMatch.bulk_get_or_create(request.user, [
+            {
+                'donor_id': entry['donor_user_id'],  # FIXED: CustomUser id, not DonorProfile
+                'match_score': entry['final_score'],
+                'organs_matched': entry['organs_matched'],
+            }
+            for entry in page_entries
+        ])
         
         # Format matches for template - FIXED: Use CustomUser instances
         formatted_matches = []
-        for match_data in matches_data:
-            # Get the donor user from donor profile
-            donor_user = match_data['donor'].user  # FIXED: Get the CustomUser instance
-            
-            # Check if OrganMatch already exists, if not create one
-            organ_match, created = OrganMatch.objects.get_or_create(
-                donor=donor_user,  # FIXED: Pass CustomUser, not DonorProfile
-                recipient=request.user,  # FIXED: Pass CustomUser, not RecipientProfile
-                defaults={
-                    'match_score': match_data['final_score'],
-                    'organs_matched': match_data['compatibility_details']['organs_matched'],
-                    'expires_at': timezone.now() + timedelta(days=30),
-                    'status': 'pending'
-                }
-            )
+        for entry in page_entries:
+            donor = donors[entry['donor_id']]
             
             formatted_matches.append({
-                'match_id': organ_match.id,
-                'donor': match_data['donor'],  # Keep profile for display
-                'donor_user': donor_user,  # Add user for OrganMatch
-                'match_score': match_data['final_score'],
-                'ml_score': match_data['ml_score'],
-                'compatibility': get_compatibility_level(match_data['final_score']),
-                'blood_compatible': match_data['compatibility_details']['blood_match'],
-                'organs_matched': match_data['compatibility_details']['organs_matched'],
-                'same_location': match_data['compatibility_details']['location_same'],
+                'match_id': match_ids[entry['donor_user_id']],
+                'donor': donor,  # Keep profile for display
+                'donor_user': donor.user,  # Add user for OrganMatch
+                'match_score': entry['final_score'],
+                'ml_score': entry['ml_score'],
+                'compatibility': get_compatibility_level(entry['final_score']),
+                'blood_compatible': entry['blood_match'],
+                'organs_matched': entry['organs_matched'],
+                'same_location': entry['location_same'],
             })
         
         context = {
             'recipient': recipient_profile,
             'matches': formatted_matches,
-            'total_matches': len(formatted_matches),
+            'total_matches': len(ranking),
+            'page_obj': page,
         }
         
         return render(request, 'matches/find_matches.html', context)
@@ -151,57 +217,56 @@ def update_match_status(request, match_id, status):
 
 
 
-# @login_required
-# def my_matches(request):
-#     """Show user's current matches"""
-#     user_matches = OrganMatch.objects.none()
-    
-#     if request.user.is_donor():
-#         user_matches = OrganMatch.objects.filter(donor__user=request.user)
-#     elif request.user.is_recipient():
-#         user_matches = OrganMatch.objects.filter(recipient__user=request.user)
-    
-#     # Separate matches by status
-#     active_matches = user_matches.filter(status__in=['pending', 'accepted']).exclude(expires_at__lt=timezone.now())
-#     expired_matches = user_matches.filter(status='expired') | user_matches.filter(expires_at__lt=timezone.now())
-#     rejected_matches = user_matches.filter(status='rejected')
-    
-#     return render(request, 'matches/my_matches.html', {
-#         'active_matches': active_matches,
-#         'expired_matches': expired_matches,
-#         'rejected_matches': rejected_matches
-#     })
+# Dashboard tab -> OrganMatch status (accepted matches ka tab nahi hai - woh sirf counts mein)
+MY_MATCHES_TABS = {'active': 'pending', 'expired': 'expired', 'rejected': 'rejected'}
 
 
+@login_required
 def my_matches(request):
-    if request.user.is_authenticated:
-        if request.user.user_type == 'recipient':
-            user_matches = OrganMatch.objects.filter(recipient=request.user)
-        elif request.user.user_type == 'donor':
-            user_matches = OrganMatch.objects.filter(donor=request.user)
-        else:
-            user_matches = OrganMatch.objects.none()
-        
-        # Add related user data
-        user_matches = user_matches.select_related('donor', 'recipient')
-        
-        # Calculate different match types for the template
-        active_matches = user_matches.filter(status='pending')
-        accepted_matches = user_matches.filter(status='accepted')
-        rejected_matches = user_matches.filter(status='rejected')
-        expired_matches = user_matches.filter(status='expired')
-        
-        context = {
-            'user_matches': user_matches,
-            'user_type': request.user.user_type,
-            'active_matches': active_matches,
-            'accepted_matches': accepted_matches,
-            'rejected_matches': rejected_matches,
-            'expired_matches': expired_matches,
-        }
-        return render(request, 'matches/my_matches.html', context)
+    """
+    User ke matches - har tab ka ek keyset page, aur status counts ek aggregate query se.
+    ?tab=<tab>&after=<cursor> sirf us tab ko aage badhata hai, baaki tabs pehle page par rehte hain.
+    """
+    if request.user.user_type == 'recipient':
+        user_matches = OrganMatch.objects.filter(recipient=request.user)
+    elif request.user.user_type == 'donor':
+        user_matches = OrganMatch.objects.filter(donor=request.user)
     else:
-        return redirect('login')
+        user_matches = OrganMatch.objects.none()
+    
+    # Saare status counts ek GROUP BY query mein
+    status_counts = dict(
+        user_matches.order_by().values('status').annotate(total=Count('id')).values_list('status', 'total')
+    )
+    match_counts = {tab: status_counts.get(status, 0) for tab, status in MY_MATCHES_TABS.items()}
+    match_counts['accepted'] = status_counts.get('accepted', 0)
+    # Template ka "Total" active / expired / closed tabs ka jod hai (accepted kisi tab mein nahi)
+    match_counts['total'] = match_counts['active'] + match_counts['expired'] + match_counts['rejected']
+    match_counts['all'] = sum(status_counts.values())
+    
+    tab = request.GET.get('tab')
+    if tab not in MY_MATCHES_TABS:
+        tab = 'active'
+    cursor = decode_cursor(request.GET.get('after'))
+    
+    context = {
+        'user_type': request.user.user_type,
+        'match_counts': match_counts,
+        'tab': tab,
+        'paged': cursor is not None,
+    }
+    for name, status in MY_MATCHES_TABS.items():
+        page, next_cursor = [], None
+        if match_counts[name]:
+            page, next_cursor = keyset_page(
+                user_matches.filter(status=status).select_related('donor', 'recipient'),
+                cursor if name == tab else None,
+                PAGE_SIZE,
+            )
+        context[f'{name}_matches'] = page
+        context[f'{name}_next'] = next_cursor
+    
+    return render(request, 'matches/my_matches.html', context)
 
 
 @login_required
@@ -1,3 +1,8 @@
 from django.contrib import admin
+from .models import TrainingJob
 
-# Register your models here.
+@admin.register(TrainingJob)
+class TrainingJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'progress', 'message', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    readonly_fields = ('created_at', 'updated_at', 'started_at', 'finished_at', 'worker')
@@ -1,15 +1,18 @@
 # ml_model/apps.py mein
 from django.apps import AppConfig
-import os
 
 class MlModelConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ml_model'
     
     def ready(self):
+        # Donor index ko DonorProfile changes ke saath sync rakhne wale signals
+        from . import signals  # noqa: F401
+        
         # Check if models already exist
-        models_dir = os.path.join(os.path.dirname(__file__), 'trained_models')
-        if not os.path.exists(models_dir) or not os.listdir(models_dir):
-            from .train_model import train_ml_model
-            print("Training ML model for first time...")
-            train_ml_model()
\ No newline at end of file
+        # Training yahan synchronously nahi hoti (har manage.py command / worker boot block hota tha);
+        # `run_training_worker` missing model ke liye khud job queue kar deta hai
+        from .artifacts import ArtifactStore
+        if not ArtifactStore().has_model():
+            print("ML model not trained yet. Run `python manage.py run_training_worker` "
+                  "(or `python manage.py train_ml`) to train it.")
\ No newline at end of file
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+VERSIONS_DIRNAME = 'versions'
+CURRENT_FILENAME = 'current.json'
+MANIFEST_FILENAME = 'manifest.json'
+# Feature encoder files - pickled TfidfVectorizer ya hashing encoder ka config
+MODEL_FILENAMES = ('tf_model.pkl', 'encoder.json')
+
+
+def file_checksum(path):
+    """File ka sha256 (chunks mein, taki badi files memory mein na aayein)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_json_atomic(path, data):
+    """JSON file ko temp file + os.replace se likhega - readers ko kabhi aadhi file nahi milegi"""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def save_csr(directory, name, matrix):
+    """
+    CSR matrix ko alag-alag .npy files (data / indices / indptr / shape) mein save karega.
+    Raw .npy files mmap_mode='r' se load ho sakti hain - .npz nahi.
+    """
+    matrix = sparse.csr_matrix(matrix)
+    np.save(os.path.join(directory, f'{name}_data.npy'), matrix.data)
+    np.save(os.path.join(directory, f'{name}_indices.npy'), matrix.indices)
+    np.save(os.path.join(directory, f'{name}_indptr.npy'), matrix.indptr)
+    np.save(os.path.join(directory, f'{name}_shape.npy'), np.array(matrix.shape, dtype=np.int64))
+
+
+def has_csr(directory, name):
+    return os.path.exists(os.path.join(directory, f'{name}_data.npy'))
+
+
+def load_csr(directory, name, mmap=True):
+    """
+    save_csr wali matrix load karega. mmap=True par arrays OS page cache se map hote hain,
+    isliye saare worker processes same physical pages share karte hain (copy nahi hoti).
+    """
+    mode = 'r' if mmap else None
+    data = np.load(os.path.join(directory, f'{name}_data.npy'), mmap_mode=mode)
+    indices = np.load(os.path.join(directory, f'{name}_indices.npy'), mmap_mode=mode)
+    indptr = np.load(os.path.join(directory, f'{name}_indptr.npy'), mmap_mode=mode)
+    shape = tuple(int(n) for n in np.load(os.path.join(directory, f'{name}_shape.npy')))
+    return sparse.csr_matrix((data, indices, indptr), shape=shape, copy=False)
+
+
+class ArtifactStore:
+    """
+    Versioned, atomic model artifact store
+
+    WHY: save_models files ko in-place overwrite karta tha, retrain ke beech padhne wala
+         worker naya vocabulary aur purana matrix load kar sakta tha
+    WHERE: MLModelTrainer naye versions publish karta hai, matching engine current version padhta hai
+    HOW: Har training ek staging directory mein likhti hai, phir
+         trained_models/versions/<version>/ mein rename hoti hai (manifest ke saath).
+         trained_models/current.json pointer atomically swap hota hai; workers uska mtime
+         dekh kar agli request par naya version load karte hain.
+    """
+
+    def __init__(self, root=None, keep_versions=3):
+        self.root = root or os.path.join(settings.BASE_DIR, 'ml_model/trained_models/')
+        self.versions_dir = os.path.join(self.root, VERSIONS_DIRNAME)
+        self.current_path = os.path.join(self.root, CURRENT_FILENAME)
+        self.keep_versions = keep_versions
+
+    def begin_version(self):
+        """Naye version ke liye staging directory banayega"""
+        os.makedirs(self.versions_dir, exist_ok=True)
+        return tempfile.mkdtemp(dir=self.versions_dir, prefix='.staging-')
+
+    def publish(self, staging_dir, vocabulary_hash, row_count, extra=None):
+        """
+        Staging directory ko final version banayega aur current pointer swap karega.
+        Returns manifest dict
+        """
+        version = f"{timezone.now().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:6]}"
+        files = {}
+        for name in sorted(os.listdir(staging_dir)):
+            path = os.path.join(staging_dir, name)
+            stat = os.stat(path)
+            # sha256 sirf yahin (publish par) banta hai; load par size + mtime hi compare hote hain
+            # (rename se file ka mtime nahi badalta)
+            files[name] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': file_checksum(path)}
+
+        manifest = {
+            'version': version,
+            'created_at': timezone.now().isoformat(),
+            'vocabulary_hash': vocabulary_hash,
+            'row_count': int(row_count),
+            'files': files,
+        }
+        manifest.update(extra or {})
+        write_json_atomic(os.path.join(staging_dir, MANIFEST_FILENAME), manifest)
+
+        os.rename(staging_dir, os.path.join(self.versions_dir, version))
+        write_json_atomic(self.current_path, manifest)
+
+        self.cleanup()
+        return manifest
+
+    def discard(self, staging_dir):
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def current_manifest(self):
+        """Current version ka manifest, ya None (legacy flat layout / untrained)"""
+        try:
+            with open(self.current_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def manifest_mtime(self):
+        """current.json ka mtime - hot reload check ke liye (sirf ek stat call)"""
+        try:
+            return os.stat(self.current_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def version_dir(self, manifest):
+        return os.path.join(self.versions_dir, manifest['version'])
+
+    def current_dir(self):
+        """Current artifacts ki directory - pointer na ho to purana flat layout"""
+        manifest = self.current_manifest()
+        return self.version_dir(manifest) if manifest else self.root
+
+    def has_model(self):
+        directory = self.current_dir()
+        return any(os.path.exists(os.path.join(directory, name)) for name in MODEL_FILENAMES)
+
+    def verify(self, manifest, checksums=False):
+        """
+        Version directory ko manifest se verify karega. Default sirf stat() - size + mtime compare
+        (poori file padhna mmap ka fayda khatam kar deta). sha256 sirf checksums=True par, ya jis file
+        ka mtime manifest se alag ho (jaise copy / restore ke baad)
+        """
+        directory = self.version_dir(manifest)
+        for name, info in manifest['files'].items():
+            path = os.path.join(directory, name)
+            stat = os.stat(path)
+            if stat.st_size != info['size']:
+                raise ValueError(f"Size mismatch for {name} in version {manifest['version']}")
+            if checksums or info.get('mtime_ns') != stat.st_mtime_ns:
+                if file_checksum(path) != info['sha256']:
+                    raise ValueError(f"Checksum mismatch for {name} in version {manifest['version']}")
+
+    def cleanup(self):
+        """Purane versions hatayega (current + latest keep_versions rakhega)"""
+        manifest = self.current_manifest()
+        current = manifest['version'] if manifest else None
+        versions = sorted(
+            name for name in os.listdir(self.versions_dir)
+            if not name.startswith('.')
+        )
+        for name in versions[:-self.keep_versions]:
+            if name != current:
+                shutil.rmtree(os.path.join(self.versions_dir, name), ignore_errors=True)
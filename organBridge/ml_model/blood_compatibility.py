@@ -0,0 +1,91 @@
+"""
+ABO/Rh blood type compatibility - poore project ke liye ek hi source
+
+WHY: Engine aur populate commands sab apni-apni compatibility dict rakhte the
+     (aur engine wali ulti thi - donor-keyed map ko recipient se lookup karta tha)
+WHERE: find_matches query (user__blood_type__in filter), engine ke business rules,
+       populate commands
+HOW: Donor tabhi compatible hai jab uske saare antigens (A, B, Rh D) recipient mein bhi hon.
+     Isse 8x8 boolean table aur har recipient type ke compatible donor types ek baar
+     module load par precompute hote hain.
+"""
+import numpy as np
+
+BLOOD_TYPES = ('O-', 'O+', 'A-', 'A+', 'B-', 'B+', 'AB-', 'AB+')
+BLOOD_TYPE_INDEX = {blood_type: i for i, blood_type in enumerate(BLOOD_TYPES)}
+
+
+def _antigens(blood_type):
+    abo, rh = blood_type[:-1], blood_type[-1]
+    antigens = set() if abo == 'O' else set(abo)
+    if rh == '+':
+        antigens.add('D')
+    return antigens
+
+
+# COMPATIBILITY_TABLE[donor, recipient] - True agar donor recipient ko de sakta hai
+COMPATIBILITY_TABLE = np.array(
+    [[_antigens(donor) <= _antigens(recipient) for recipient in BLOOD_TYPES] for donor in BLOOD_TYPES],
+    dtype=bool
+)
+
+# Recipient type -> compatible donor types (BLOOD_TYPES order mein)
+COMPATIBLE_DONOR_TYPES = {
+    recipient: tuple(BLOOD_TYPES[i] for i in np.flatnonzero(COMPATIBILITY_TABLE[:, j]))
+    for j, recipient in enumerate(BLOOD_TYPES)
+}
+
+# Donor type -> jin recipient types ko de sakta hai (incremental re-matching ke liye)
+COMPATIBLE_RECIPIENT_TYPES = {
+    donor: tuple(BLOOD_TYPES[j] for j in np.flatnonzero(COMPATIBILITY_TABLE[i, :]))
+    for i, donor in enumerate(BLOOD_TYPES)
+}
+
+
+def compatible_donor_types(recipient_blood):
+    """Recipient ke liye compatible donor blood types; unknown type par khali tuple"""
+    return COMPATIBLE_DONOR_TYPES.get(recipient_blood, ())
+
+
+def compatible_recipient_types(donor_blood):
+    """Donor jin recipient blood types ko de sakta hai; unknown type par khali tuple"""
+    return COMPATIBLE_RECIPIENT_TYPES.get(donor_blood, ())
+
+
+def is_compatible(donor_blood, recipient_blood):
+    """Single donor/recipient pair ka check (table lookup)"""
+    donor = BLOOD_TYPE_INDEX.get(donor_blood)
+    recipient = BLOOD_TYPE_INDEX.get(recipient_blood)
+    if donor is None or recipient is None:
+        return False
+    return bool(COMPATIBILITY_TABLE[donor, recipient])
+
+
+def compatibility_mask(donor_bloods, recipient_blood):
+    """Donor blood types ki list ke liye boolean numpy mask (vectorized lookup)"""
+    recipient = BLOOD_TYPE_INDEX.get(recipient_blood)
+    if recipient is None:
+        return np.zeros(len(donor_bloods), dtype=bool)
+
+    # Unknown donor type ke liye extra False column
+    column = np.append(COMPATIBILITY_TABLE[:, recipient], False)
+    codes = np.fromiter(
+        (BLOOD_TYPE_INDEX.get(blood, len(BLOOD_TYPES)) for blood in donor_bloods),
+        dtype=np.intp, count=len(donor_bloods)
+    )
+    return column[codes]
+
+
+def recipient_compatibility_mask(donor_blood, recipient_bloods):
+    """Ek donor type ke liye recipients ki blood types ka boolean mask (compatibility_mask ka ulta)"""
+    donor = BLOOD_TYPE_INDEX.get(donor_blood)
+    if donor is None:
+        return np.zeros(len(recipient_bloods), dtype=bool)
+
+    # Unknown recipient type ke liye extra False column
+    row = np.append(COMPATIBILITY_TABLE[donor, :], False)
+    codes = np.fromiter(
+        (BLOOD_TYPE_INDEX.get(blood, len(BLOOD_TYPES)) for blood in recipient_bloods),
+        dtype=np.intp, count=len(recipient_bloods)
+    )
+    return row[codes]
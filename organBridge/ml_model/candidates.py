@@ -0,0 +1,231 @@
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from profiles.models import DonorProfile, organ_list
+
+# Organ -> bit (organ overlap ek vectorized AND se); choices ke bahar ke organs ko lazily naya bit milta hai
+ORGAN_BITS = {organ: 1 << i for i, (organ, _) in enumerate(DonorProfile.ORGANS_CHOICES)}
+
+
+def organ_bits(organs):
+    """Organs list ka int bitmask"""
+    bits = 0
+    for organ in organs:
+        bit = ORGAN_BITS.get(organ)
+        if bit is None:
+            bit = ORGAN_BITS.setdefault(organ, 1 << min(len(ORGAN_BITS), 62))
+        bits |= bit
+    return bits
+
+
+def last_birthdays(dates, today=None):
+    """
+    date_of_birth values ka aaj tak ka sabse recent birthday - local midnight ka timestamp (float seconds,
+    vectorized); missing date par NaN. features.ages_from_dates jaisa hi din (29 Feb -> non-leap saal mein 1 March)
+    """
+    today = today or timezone.localdate()
+    born = np.array([np.datetime64('NaT') if value is None else value for value in dates], dtype='datetime64[D]')
+    if not len(born):
+        return np.zeros(0, dtype=np.float64)
+
+    missing = np.isnat(born)
+    today_day = np.datetime64(today, 'D')
+    born = np.where(missing, today_day, born)
+    months = born.astype('datetime64[M]')
+    day_offset = born - months.astype('datetime64[D]')
+    years = today.year - (born.astype('datetime64[Y]').astype(np.int64) + 1970)
+
+    # Is saal ka birthday (mahine + din offset, isliye 29 Feb overflow hokar 1 March); abhi nahi aaya to pichhle saal ka
+    birthdays = (months + 12 * years).astype('datetime64[D]') + day_offset
+    earlier = (months + 12 * (years - 1)).astype('datetime64[D]') + day_offset
+    birthdays = np.where(birthdays > today_day, earlier, birthdays)
+
+    midnight = pd.DatetimeIndex(birthdays).tz_localize(
+        timezone.get_current_timezone(), ambiguous='NaT', nonexistent='shift_forward'
+    )
+    return np.where(missing, np.nan, midnight.as_unit('s').asi8.astype(np.float64))
+
+
+class DonorSnapshot:
+    """
+    Candidate donors ka lightweight columnar snapshot
+
+    WHY: Engine har donor ke liye donor.user.city / blood_type padhta tha - select_related
+         ke bina har donor par ek query (N+1), aur saath mein poore model instances
+    WHERE: OrganMatchingEngine.find_matches aur batch scoring isi par chalte hain
+    HOW: Ek values_list query (DonorProfile JOIN CustomUser) se sirf scorer ke columns
+         numpy arrays mein. Model instances sirf final top-K ke liye load hote hain.
+    """
+
+    FIELDS = (
+        'id', 'user_id', 'updated_at', 'user__updated_at',
+        'user__city', 'user__blood_type', 'health_status', 'organs_donating',
+        'user__latitude', 'user__longitude', 'max_travel_distance', 'user__date_of_birth',
+    )
+
+    def __init__(self, ids, user_ids, versions, cities, blood_types, health, organs,
+                 latitudes, longitudes, travel_limits, instances=None, organ_masks=None):
+        self.ids = ids
+        self.user_ids = user_ids
+        self.versions = versions
+        self.cities = cities
+        self.blood_types = blood_types
+        self.health = health
+        self.organs = organs
+        # Har donor ke organs ka bitmask - organ filter poore pool par Python loop nahi
+        self.organ_masks = (
+            organ_masks if organ_masks is not None
+            else np.fromiter((organ_bits(value) for value in organs), dtype=np.int64, count=len(organs))
+        )
+        # Unknown location par NaN, travel limit na ho to inf
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.travel_limits = travel_limits
+        # from_donors se bane snapshot mein original instances (dobara load nahi karne padte)
+        self.instances = instances
+        # ids ka sort order (positions_of ke liye, lazily); engine index sync ke baad True karta hai
+        self._id_order = None
+        self.index_synced = False
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_rows(cls, rows, instances=None):
+        """(FIELDS order wale) tuples se snapshot banayega"""
+        count = len(rows)
+        columns = list(zip(*rows)) if rows else [()] * len(cls.FIELDS)
+        (ids, user_ids, updated_at, user_updated_at, cities, blood_types, health, organs,
+         latitudes, longitudes, travel_limits, dates_of_birth) = columns
+
+        def objects(values):
+            array = np.empty(count, dtype=object)
+            array[:] = list(values)
+            return array
+
+        def floats(values, missing):
+            return np.fromiter((missing if value is None else value for value in values), dtype=np.float64, count=count)
+
+        return cls(
+            ids=np.fromiter(ids, dtype=np.int64, count=count),
+            user_ids=np.fromiter(user_ids, dtype=np.int64, count=count),
+            # Donor version - DonorProfile ya CustomUser mein se jo baad mein update hua, ya birthday agar
+            # uske baad aaya (vector mein umar ka token hai - birthday par stored row re-encode hogi)
+            versions=np.fmax(
+                np.fromiter(
+                    (max(donor_time, user_time).timestamp() for donor_time, user_time in zip(updated_at, user_updated_at)),
+                    dtype=np.float64, count=count
+                ),
+                last_birthdays(dates_of_birth),
+            ),
+            cities=objects(cities),
+            blood_types=objects(blood_types),
+            health=objects(health),
+            organs=[organ_list(value) for value in organs],
+            latitudes=floats(latitudes, np.nan),
+            longitudes=floats(longitudes, np.nan),
+            travel_limits=floats(travel_limits, np.inf),
+            instances=instances,
+        )
+
+    @classmethod
+    def from_queryset(cls, queryset):
+        """DonorProfile queryset se snapshot - ek hi query (join), model instances nahi banenge"""
+        return cls.from_rows(list(queryset.values_list(*cls.FIELDS)))
+
+    @classmethod
+    def from_donors(cls, donors):
+        """Already loaded DonorProfile instances se snapshot (queries nahi)"""
+        donors = list(donors)
+        rows = [
+            (
+                donor.id, donor.user_id, donor.updated_at, donor.user.updated_at,
+                donor.user.city, donor.user.blood_type, donor.health_status, donor.organs_donating,
+                donor.user.latitude, donor.user.longitude, donor.max_travel_distance, donor.user.date_of_birth,
+            )
+            for donor in donors
+        ]
+        return cls.from_rows(rows, instances=donors)
+
+    @classmethod
+    def build(cls, donors):
+        """Snapshot, queryset ya instances list - kuch bhi ho, snapshot return karega"""
+        if isinstance(donors, cls):
+            return donors
+        if isinstance(donors, QuerySet):
+            return cls.from_queryset(donors)
+        return cls.from_donors(donors)
+
+    @classmethod
+    def stream(cls, donors, chunk_size=None):
+        """
+        Donors ko chunk_size ke snapshots mein yield karega. QuerySet server-side iterator se
+        padha jata hai, koi bhi iterable (generator) bhi chalega. chunk_size None = ek hi snapshot
+        """
+        if chunk_size is None or isinstance(donors, cls):
+            yield cls.build(donors)
+            return
+
+        if isinstance(donors, QuerySet):
+            rows, build = donors.values_list(*cls.FIELDS).iterator(chunk_size=chunk_size), cls.from_rows
+        else:
+            rows, build = iter(donors), cls.from_donors
+
+        while True:
+            batch = list(islice(rows, chunk_size))
+            if not batch:
+                break
+            yield build(batch)
+
+    def take(self, positions):
+        """Sirf diye gaye positions ka chhota snapshot"""
+        positions = np.asarray(positions, dtype=np.intp)
+        return DonorSnapshot(
+            ids=self.ids[positions],
+            user_ids=self.user_ids[positions],
+            versions=self.versions[positions],
+            cities=self.cities[positions],
+            blood_types=self.blood_types[positions],
+            health=self.health[positions],
+            organs=[self.organs[i] for i in positions.tolist()],
+            latitudes=self.latitudes[positions],
+            longitudes=self.longitudes[positions],
+            travel_limits=self.travel_limits[positions],
+            instances=[self.instances[i] for i in positions.tolist()] if self.instances is not None else None,
+            organ_masks=self.organ_masks[positions],
+        )
+
+    def organ_mask(self, organs):
+        """Kaunse donors in organs mein se koi donate kar rahe hain (bool array, vectorized)"""
+        return (self.organ_masks & organ_bits(organs)) != 0
+
+    def positions_of(self, donor_ids):
+        """
+        Donor ids ki snapshot positions (vectorized searchsorted). Returns (positions, found) -
+        snapshot mein na hon un ids ke liye found False
+        """
+        donor_ids = np.asarray(donor_ids, dtype=np.int64)
+        if not len(self) or not len(donor_ids):
+            return np.zeros(len(donor_ids), dtype=np.intp), np.zeros(len(donor_ids), dtype=bool)
+        if self._id_order is None:
+            self._id_order = np.argsort(self.ids, kind='stable')
+        sorted_ids = self.ids[self._id_order]
+        slots = np.minimum(np.searchsorted(sorted_ids, donor_ids), len(sorted_ids) - 1)
+        return self._id_order[slots], sorted_ids[slots] == donor_ids
+
+    def load_donors(self, positions=None):
+        """
+        In positions ke DonorProfile instances (user ke saath) - ek query mein.
+        Sirf display / re-encoding ke liye, scoring ke liye nahi. Beech mein delete hue donor ke liye None.
+        """
+        positions = range(len(self)) if positions is None else positions
+        if self.instances is not None:
+            return [self.instances[i] for i in positions]
+
+        ids = [int(self.ids[i]) for i in positions]
+        donors = DonorProfile.objects.select_related('user').in_bulk(ids)
+        return [donors.get(donor_id) for donor_id in ids]
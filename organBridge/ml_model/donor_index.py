@@ -0,0 +1,207 @@
+import threading
+
+import numpy as np
+from scipy import sparse
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import normalize
+
+
+class DonorIndex:
+    """
+    Donor vectors par nearest-neighbour retrieval index (IVF style)
+
+    WHY: find_matches har available donor ko score karke poori list sort karta tha
+    WHERE: OrganMatchingEngine.find_matches bade donor pools ke liye isse
+           top-K candidates nikalta hai, phir sirf unhi par business rules lagte hain
+    HOW: Donors ko k-means clusters mein baant dete hain. Query sirf recipient ke
+         sabse kareeb ke n_probe clusters ke donors ko score karti hai.
+         Insert/delete incremental hain (nearest centroid mein add / list se remove) - signals se,
+         aur sync ek numpy diff (indexed ids / versions arrays) se, poore pool par Python loop nahi.
+         Chhote pools ke liye exhaustive search hi hota hai.
+    """
+
+    def __init__(self, n_probe=4, exhaustive_threshold=500, random_state=42):
+        self.n_probe = n_probe
+        self.exhaustive_threshold = exhaustive_threshold
+        self.random_state = random_state
+        self.centroids = None
+        self.matrix = None        # saare indexed vectors (CSR), naye rows pending mein
+        self.pending = []
+        self.members = []         # cluster -> {donor_id: row}
+        self.assignment = {}      # donor_id -> cluster
+        self.versions = {}        # donor_id -> donor version
+        self.built_size = 0
+        # versions dict ki sorted (ids, versions) arrays - add / remove par invalid, sync par lazily
+        self._arrays = None
+        # cluster -> members ke (ids, rows) arrays - search ke liye, cluster badalne par invalid
+        self._cluster_arrays = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.assignment)
+
+    def build(self, donor_ids, versions, vectors):
+        """Poora index naye sire se banayega"""
+        vectors = sparse.csr_matrix(vectors)
+        n_clusters = max(1, int(np.sqrt(len(donor_ids))))
+
+        with self._lock:
+            if len(donor_ids) > n_clusters:
+                kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=self.random_state, n_init=3)
+                labels = kmeans.fit_predict(vectors)
+                self.centroids = normalize(kmeans.cluster_centers_)
+            else:
+                self.centroids = normalize(vectors.toarray()) if len(donor_ids) else None
+                labels = np.arange(len(donor_ids))
+
+            self.matrix = vectors
+            self.pending = []
+            self.members = [{} for _ in range(n_clusters)]
+            self.assignment = {}
+            self.versions = {}
+            for row, (donor_id, version, label) in enumerate(zip(donor_ids, versions, labels.tolist())):
+                self.members[label][donor_id] = row
+                self.assignment[donor_id] = label
+                self.versions[donor_id] = version
+            self.built_size = len(donor_ids)
+            self._arrays = None
+            self._cluster_arrays = {}
+
+    def add(self, donor_id, version, vector):
+        """Ek donor insert/update karega (nearest centroid wale cluster mein)"""
+        vector = sparse.csr_matrix(vector)
+        with self._lock:
+            if self.centroids is None:
+                return
+            self.remove(donor_id)
+            label = int(np.argmax(vector @ self.centroids.T))
+            row = self.matrix.shape[0] + len(self.pending)
+            self.pending.append(vector)
+            self.members[label][donor_id] = row
+            self.assignment[donor_id] = label
+            self.versions[donor_id] = version
+            self._arrays = None
+            self._cluster_arrays.pop(label, None)
+
+    def remove(self, donor_id):
+        """Donor ko index se hatayega (jaise is_available False hone par)"""
+        with self._lock:
+            label = self.assignment.pop(donor_id, None)
+            self.versions.pop(donor_id, None)
+            if label is not None:
+                self.members[label].pop(donor_id, None)
+                self._arrays = None
+                self._cluster_arrays.pop(label, None)
+
+    def cluster_arrays(self, label):
+        """Ek cluster ke members ke (ids, rows) numpy arrays (cached)"""
+        arrays = self._cluster_arrays.get(label)
+        if arrays is None:
+            members = self.members[label]
+            arrays = (
+                np.fromiter(members.keys(), dtype=np.int64, count=len(members)),
+                np.fromiter(members.values(), dtype=np.int64, count=len(members)),
+            )
+            self._cluster_arrays[label] = arrays
+        return arrays
+
+    def version_arrays(self):
+        """Indexed donors ke (ids, versions) numpy arrays, id order mein"""
+        with self._lock:
+            if self._arrays is None:
+                ids = np.fromiter(self.versions.keys(), dtype=np.int64, count=len(self.versions))
+                versions = np.fromiter(self.versions.values(), dtype=np.float64, count=len(self.versions))
+                order = np.argsort(ids)
+                self._arrays = (ids[order], versions[order])
+            return self._arrays
+
+    def sync(self, donor_ids, versions, get_vectors, prune=True):
+        """
+        Index ko current available donors ke saath milayega.
+        Naye/badle donors insert, gayab donors delete - sirf diff par kaam hota hai.
+        get_vectors(positions) un positions ke vectors return karta hai.
+        prune=False par donor_ids poora pool nahi (jaise organ-filtered subset), isliye
+        gayab donors delete nahi hote - unhe signals hatate hain.
+        """
+        with self._lock:
+            # Pool bahut bada ho gaya ya deleted rows zyada ho gayin to rebuild
+            needs_build = (
+                self.centroids is None
+                or len(donor_ids) > 2 * max(self.built_size, 1)
+                or self.matrix.shape[0] + len(self.pending) > 2 * max(len(donor_ids), len(self.assignment), self.built_size)
+            )
+            if needs_build:
+                self.build(donor_ids, versions, get_vectors(list(range(len(donor_ids)))))
+                return
+
+            ids = np.asarray(donor_ids, dtype=np.int64)
+            versions = np.asarray(versions, dtype=np.float64)
+            indexed_ids, indexed_versions = self.version_arrays()
+
+            if prune:
+                for donor_id in indexed_ids[~np.isin(indexed_ids, ids)].tolist():
+                    self.remove(donor_id)
+
+            # Naye / badle donors - sorted arrays par searchsorted, Python loop sirf diff par
+            changed = np.arange(len(ids))
+            if len(indexed_ids):
+                slots = np.minimum(np.searchsorted(indexed_ids, ids), len(indexed_ids) - 1)
+                changed = np.flatnonzero((indexed_ids[slots] != ids) | (indexed_versions[slots] != versions))
+            if len(changed):
+                vectors = sparse.csr_matrix(get_vectors(changed.tolist()))
+                for row, position in enumerate(changed.tolist()):
+                    self.add(int(ids[position]), float(versions[position]), vectors[row])
+
+    def search(self, query_vector, k, allowed=None):
+        """
+        Query ke top-k most similar donors (ids, scores) return karega.
+        allowed(ids) diya ho (ids array -> bool mask) to sirf unhi donors mein se - filter sirf
+        probe hue clusters ke donors par lagta hai, poore pool par nahi.
+        """
+        query_vector = sparse.csr_matrix(query_vector)
+
+        with self._lock:
+            if self.centroids is None or not self.assignment:
+                return [], np.empty(0)
+
+            if len(self.assignment) <= self.exhaustive_threshold:
+                probe_order = np.arange(len(self.members))
+                n_probe = len(self.members)
+            else:
+                centroid_scores = np.asarray(query_vector @ self.centroids.T).ravel()
+                probe_order = np.argsort(-centroid_scores)
+                n_probe = self.n_probe
+
+            if self.pending:
+                # Insert hue rows ko main matrix mein mila do
+                self.matrix = sparse.vstack([self.matrix] + self.pending, format='csr')
+                self.pending = []
+
+            # Clusters batches mein probe hote hain (pehle n_probe, phir har baar dugne) - kam se kam
+            # n_probe clusters, aur tab tak jab tak k allowed candidates na mil jayein
+            ids, rows, found = [], [], 0
+            start, batch = 0, n_probe
+            while start < len(probe_order) and (start < n_probe or found < k):
+                labels = probe_order[start:start + batch]
+                start += batch
+                batch *= 2
+                arrays = [self.cluster_arrays(label) for label in labels]
+                batch_ids = np.concatenate([cluster_ids for cluster_ids, _ in arrays])
+                batch_rows = np.concatenate([cluster_rows for _, cluster_rows in arrays])
+                if allowed is not None and len(batch_ids):
+                    mask = allowed(batch_ids)
+                    batch_ids, batch_rows = batch_ids[mask], batch_rows[mask]
+                ids.append(batch_ids)
+                rows.append(batch_rows)
+                found += len(batch_ids)
+
+            if not found:
+                return [], np.empty(0)
+
+            ids = np.concatenate(ids)
+            scores = np.asarray((self.matrix[np.concatenate(rows)] @ query_vector.T).todense()).ravel()
+
+        k = min(k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return ids[top].tolist(), scores[top]
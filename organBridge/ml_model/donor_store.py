@@ -0,0 +1,291 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from scipy import sparse
+
+from .artifacts import load_csr, save_csr, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+STORE_NAME = 'donor_vectors'
+# <name>.json pointer (vocabulary hash + current base directory) -> <name>.base-<stamp>/ mein
+# save_csr ki raw .npy arrays (mmap) - workers ek hi base ke pages share karte hain
+POINTER_SUFFIX = '.json'
+BASE_SUFFIX = '.base-'
+# Incremental upserts base ke saath chhoti delta segment files (.npz) mein jaate hain
+DELTA_SUFFIX = '.delta-'
+
+
+def vocabulary_hash(tf_model):
+    """TF-IDF vocabulary (aur IDF weights) ka stable hash - vocab badla to store invalid"""
+    digest = hashlib.sha256()
+    if hasattr(tf_model, 'signature'):
+        # Hashing encoder ki vocabulary nahi hoti - n_features + IDF hi uski identity hai
+        digest.update(json.dumps(tf_model.signature(), sort_keys=True).encode())
+    else:
+        digest.update(json.dumps(sorted((term, int(col)) for term, col in tf_model.vocabulary_.items())).encode())
+    digest.update(np.asarray(tf_model.idf_, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def donor_version(donor):
+    """Donor row ka version - DonorProfile / CustomUser ka latest update ya uske baad aaya birthday (DonorSnapshot jaisa)"""
+    from .candidates import DonorSnapshot
+
+    return float(DonorSnapshot.from_donors([donor]).versions[0])
+
+
+class DonorVectorStore:
+    """
+    Precomputed donor TF-IDF vectors ka persistent store
+
+    WHY: Har request par donors ko dobara vectorize karna mehenga hai, jabki
+         DonorProfile rows kabhi kabhi hi badalti hain
+    WHERE: OrganMatchingEngine isse donor vectors padhta hai
+    HOW: Base = sparse CSR matrix + donor ids + har row ka version (updated_at ya birthday timestamp), save_csr ki
+         uncompressed .npy files mein - load par mmap hoti hain, isliye saare worker processes OS page
+         cache ke same pages padhte hain (har process mein decompress / copy nahi). Version mismatch par
+         sirf wahi rows re-encode hokar process ke chhote in-memory delta mein jaati hain, aur ek delta
+         segment file mein append hoti hain (I/O sirf batch jitna); load par segments order mein apply.
+         Delta rows base ke compact_ratio se zyada (ya max_segments files) ho jayein to compaction ek
+         naya base directory likhkar pointer swap karta hai aur segments hata deta hai.
+    """
+
+    def __init__(self, vocab_hash, path=None, compact_ratio=0.25, max_segments=64):
+        self.path = path or os.path.join(settings.BASE_DIR, 'ml_model/trained_models', STORE_NAME)
+        self.vocab_hash = vocab_hash
+        self.compact_ratio = compact_ratio
+        self.max_segments = max_segments
+        # Base (read-only mmap) aur uske upar is process ke re-encoded rows
+        self.base = None
+        self.base_ids = np.empty(0, dtype=np.int64)
+        self.base_versions = np.empty(0, dtype=np.float64)
+        self.delta = None
+        self.delta_ids = np.empty(0, dtype=np.int64)
+        self.delta_versions = np.empty(0, dtype=np.float64)
+        # donor_id -> row (base_rows se chhota = base row, warna delta row)
+        self.index = {}
+        self.segments = []
+        self._lock = threading.Lock()
+
+    @property
+    def base_rows(self):
+        return len(self.base_ids)
+
+    @property
+    def delta_rows(self):
+        return len(self.delta_ids)
+
+    @classmethod
+    def load(cls, vocab_hash, path=None):
+        """Disk se store load karega (base mmap); vocabulary hash match na ho to khali store"""
+        store = cls(vocab_hash, path)
+        try:
+            with open(store.path + POINTER_SUFFIX) as f:
+                pointer = json.load(f)
+        except OSError:
+            return store
+
+        try:
+            if pointer.get('vocab_hash') != vocab_hash:
+                logger.info("Donor vector store vocabulary changed, rebuilding lazily")
+                return store
+            store._load_base(os.path.join(os.path.dirname(store.path), pointer['base']))
+
+            # Base ke baad ke upserts (segment names time order mein sort hote hain) - baad wali row jeetegi
+            for segment in store._segment_paths():
+                saved = store._read(segment)
+                if saved is not None:
+                    store._upsert(saved[1], saved[2], saved[0])
+                store.segments.append(segment)
+        except Exception as e:
+            logger.error(f"Error loading donor vector store: {str(e)}")
+            store = cls(vocab_hash, path)
+
+        return store
+
+    def _load_base(self, directory):
+        self.base = load_csr(directory, 'vectors')
+        self.base_ids = np.load(os.path.join(directory, 'donor_ids.npy'), mmap_mode='r')
+        self.base_versions = np.load(os.path.join(directory, 'versions.npy'), mmap_mode='r')
+        self.delta = None
+        self.delta_ids = np.empty(0, dtype=np.int64)
+        self.delta_versions = np.empty(0, dtype=np.float64)
+        self.index = {donor_id: row for row, donor_id in enumerate(self.base_ids.tolist())}
+
+    def _read(self, path):
+        """Delta segment ke (matrix, donor_ids, versions); vocabulary hash alag ho to None"""
+        with np.load(path, allow_pickle=False) as saved:
+            if str(saved['vocab_hash']) != self.vocab_hash:
+                return None
+            matrix = sparse.csr_matrix(
+                (saved['data'], saved['indices'], saved['indptr']),
+                shape=tuple(saved['shape'])
+            )
+            return matrix, saved['donor_ids'], saved['versions']
+
+    def _write(self, path, matrix, ids, versions):
+        """Ek delta segment .npz atomically likhega (temp file + rename)"""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(
+                    f,
+                    data=matrix.data,
+                    indices=matrix.indices,
+                    indptr=matrix.indptr,
+                    shape=np.array(matrix.shape),
+                    donor_ids=ids,
+                    versions=versions,
+                    vocab_hash=np.array(self.vocab_hash),
+                )
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _segment_paths(self):
+        return sorted(glob.glob(glob.escape(self.path) + DELTA_SUFFIX + '*.npz'))
+
+    def save(self):
+        """
+        Poora store naye base directory mein likhega (compaction), pointer swap karega, phir purane
+        base directories aur delta segments hatayega. Jo workers purana base mmap kiye hain unke
+        pages unlink ke baad bhi valid rehte hain; beech mein crash ho to segments dobara apply karna safe hai
+        """
+        if not self.index:
+            return
+
+        rows = np.fromiter(self.index.values(), dtype=np.int64, count=len(self.index))
+        ids = np.fromiter(self.index.keys(), dtype=np.int64, count=len(self.index))
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        base_dir = tempfile.mkdtemp(dir=directory, prefix=os.path.basename(self.path) + BASE_SUFFIX)
+        try:
+            save_csr(base_dir, 'vectors', self._take(rows))
+            np.save(os.path.join(base_dir, 'donor_ids.npy'), ids)
+            np.save(os.path.join(base_dir, 'versions.npy'), self._versions_at(rows))
+            write_json_atomic(self.path + POINTER_SUFFIX, {
+                'vocab_hash': self.vocab_hash,
+                'base': os.path.basename(base_dir),
+                'rows': len(ids),
+            })
+        except Exception:
+            shutil.rmtree(base_dir, ignore_errors=True)
+            raise
+
+        for old in glob.glob(glob.escape(self.path) + BASE_SUFFIX + '*'):
+            if old != base_dir:
+                shutil.rmtree(old, ignore_errors=True)
+        for segment in set(self.segments + self._segment_paths()):
+            try:
+                os.remove(segment)
+            except OSError:
+                pass
+        self.segments = []
+        self._load_base(base_dir)
+
+    def append(self, ids, versions, vectors):
+        """Sirf re-encoded rows ek nayi delta segment mein (poora base nahi); zarurat ho to compaction"""
+        if self.compact_ratio is None or not self.base_rows:
+            self.save()
+            return
+
+        # time_ns + pid: processes ke segments bhi likhne ke order mein sort honge
+        segment = f'{self.path}{DELTA_SUFFIX}{time.time_ns():020d}-{os.getpid()}.npz'
+        self._write(segment, sparse.csr_matrix(vectors), ids, versions)
+        self.segments.append(segment)
+
+        if self.delta_rows > self.compact_ratio * self.base_rows or len(self.segments) > self.max_segments:
+            self.save()
+
+    def get_vectors(self, ids, versions, encode):
+        """
+        Donor ids ke vectors (CSR, ids ke order mein) return karega.
+        versions har donor ka current version hai (donor_version / DonorSnapshot.versions).
+        Missing ya stale rows encode(positions) se refresh hokar save ho jati hain.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        versions = np.asarray(versions, dtype=np.float64)
+
+        with self._lock:
+            rows = self._rows_for(ids)
+            stale = rows < 0
+            stale[~stale] = self._versions_at(rows[~stale]) != versions[~stale]
+
+            if stale.any():
+                # Duplicate donors ek hi baar encode honge
+                _, first = np.unique(ids[stale], return_index=True)
+                positions = np.flatnonzero(stale)[first]
+                vectors = sparse.csr_matrix(encode(positions.tolist()))
+                self._upsert(ids[positions], versions[positions], vectors)
+                try:
+                    self.append(ids[positions], versions[positions], vectors)
+                except Exception as e:
+                    logger.error(f"Error saving donor vector store: {str(e)}")
+                rows = self._rows_for(ids)
+
+            return self._take(rows)
+
+    def rebuild(self, ids, versions, encode):
+        """Poora store naye sire se banayega (training ke baad). encode(positions) vectors deta hai"""
+        ids = np.asarray(ids, dtype=np.int64)
+        versions = np.asarray(versions, dtype=np.float64)
+        with self._lock:
+            self.base = None
+            self.base_ids = np.empty(0, dtype=np.int64)
+            self.base_versions = np.empty(0, dtype=np.float64)
+            self.delta = None
+            self.delta_ids = np.empty(0, dtype=np.int64)
+            self.delta_versions = np.empty(0, dtype=np.float64)
+            self.index = {}
+            if len(ids):
+                self._upsert(ids, versions, encode(list(range(len(ids)))))
+            self.save()
+
+    def _rows_for(self, ids):
+        return np.fromiter((self.index.get(donor_id, -1) for donor_id in ids.tolist()), dtype=np.int64, count=len(ids))
+
+    def _versions_at(self, rows):
+        in_base = rows < self.base_rows
+        versions = np.empty(len(rows), dtype=np.float64)
+        versions[in_base] = self.base_versions[rows[in_base]]
+        versions[~in_base] = self.delta_versions[rows[~in_base] - self.base_rows]
+        return versions
+
+    def _take(self, rows):
+        """Rows (base / delta mix) ki CSR, rows ke order mein - base mmap se sirf yahi rows copy hoti hain"""
+        if self.base is None:
+            return self.delta[rows] if self.delta is not None else sparse.csr_matrix((len(rows), 0))
+        in_base = rows < self.base_rows
+        if in_base.all():
+            return self.base[rows]
+        if not in_base.any():
+            return self.delta[rows - self.base_rows]
+        parts = sparse.vstack(
+            [self.base[rows[in_base]], self.delta[rows[~in_base] - self.base_rows]], format='csr'
+        )
+        order = np.concatenate([np.flatnonzero(in_base), np.flatnonzero(~in_base)])
+        return parts[np.argsort(order, kind='stable')]
+
+    def _upsert(self, ids, versions, vectors):
+        """Rows delta mein append; index naye rows par point karega (purani rows compaction par hatengi)"""
+        vectors = sparse.csr_matrix(vectors)
+        start = self.base_rows + self.delta_rows
+        self.delta = vectors if self.delta is None else sparse.vstack([self.delta, vectors], format='csr')
+        self.delta_ids = np.concatenate([self.delta_ids, np.asarray(ids, dtype=np.int64)])
+        self.delta_versions = np.concatenate([self.delta_versions, np.asarray(versions, dtype=np.float64)])
+        for offset, donor_id in enumerate(np.asarray(ids).tolist()):
+            self.index[donor_id] = start + offset
@@ -0,0 +1,241 @@
+"""
+Matcher evaluation harness (`manage.py evaluate_matcher`)
+
+WHY: model_stats_view '95%' accuracy aur '0.2s' prediction time hard-coded dikhata tha -
+     kisi TF-IDF setting ya scoring weight ka asli asar kabhi measure nahi hua
+WHERE: evaluate_matcher command grid chalata hai; model_stats_view results file padhta hai
+HOW: KidneyData.csv ka stratified held-out split (Delta = alive / dead outcome). Har config
+     (TfidfVectorizer params + blood / city weights) train rows par fit hoti hai, phir har held-out
+     row serving path jaisa score hoti hai (transform + sparse mat-vec + weights + top-k).
+     Ranking quality: top-k neighbours ka outcome held-out row se kitna milta hai (NDCG@k,
+     agreement@k) aur unke majority vote ki accuracy / AUC. Configs process pool par parallel.
+     Accuracy ko majority-class baseline ke saath hi padhna chahiye - held-out rows ka ~84% ek hi
+     outcome hai, isliye usse kam / barabar accuracy ka matlab koi signal nahi.
+"""
+import json
+import math
+import os
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.utils import timezone
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import ParameterGrid, train_test_split
+
+from .artifacts import write_json_atomic
+from .blood_compatibility import BLOOD_TYPE_INDEX, BLOOD_TYPES, COMPATIBILITY_TABLE
+from .train_model import FEATURE_COLUMNS, TFIDF_PARAMS
+
+RESULTS_FILENAME = 'evaluation.json'
+
+# Scoring weights - engine ke business rules (blood match +10, alag city -5) default hain
+WEIGHT_PARAMS = ('blood_bonus', 'city_penalty')
+
+DEFAULT_GRID = {
+    'max_features': [100, 200, 500],
+    'min_df': [0.0, 0.01],
+    'max_df': [0.25, 0.5, 1.0],
+    'blood_bonus': [0, 10],
+    'city_penalty': [0, 5],
+}
+
+# Jo config asal mein deploy hai - train_model ke TFIDF_PARAMS + engine ke business rule weights
+# (apply_business_rules_batch). Stats page isi ki row dikhata hai, sweep ki best row nahi
+DEPLOYED_CONFIG = {
+    'max_features': TFIDF_PARAMS['max_features'],
+    'min_df': TFIDF_PARAMS['min_df'],
+    'max_df': TFIDF_PARAMS['max_df'],
+    'blood_bonus': 10,
+    'city_penalty': 5,
+}
+
+
+def results_path():
+    return os.path.join(settings.BASE_DIR, 'ml_model/trained_models', RESULTS_FILENAME)
+
+
+def load_results(path=None):
+    """Pichhle evaluate_matcher run ke results; file na ho ya kharab ho to None"""
+    try:
+        with open(path or results_path()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_split(dataset_path, test_size=0.2, seed=42):
+    """
+    Dataset ka stratified train / held-out split (Delta ke hisaab se).
+    Returns dict - documents, outcomes, blood type codes aur cities, dono hisson ke
+    """
+    data = pd.read_csv(dataset_path)
+    documents = data[FEATURE_COLUMNS[0]].astype(str).str.cat(data[FEATURE_COLUMNS[1:]].astype(str), sep=',')
+    alive = (data['Delta'].astype(str).str.lower() == 'alive').to_numpy()
+
+    # Dataset mein ABO aur Rh alag columns hain ('O' + 'Neg' -> 'O-')
+    blood = data['Blood Type'].astype(str) + np.where(data['PosNeg'].astype(str) == 'Pos', '+', '-')
+    blood_codes = blood.map(BLOOD_TYPE_INDEX).fillna(len(BLOOD_TYPES)).astype(np.intp).to_numpy()
+    cities = data['City'].astype(str).to_numpy(dtype=object)
+
+    train, test = train_test_split(np.arange(len(data)), test_size=test_size, random_state=seed, stratify=alive)
+    split = {}
+    for name, rows in (('train', train), ('test', test)):
+        split[f'{name}_documents'] = documents.iloc[rows].tolist()
+        split[f'{name}_alive'] = alive[rows]
+        split[f'{name}_blood'] = blood_codes[rows]
+        split[f'{name}_cities'] = cities[rows]
+    return split
+
+
+def iter_configs(grid=None):
+    """Grid ke saare configs (sklearn ParameterGrid - deterministic order)"""
+    return list(ParameterGrid(grid or DEFAULT_GRID))
+
+
+def dcg(relevance):
+    return float(np.sum(relevance / np.log2(np.arange(2, len(relevance) + 2))))
+
+
+def evaluate_config(config, split, top_k=10):
+    """
+    Ek config ka fit + held-out scoring. Returns metrics ka dict (config ke keys ke saath)
+    Memory = fit + training matrix ka tracemalloc peak; latency = ek held-out row ka scoring time
+    """
+    vectorizer_params = {key: value for key, value in config.items() if key not in WEIGHT_PARAMS}
+    blood_bonus = config.get('blood_bonus', 10)
+    city_penalty = config.get('city_penalty', 5)
+    result = dict(config)
+
+    tracemalloc.start()
+    try:
+        started = time.perf_counter()
+        vectorizer = TfidfVectorizer(**{**TFIDF_PARAMS, **vectorizer_params})
+        train_matrix = vectorizer.fit_transform(split['train_documents']).astype(np.float32).tocsr()
+        fit_seconds = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    except ValueError as e:
+        # Pruning ke baad vocabulary khali (min_df / max_df combination)
+        tracemalloc.stop()
+        result['error'] = str(e)
+        return result
+    tracemalloc.stop()
+
+    # Unknown blood type ke liye extra False row / column
+    compatibility = np.zeros((len(BLOOD_TYPES) + 1, len(BLOOD_TYPES) + 1), dtype=bool)
+    compatibility[:-1, :-1] = COMPATIBILITY_TABLE
+    train_alive, train_blood, train_cities = split['train_alive'], split['train_blood'], split['train_cities']
+    k = min(top_k, len(train_alive))
+
+    # Lazy import - engine module profiles.models laata hai, jo spawn workers mein django.setup ke baad hi chalega
+    from .matching_algorithm import top_k_positions
+
+    latencies, votes, ndcgs, agreements = [], [], [], []
+    for document, alive, blood, city in zip(
+        split['test_documents'], split['test_alive'], split['test_blood'], split['test_cities']
+    ):
+        # Serving path jaisa: ek row transform, sparse mat-vec, business weights, bounded top-k
+        started = time.perf_counter()
+        vector = vectorizer.transform([document])
+        scores = (train_matrix @ vector.T).toarray().ravel() * 100
+        scores += np.where(compatibility[train_blood, blood], blood_bonus, 0)
+        scores -= np.where(train_cities == city, 0, city_penalty)
+        top = top_k_positions(scores, k)
+        latencies.append(time.perf_counter() - started)
+
+        outcomes = train_alive[top]
+        same = (outcomes == alive).astype(float)
+        ideal = dcg(np.ones(min(k, int(np.sum(train_alive == alive)))))
+        ndcgs.append(dcg(same) / ideal if ideal else 0.0)
+        agreements.append(same.mean() if k else 0.0)
+        votes.append(outcomes.mean() if k else 0.0)
+
+    test_alive = split['test_alive']
+    votes = np.asarray(votes)
+    latencies_ms = np.asarray(latencies) * 1000
+    result.update({
+        'vocabulary_size': len(vectorizer.vocabulary_),
+        'ndcg_at_k': float(np.mean(ndcgs)),
+        'agreement_at_k': float(np.mean(agreements)),
+        'accuracy': float(np.mean((votes >= 0.5) == test_alive)),
+        'auc': float(roc_auc_score(test_alive, votes)) if len(set(test_alive.tolist())) > 1 else None,
+        'latency_p50_ms': float(np.percentile(latencies_ms, 50)),
+        'latency_p99_ms': float(np.percentile(latencies_ms, 99)),
+        'fit_seconds': fit_seconds,
+        'peak_memory_mb': peak / (1024 * 1024),
+        'matrix_mb': (train_matrix.data.nbytes + train_matrix.indices.nbytes + train_matrix.indptr.nbytes) / (1024 * 1024),
+    })
+    return result
+
+
+def rank_results(results):
+    """Best pehle: NDCG@k desc, phir p50 latency asc; fail hue configs aakhir mein"""
+    def key(result):
+        if 'error' in result:
+            return (1, 0.0, math.inf)
+        return (0, -result['ndcg_at_k'], result['latency_p50_ms'])
+    return sorted(results, key=key)
+
+
+def majority_baseline(alive):
+    """Hamesha zyada common outcome bolne wale predictor ki accuracy (held-out outcomes par)"""
+    if not len(alive):
+        return None
+    rate = float(np.mean(alive))
+    return max(rate, 1 - rate)
+
+
+def deployed_result(results, config=None):
+    """Results mein deployed config ki row; sweep mein na ho (ya fail hui ho) to None"""
+    config = config or DEPLOYED_CONFIG
+    return next(
+        (
+            result for result in results
+            if 'error' not in result and all(result.get(key) == value for key, value in config.items())
+        ),
+        None,
+    )
+
+
+def save_results(results, path=None, baseline=None, **meta):
+    """
+    Results table + run metadata JSON mein (atomic write) - stats page isi ko padhta hai
+    baseline: held-out split ka majority-class accuracy (majority_baseline) - accuracy isi se compare hoti hai
+    """
+    ranked = rank_results(results)
+    best = next((result for result in ranked if 'error' not in result), None)
+    payload = {
+        'created_at': timezone.now().isoformat(),
+        **meta,
+        'majority_baseline': baseline,
+        'deployed_config': DEPLOYED_CONFIG,
+        'deployed': deployed_result(ranked),
+        'best': best,
+        'results': ranked,
+    }
+    path = path or results_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_json_atomic(path, payload)
+    return payload
+
+
+# Process-wide split (initializer ek baar set karta hai, har task ke saath pickle nahi hota)
+_split = None
+
+
+def init_worker(split):
+    """ProcessPoolExecutor initializer (spawn start method par Django setup bhi yahin)"""
+    global _split
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+    _split = split
+
+
+def evaluate_task(config, top_k):
+    return evaluate_config(config, _split, top_k)
@@ -0,0 +1,243 @@
+"""
+Structured profile features - integer-coded columns se model vectors
+
+WHY: prepare_donor_data / prepare_recipient_data har profile ka "city,gender,race,age,..."
+     string banate the jise TF-IDF tokenizer dobara todta tha - aur CustomUser par gender / race /
+     age fields hain hi nahi, isliye har call exception ke saath basic scoring par gir jaati thi
+WHERE: OrganMatchingEngine donor vectors (DonorVectorStore) aur recipient vector isi se banata hai
+HOW: Profiles (queryset - ek values_list query - ya instances) ke fields seedhe numpy int codes mein
+     (har column ki value -> code table, age date_of_birth se vectorized). Har (column, code) ki
+     model feature-space counts row sirf pehli baar us value ke dikhne par banti hai; uske baad
+     encoding = lookup rows ka sparse jod + IDF + L2 normalize. Hot path mein string formatting /
+     tokenizing nahi.
+
+     Model KidneyData corpus par train hota hai, isliye site ki values pehle usi corpus ke token
+     format mein badalti hain ('A+' -> 'A Pos', smoking -> 'STrue' / 'SFalse', sleep -> '7') - warna
+     lookup rows khali rehti hain aur har donor ki similarity ~0 aati hai. Jo city model ne kabhi
+     nahi dekhi (jaise saari Indian cities) woh ek alag OOV column par jaati hai.
+"""
+import hashlib
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+from django.db.models import QuerySet
+from django.utils import timezone
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.preprocessing import normalize as normalize_rows
+
+from accounts.geo import normalize
+
+# (column, ORM field path) - donor / recipient ke common columns ki code tables shared hain.
+# Sirf wahi fields jinka KidneyData corpus mein column hai (health_status / urgency_level business rules mein)
+DONOR_FEATURES = (
+    ('city', 'user__city'),
+    ('age', 'user__date_of_birth'),
+    ('blood_type', 'user__blood_type'),
+    ('smoking', 'smoking_status'),
+    ('drug', 'drug_use'),
+    ('alcohol', 'alcohol_use'),
+    ('avg_sleep', 'avg_sleep'),
+)
+# RecipientProfile par bhi same lifestyle fields hain (booleans)
+RECIPIENT_FEATURES = DONOR_FEATURES
+
+# Date columns - value age (saal) ke roop mein code hoti hai
+AGE_COLUMNS = ('age',)
+# In columns ki unknown values (model vocabulary ke bahar) OOV column par jaati hain
+OOV_COLUMNS = ('city',)
+
+MISSING = 0
+
+# Encoding ka format badle to purane stored donor vectors invalid (DonorVectorStore key mein jaata hai)
+ENCODING_VERSION = 2
+
+# Site choices -> corpus ke Smoke / Alcohol flags (RecipientProfile par yeh fields booleans hain)
+SMOKING_FLAGS = {'never': False, 'former': True, 'current': True}
+ALCOHOL_FLAGS = {'never': False, 'occasional': True, 'regular': True}
+
+
+def blood_text(value):
+    """'A+' -> 'A Pos' (corpus mein ABO aur Rh alag columns hain)"""
+    value = str(value).strip().upper()
+    if value[-1:] not in ('+', '-'):
+        return value
+    return f"{value[:-1]} {'Pos' if value[-1] == '+' else 'Neg'}"
+
+
+def flag_text(prefix, choices=None):
+    """Boolean / choice value -> corpus flag token ('STrue', 'DFalse', ...)"""
+    def text(value):
+        flag = value if isinstance(value, bool) else (choices or {}).get(str(value).lower())
+        return '' if flag is None else f'{prefix}{flag}'
+    return text
+
+
+def sleep_text(value):
+    """Sleep hours -> corpus jaisa integer ('7.6' -> '8')"""
+    return str(int(round(float(value))))
+
+
+# Column -> site value ko corpus text mein badalne wala function (baaki columns str() hi rehte hain)
+CORPUS_TEXT = {
+    'blood_type': blood_text,
+    'smoking': flag_text('S', SMOKING_FLAGS),
+    'drug': flag_text('D'),
+    'alcohol': flag_text('A', ALCOHOL_FLAGS),
+    'avg_sleep': sleep_text,
+}
+
+
+def ages_from_dates(dates, today=None):
+    """date_of_birth values se umar (int array, vectorized); missing date par -1"""
+    today = today or timezone.localdate()
+    born = np.array([np.datetime64('NaT') if value is None else value for value in dates], dtype='datetime64[D]')
+    if not len(born):
+        return np.zeros(0, dtype=np.int64)
+
+    missing = np.isnat(born)
+    born = np.where(missing, np.datetime64(today, 'D'), born)
+    years = born.astype('datetime64[Y]').astype(np.int64) + 1970
+    months = born.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    days = (born - born.astype('datetime64[M]')).astype(np.int64) + 1
+
+    # Is saal birthday abhi nahi aaya to ek saal kam
+    before_birthday = (months > today.month) | ((months == today.month) & (days > today.day))
+    ages = today.year - years - before_birthday.astype(np.int64)
+    return np.where(missing, -1, ages)
+
+
+def profile_rows(profiles, features):
+    """Profiles ke feature fields ke tuples - queryset par ek values_list query, instances par attributes"""
+    fields = [field for _, field in features]
+    if isinstance(profiles, QuerySet):
+        return list(profiles.values_list(*fields))
+
+    def resolve(profile, field):
+        value = profile
+        for attribute in field.split('__'):
+            value = getattr(value, attribute, None)
+        return value
+
+    # Beech mein delete hua profile (None) - saare features missing
+    return [
+        tuple(resolve(profile, field) for field in fields) if profile is not None else (None,) * len(fields)
+        for profile in profiles
+    ]
+
+
+class ProfileFeatureEncoder:
+    """
+    Profiles ko trained feature model (TfidfVectorizer ya HashingTfidfEncoder) ke space mein encode karega
+
+    model: jiska idf_ ho - vocabulary_ wala TfidfVectorizer ya hash() wala HashingTfidfEncoder.
+    Code tables aur lookup rows lazily badhte hain (naye city / age values), lock ke saath - engine
+    threads ke beech shared hai.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        idf = np.asarray(model.idf_, dtype=np.float64)
+        if hasattr(model, 'hash'):
+            self.counter = model.hash
+            # Hashed columns jo training mein kabhi nahi aaye - unke tokens "unknown" hain
+            seen = np.asarray(model.doc_counts) > 0
+        else:
+            self.counter = CountVectorizer(
+                vocabulary=model.vocabulary_, analyzer=model.build_analyzer(), dtype=np.float64
+            ).transform
+            seen = np.ones(len(idf), dtype=bool)
+        self.seen = seen
+        # Aakhri column = OOV; weight model ke sabse rare term jitna (unseen term ka smooth IDF bhi max hota)
+        self.oov_column = len(idf)
+        self.idf = sparse.diags(np.append(idf, idf.max() if len(idf) else 1.0))
+        self.n_features = self.idf.shape[0]
+
+        columns = {name for name, _ in DONOR_FEATURES + RECIPIENT_FEATURES}
+        # column -> {corpus text: code}; code 0 = missing
+        self.codes = {name: {'': MISSING} for name in columns}
+        # column -> CSR (codes x n_features) - har code ki raw term counts
+        self.lookup = {name: sparse.csr_matrix((1, self.n_features), dtype=np.float64) for name in columns}
+        self.lock = threading.Lock()
+
+    def signature(self, vocabulary_hash):
+        """Model vocabulary + encoding format ki identity (donor vector store ki key)"""
+        payload = json.dumps({'vocabulary_hash': vocabulary_hash, 'encoding': ENCODING_VERSION})
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def keys(self, name, values):
+        """Distinct values ke code table keys - corpus format mein (normalized, lowercase)"""
+        if name in AGE_COLUMNS:
+            return ['' if value < 0 else str(value) for value in values]
+        text = CORPUS_TEXT.get(name, str)
+        # str() pehle - normalize() False / 0 jaise values ko khali maan leta
+        return [normalize(str(text(value))) for value in values]
+
+    def count_rows(self, name, keys):
+        """Naye keys ki model feature-space counts (n_features width, OOV column ke saath)"""
+        counts = sparse.csr_matrix(self.counter(keys), dtype=np.float64)
+        counts = sparse.csr_matrix(counts @ sparse.diags(self.seen.astype(np.float64)))
+        counts.eliminate_zeros()
+        counts = sparse.hstack([counts, sparse.csr_matrix((len(keys), 1))], format='lil')
+        if name in OOV_COLUMNS:
+            # Value hai par uska koi token model ne nahi dekha -> explicit OOV column
+            for row, key in enumerate(keys):
+                if key and not counts.rows[row]:
+                    counts[row, self.oov_column] = 1.0
+        return sparse.csr_matrix(counts)
+
+    def column_codes(self, name, values):
+        """Ek column ki values ke int codes. Har distinct value ek baar translate / normalize hoti hai"""
+        positions, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+        keys = self.keys(name, uniques.tolist())
+
+        table = self.codes[name]
+        new = [key for key in dict.fromkeys(keys) if key not in table]
+        if new:
+            with self.lock:
+                new = [key for key in new if key not in table]
+                if new:
+                    # Sirf naye values tokenize hote hain - uske baad har baar table lookup
+                    self.lookup[name] = sparse.vstack([self.lookup[name], self.count_rows(name, new)], format='csr')
+                    for key in new:
+                        table[key] = len(table)
+
+        unique_codes = np.fromiter((table[key] for key in keys), dtype=np.int32, count=len(keys))
+        # factorize missing (None / NaN) ko -1 deta hai
+        return np.where(positions < 0, MISSING, unique_codes[positions]).astype(np.int32)
+
+    def feature_codes(self, profiles, features, today=None):
+        """Profiles (queryset / instances) ke (n, len(features)) int codes"""
+        rows = profile_rows(profiles, features)
+        count = len(rows)
+        columns = list(zip(*rows)) if rows else [()] * len(features)
+
+        codes = np.zeros((count, len(features)), dtype=np.int32)
+        for j, ((name, _), values) in enumerate(zip(features, columns)):
+            if name in AGE_COLUMNS:
+                values = ages_from_dates(values, today)
+            codes[:, j] = self.column_codes(name, values)
+        return codes
+
+    def transform_codes(self, codes, features):
+        """Int codes se L2-normalized TF-IDF CSR matrix (model.transform jaisa output)"""
+        counts = sparse.csr_matrix((codes.shape[0], self.n_features), dtype=np.float64)
+        for j, (name, _) in enumerate(features):
+            counts = counts + self.lookup[name][codes[:, j]]
+        return normalize_rows(sparse.csr_matrix(counts @ self.idf), norm='l2', copy=False)
+
+    def donor_codes(self, donors, today=None):
+        return self.feature_codes(donors, DONOR_FEATURES, today)
+
+    def recipient_codes(self, recipients, today=None):
+        return self.feature_codes(recipients, RECIPIENT_FEATURES, today)
+
+    def encode_donors(self, donors):
+        """DonorProfile queryset / instances (None = deleted) ko sparse matrix mein - ek batch call"""
+        return self.transform_codes(self.donor_codes(donors), DONOR_FEATURES)
+
+    def encode_recipients(self, recipients):
+        """RecipientProfile queryset / instances ko sparse matrix mein"""
+        return self.transform_codes(self.recipient_codes(recipients), RECIPIENT_FEATURES)
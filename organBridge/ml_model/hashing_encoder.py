@@ -0,0 +1,99 @@
+import json
+import os
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+ENCODER_FILENAME = 'encoder.json'
+DOC_COUNTS_FILENAME = 'encoder_doc_counts.npy'
+
+
+class HashingTfidfEncoder:
+    """
+    Stateless feature hashing + stored IDF vector - TfidfVectorizer ka alternative backend
+
+    WHY: TF-IDF vocabulary max_features=200 par capped hai, aur scoring se pehle pickled
+         vectorizer unpickle karna padta hai
+    WHERE: MLModelTrainer(feature_backend='hashing') isse train karta hai; engine aur workers
+           encoder.json + doc counts (.npy) se load karte hain, pickle nahi
+    HOW: Har token ka column hash se (fixed n_features width, vocabulary nahi). IDF sirf per-column
+         document counts + total documents hai, isliye partial_fit se chunk-by-chunk badhta hai.
+         transform = hashed counts x IDF, phir L2 normalize - TfidfVectorizer jaisa output
+    """
+
+    DEFAULT_FEATURES = 2 ** 12
+
+    def __init__(self, n_features=DEFAULT_FEATURES, doc_counts=None, n_docs=0):
+        self.n_features = int(n_features)
+        self.hasher = HashingVectorizer(
+            n_features=self.n_features,
+            alternate_sign=False,
+            norm=None,
+            stop_words='english',
+            lowercase=True,
+            analyzer='word',
+        )
+        self.doc_counts = (
+            np.zeros(self.n_features, dtype=np.int64) if doc_counts is None
+            else np.asarray(doc_counts, dtype=np.int64)
+        )
+        self.n_docs = int(n_docs)
+
+    def hash(self, documents):
+        """Documents ke raw hashed term counts (CSR) - ek vectorized call"""
+        return self.hasher.transform(documents)
+
+    def partial_fit(self, documents):
+        """IDF statistics mein documents ka ek batch jodega"""
+        return self.partial_fit_counts(self.hash(documents))
+
+    def partial_fit_counts(self, counts):
+        """Already hashed counts se IDF statistics update (training mein dobara hash na karna pade)"""
+        counts = sparse.csr_matrix(counts)
+        counts.sum_duplicates()
+        self.doc_counts += np.bincount(counts.indices, minlength=self.n_features)
+        self.n_docs += counts.shape[0]
+        return self
+
+    @property
+    def idf_(self):
+        """Smooth IDF (TfidfTransformer jaisa): ln((1 + n) / (1 + df)) + 1"""
+        return np.log((1 + self.n_docs) / (1 + self.doc_counts).astype(np.float64)) + 1
+
+    def apply_idf(self, counts):
+        """Hashed counts ko IDF weighted, L2 normalized CSR matrix mein badlega"""
+        weighted = sparse.csr_matrix(counts, dtype=np.float64) @ sparse.diags(self.idf_)
+        return normalize(sparse.csr_matrix(weighted), norm='l2', copy=False)
+
+    def transform(self, documents):
+        return self.apply_idf(self.hash(documents))
+
+    def fit_transform(self, documents):
+        counts = self.hash(documents)
+        self.partial_fit_counts(counts)
+        return self.apply_idf(counts)
+
+    def signature(self):
+        """Encoder ki identity (vocabulary_hash ke liye) - IDF alag se hash hota hai"""
+        return {'backend': 'hashing', 'n_features': self.n_features, 'n_docs': self.n_docs}
+
+    def save(self, directory):
+        with open(os.path.join(directory, ENCODER_FILENAME), 'w') as f:
+            json.dump(self.signature(), f, indent=2)
+        np.save(os.path.join(directory, DOC_COUNTS_FILENAME), self.doc_counts)
+
+    @classmethod
+    def exists(cls, directory):
+        return os.path.exists(os.path.join(directory, ENCODER_FILENAME))
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, ENCODER_FILENAME)) as f:
+            config = json.load(f)
+        return cls(
+            n_features=config['n_features'],
+            doc_counts=np.load(os.path.join(directory, DOC_COUNTS_FILENAME)),
+            n_docs=config['n_docs'],
+        )
@@ -0,0 +1,105 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ml_model.evaluation import (
+    DEFAULT_GRID, evaluate_config, evaluate_task, init_worker, iter_configs, load_split, majority_baseline,
+    results_path, save_results,
+)
+
+
+class Command(BaseCommand):
+    help = 'Held-out KidneyData split par TF-IDF settings aur scoring weights ka grid evaluate karega (parallel)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes (1 = same process mein, bina pool ke)')
+        parser.add_argument('--test-size', type=float, default=0.2, help='Held-out rows ka hissa')
+        parser.add_argument('--seed', type=int, default=42, help='Split ka random seed')
+        parser.add_argument('--top-k', type=int, default=10, help='Ranking metrics kitne neighbours par')
+        parser.add_argument('--grid', default=None,
+                            help='JSON object - default grid ke keys override karega, e.g. \'{"max_features": [200]}\'')
+        parser.add_argument('--dataset', default=None, help='CSV path (default ml_model/data/KidneyData.csv)')
+        parser.add_argument('--output', default=None, help='Results JSON path (default trained_models/evaluation.json)')
+        parser.add_argument('--show', type=int, default=10, help='Kitni best configs print hongi')
+
+    def handle(self, *args, **options):
+        grid = dict(DEFAULT_GRID)
+        if options['grid']:
+            try:
+                grid.update(json.loads(options['grid']))
+            except ValueError as e:
+                raise CommandError(f'--grid must be a JSON object: {e}')
+
+        dataset = options['dataset'] or os.path.join(settings.BASE_DIR, 'ml_model/data/KidneyData.csv')
+        split = load_split(dataset, options['test_size'], options['seed'])
+        configs = iter_configs(grid)
+        workers = max(1, min(options['workers'], len(configs)))
+        top_k = options['top_k']
+        self.stdout.write(
+            f"Evaluating {len(configs)} configs on {len(split['train_alive'])} train / "
+            f"{len(split['test_alive'])} held-out rows with {workers} worker(s)"
+        )
+
+        started = time.monotonic()
+        results = []
+        if workers == 1:
+            for config in configs:
+                results.append(evaluate_config(config, split, top_k))
+                self.report(len(results), len(configs))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(split,)) as executor:
+                futures = [executor.submit(evaluate_task, config, top_k) for config in configs]
+                for future in as_completed(futures):
+                    results.append(future.result())
+                    self.report(len(results), len(configs))
+
+        path = options['output'] or results_path()
+        payload = save_results(
+            results, path,
+            baseline=majority_baseline(split['test_alive']),
+            dataset=os.path.basename(dataset),
+            train_rows=len(split['train_alive']),
+            test_rows=len(split['test_alive']),
+            test_size=options['test_size'],
+            seed=options['seed'],
+            top_k=top_k,
+            grid=grid,
+        )
+
+        self.print_table(payload['results'][:options['show']])
+        deployed = payload['deployed']
+        self.stdout.write(f"Majority-class baseline accuracy: {payload['majority_baseline']:.3f}")
+        if deployed:
+            auc = f"{deployed['auc']:.3f}" if deployed['auc'] is not None else '-'
+            self.stdout.write(f"Deployed config: accuracy {deployed['accuracy']:.3f}, AUC {auc}")
+        else:
+            self.stdout.write(self.style.WARNING('Deployed config grid mein nahi tha - stats page par offline row nahi dikhegi'))
+        self.stdout.write(self.style.SUCCESS(
+            f"Done in {time.monotonic() - started:.1f}s: {len(results)} configs, results written to {path}"
+        ))
+
+    def report(self, done, total):
+        """Har ~10% configs par progress line"""
+        if done == total or done % max(1, total // 10) == 0:
+            self.stdout.write(f'  {done}/{total} configs')
+
+    def print_table(self, results):
+        self.stdout.write(
+            f"{'max_feat':>8} {'min_df':>6} {'max_df':>6} {'blood':>5} {'city':>4} "
+            f"{'ndcg@k':>7} {'agree':>6} {'acc':>6} {'auc':>6} {'p50 ms':>7} {'p99 ms':>7} {'mem MB':>7}"
+        )
+        for result in results:
+            if 'error' in result:
+                continue
+            auc = f"{result['auc']:.3f}" if result['auc'] is not None else '-'
+            self.stdout.write(
+                f"{str(result.get('max_features')):>8} {result.get('min_df', ''):>6} {result.get('max_df', ''):>6} "
+                f"{result.get('blood_bonus', ''):>5} {result.get('city_penalty', ''):>4} "
+                f"{result['ndcg_at_k']:>7.3f} {result['agreement_at_k']:>6.3f} {result['accuracy']:>6.3f} {auc:>6} "
+                f"{result['latency_p50_ms']:>7.3f} {result['latency_p99_ms']:>7.3f} {result['peak_memory_mb']:>7.2f}"
+            )
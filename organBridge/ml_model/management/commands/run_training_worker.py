@@ -0,0 +1,81 @@
+import os
+import socket
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ml_model.models import TrainingJob
+from ml_model.train_model import MLModelTrainer, trained_models_exist
+
+
+class Command(BaseCommand):
+    help = 'Background worker: queued ML training jobs ek-ek karke chalayega'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Queue khali hone par exit karo')
+        parser.add_argument('--interval', type=float, default=5.0, help='Queue poll interval in seconds')
+        parser.add_argument(
+            '--stale-after', type=int, default=3600,
+            help='Itne seconds se update na hua running job failed mark hoga (crashed worker)'
+        )
+
+    def handle(self, *args, **options):
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.stdout.write(f'Training worker {worker} started')
+
+        self.recover_stale_jobs(options['stale_after'])
+
+        # Pehli baar: artifacts nahi hain to training khud queue karo (pehle ready() karta tha)
+        if not trained_models_exist():
+            job, created = TrainingJob.enqueue()
+            if created:
+                self.stdout.write(f'No trained model found, queued initial training job #{job.id}')
+
+        while True:
+            job = TrainingJob.objects.filter(status='queued').order_by('created_at').first()
+
+            if job and job.claim(worker):
+                self.run_job(job)
+                continue
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+    def recover_stale_jobs(self, stale_after):
+        """Crash hue worker ke running jobs ko failed mark karega, taki queue atke nahi"""
+        cutoff = timezone.now() - timedelta(seconds=stale_after)
+        for job in TrainingJob.objects.filter(status='running', updated_at__lt=cutoff):
+            job.finish(False, 'Worker stopped responding')
+            self.stdout.write(self.style.WARNING(f'Marked stale job #{job.id} as failed'))
+
+    def run_job(self, job):
+        self.stdout.write(f'Running training job #{job.id}...')
+        started = time.monotonic()
+
+        # Custom dataset gayab ho to default par chupchaap train karke success report nahi karna
+        if job.dataset_path and not os.path.exists(job.dataset_path):
+            error = f'Dataset not found: {job.dataset_path}'
+            job.finish(False, error)
+            self.stdout.write(self.style.ERROR(f'Job #{job.id} failed: {error}'))
+            return
+
+        trainer = MLModelTrainer(progress_callback=job.update_progress)
+        if job.dataset_path:
+            trainer.dataset_path = job.dataset_path
+
+        try:
+            success = trainer.train_complete_pipeline()
+        except Exception as e:
+            success = False
+            trainer.last_error = str(e)
+
+        job.finish(success, trainer.last_error)
+
+        elapsed = time.monotonic() - started
+        if success:
+            self.stdout.write(self.style.SUCCESS(f'Job #{job.id} finished in {elapsed:.1f}s'))
+        else:
+            self.stdout.write(self.style.ERROR(f'Job #{job.id} failed: {trainer.last_error}'))
@@ -1,13 +1,37 @@
 # ml_model/management/commands/train_ml.py banayein
 from django.core.management.base import BaseCommand
-from ml_model.train_model import train_ml_model
+from ml_model.train_model import FEATURE_BACKENDS, SIMILARITY_MODES, train_ml_model
 
 class Command(BaseCommand):
     help = 'Train the ML model for organ matching'
     
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--similarity', choices=SIMILARITY_MODES, default='topk',
+            help='topk: per-row neighbour list (default), none: skip, dense: full n x n matrix'
+        )
+        parser.add_argument('--top-k', type=int, default=20, help='Neighbours kept per row in topk mode')
+        parser.add_argument('--block-size', type=int, default=256, help='Rows per similarity block in topk mode')
+        parser.add_argument(
+            '--chunk-size', type=int, default=None,
+            help='CSV ko itni rows ke chunks mein stream karke train karo (RAM se bade datasets ke liye)'
+        )
+        parser.add_argument(
+            '--features', choices=FEATURE_BACKENDS, default=None,
+            help='Feature encoder: tfidf (vocabulary) ya hashing (stateless, stored IDF). Default settings.ML_FEATURE_BACKEND'
+        )
+        parser.add_argument('--hash-features', type=int, default=2 ** 12, help='Hashing encoder ke feature columns')
+    
     def handle(self, *args, **options):
         self.stdout.write('Training ML model...')
-        if train_ml_model():
+        if train_ml_model(
+            similarity_mode=options['similarity'],
+            top_k=options['top_k'],
+            block_size=options['block_size'],
+            chunk_size=options['chunk_size'],
+            feature_backend=options['features'],
+            hash_features=options['hash_features'],
+        ):
             self.stdout.write(self.style.SUCCESS('ML model trained successfully!'))
         else:
             self.stdout.write(self.style.ERROR('ML model training failed!'))
\ No newline at end of file
@@ -1,207 +1,531 @@
 import pandas as pd
 import numpy as np
+import heapq
 import os
 import pickle
+import threading
 from django.conf import settings
 
+from .artifacts import ArtifactStore
+from .blood_compatibility import compatibility_mask, is_compatible, recipient_compatibility_mask
+from .candidates import DonorSnapshot, organ_bits
+from accounts.geo import haversine_miles, travel_radius
+from profiles.models import DonorProfile, organ_list
+
 try:
     from sklearn.feature_extraction.text import TfidfVectorizer
     from sklearn.metrics.pairwise import cosine_similarity
+    from .donor_index import DonorIndex
+    from .donor_store import DonorVectorStore, vocabulary_hash
+    from .features import ProfileFeatureEncoder
+    from .hashing_encoder import HashingTfidfEncoder
     SKLEARN_AVAILABLE = True
 except ImportError as e:
     print(f"Scikit-learn import error: {e}")
     SKLEARN_AVAILABLE = False
 
+def top_k_positions(scores, k):
+    """
+    Scores ke top-k positions, score desc - barabar score par chhoti position pehle
+    (stable argsort jaisa hi order). Poora sort nahi: argpartition O(n), sirf k sort hote hain.
+    """
+    scores = np.asarray(scores, dtype=float)
+    if k <= 0 or not len(scores):
+        return np.empty(0, dtype=np.intp)
+    if k < len(scores):
+        # k-th score ki boundary par ties: argpartition koi bhi tie utha sakta hai, isliye
+        # threshold se upar wale sab + threshold wale sabse chhoti positions
+        threshold = scores[np.argpartition(-scores, k - 1)[:k]].min()
+        above = np.flatnonzero(scores > threshold)
+        tied = np.flatnonzero(scores == threshold)[:k - len(above)]
+        chosen = np.concatenate([above, tied])
+    else:
+        chosen = np.arange(len(scores))
+    return chosen[np.lexsort((chosen, -scores[chosen]))]
+
+
 class OrganMatchingEngine:
+    # Retrieval index se top_n ke kitne guna candidates laane hain (business rules re-rank ke liye)
+    RETRIEVAL_OVERFETCH = 5
+    
     def __init__(self):
         if not SKLEARN_AVAILABLE:
             raise ImportError("Scikit-learn is not available. Please install it.")
         
         self.tf_model = None
-        self.tf_matrix = None
+        self.features = None
         self.cosine_sim = None
+        self.donor_store = None
+        self.donor_index = DonorIndex()
+        self.manifest = None
+        self.manifest_mtime = None
         self.load_models()
     
     def load_models(self):
-        """Load trained ML models - FIXED VERSION"""
+        """Load trained ML models - current artifact version se"""
         try:
-            model_path = os.path.join(settings.BASE_DIR, 'ml_model/trained_models/')
+            store = ArtifactStore()
+            
+            # Pointer ka mtime load se pehle note karo - beech mein swap hua to agli request reload karegi
+            self.manifest_mtime = store.manifest_mtime()
+            self.manifest = store.current_manifest()
+            
+            if self.manifest:
+                store.verify(self.manifest, checksums=getattr(settings, 'ML_VERIFY_ARTIFACT_CHECKSUMS', False))
+                model_path = store.version_dir(self.manifest)
+            else:
+                # Purana flat layout (versioned store se pehle ke artifacts)
+                model_path = store.root
             
             if not os.path.exists(model_path):
                 raise FileNotFoundError("Model files not found. Please train the model first.")
             
-            # Load TF-IDF model
-            with open(os.path.join(model_path, 'tf_model.pkl'), 'rb') as f:
-                self.tf_model = pickle.load(f)
+            # Load feature encoder - hashing backend JSON + .npy se (unpickle nahi), warna TF-IDF pickle
+            if HashingTfidfEncoder.exists(model_path):
+                self.tf_model = HashingTfidfEncoder.load(model_path)
+            else:
+                with open(os.path.join(model_path, 'tf_model.pkl'), 'rb') as f:
+                    self.tf_model = pickle.load(f)
             
-            # Load TF-IDF matrix as numpy array - FIXED
-            self.tf_matrix = np.load(os.path.join(model_path, 'tf_matrix.npy'))
+            # Profiles ke fields -> int codes -> model feature space (string formatting / tokenizing nahi)
+            self.features = ProfileFeatureEncoder(self.tf_model)
             
-            # Load cosine similarity matrix
-            self.cosine_sim = np.load(os.path.join(model_path, 'cosine_sim.npy'))
+            # Training corpus ka tf_matrix aur dense cosine_sim serving mein use nahi hote, isliye load
+            # nahi karte - scoring sirf donor vectors (store, mmap) aur recipient vector par chalti hai
             
-            print("ML models loaded successfully!")
+            # Precomputed donor vectors (isi vocabulary ke liye)
+            # Key = vocabulary + encoding format - dono mein se kuch bhi badle to stored vectors rebuild
+            self.donor_store = DonorVectorStore.load(self.features.signature(vocabulary_hash(self.tf_model)))
+            
+            version = self.manifest['version'] if self.manifest else 'legacy'
+            print(f"ML models loaded successfully! (version: {version})")
             
         except Exception as e:
             print(f"Error loading models: {e}")
             # Fallback to basic matching without ML
             self.tf_model = None
+            self.features = None
+            self.donor_store = None
     
     def calculate_similarity_score(self, donor, recipient):
         """ML-based similarity score calculate karega - FIXED VERSION"""
+        # Single pair bhi batch path se hi score hota hai
+        return float(self.batch_similarity_scores([donor], recipient)[0])
+    
+    def batch_similarity_scores(self, donors, recipient, recipient_vector=None):
+        """
+        Saare donors ke ML scores ek saath calculate karega (numpy array, 0-100)
+        Ek sparse TF-IDF matrix + ek sparse mat-vec, per-donor transform nahi
+        donors: DonorSnapshot, DonorProfile queryset ya instances ki list
+        recipient_vector: pehle se encoded recipient (find_matches har chunk ke liye dobara encode nahi karta)
+        """
+        donors = DonorSnapshot.build(donors)
         try:
             if self.tf_model is None:
                 # Fallback to basic scoring if ML model not available
-                return self.basic_similarity_score(donor, recipient)
-            
-            # Prepare data strings
-            donor_str = self.prepare_donor_data(donor)
-            recipient_str = self.prepare_recipient_data(recipient)
+                return self.basic_similarity_scores(donors, recipient)
             
-            # Transform to TF-IDF vectors - FIXED
-            donor_vector = self.tf_model.transform([donor_str]).toarray()
-            recipient_vector = self.tf_model.transform([recipient_str]).toarray()
+            # Donor vectors store se (sirf naye/badle donors re-encode honge)
+            donor_matrix = self.donor_vectors(donors)
+            if recipient_vector is None:
+                recipient_vector = self.features.encode_recipients([recipient])
             
-            # Calculate cosine similarity
-            similarity = cosine_similarity(donor_vector, recipient_vector)[0][0]
+            similarity = self.sparse_cosine_similarity(donor_matrix, recipient_vector)
             
             # Convert to percentage (0-100%)
-            match_score = max(0, min(100, round(similarity * 100, 2)))
-            
-            return match_score
+            return np.clip(np.round(similarity * 100, 2), 0, 100)
             
         except Exception as e:
             print(f"ML similarity calculation failed: {e}")
             # Fallback to basic scoring
-            return self.basic_similarity_score(donor, recipient)
+            return self.basic_similarity_scores(donors, recipient)
+    
+    def donor_vectors(self, snapshot, positions=None):
+        """
+        Snapshot ke donors ke TF-IDF vectors store se.
+        Sirf stale/missing donors ke model instances load hokar encode hote hain.
+        """
+        if positions is not None:
+            snapshot = snapshot.take(positions)
+        return self.donor_store.get_vectors(
+            snapshot.ids, snapshot.versions,
+            lambda stale: self.encode_donors(snapshot.load_donors(stale))
+        )
     
-    def prepare_donor_data(self, donor):
-        """Donor data ko ML format mein convert karega"""
-        return f"{donor.user.city},{donor.user.gender},{donor.user.race},{donor.user.age}," \
-               f"{donor.user.blood_type},{donor.health_status},{donor.smoking_status}," \
-               f"{donor.drug_use},{donor.alcohol_use},{donor.avg_sleep}"
+    def encode_recipient(self, recipient):
+        """Recipient ka sparse vector; ML model na ho ya encoding fail ho to None (basic scoring)"""
+        if self.features is None:
+            return None
+        try:
+            return self.features.encode_recipients([recipient])
+        except Exception as e:
+            print(f"Recipient encoding failed: {e}")
+            return None
     
-    def prepare_recipient_data(self, recipient):
-        """Recipient data ko ML format mein convert karega"""
-        return f"{recipient.user.city},{recipient.user.gender},{recipient.user.race},{recipient.user.age}," \
-               f"{recipient.user.blood_type},{recipient.urgency_level}"
+    def encode_donors(self, donors):
+        """Donors (queryset ya instances) ko sparse TF-IDF matrix mein convert karega - ek batch call"""
+        return self.features.encode_donors(donors)
+    
+    def sparse_cosine_similarity(self, matrix, vector):
+        """Har row ka ek vector ke saath cosine similarity (sparse mat-vec)"""
+        dots = np.asarray((matrix @ vector.T).todense()).ravel()
+        row_norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        vector_norm = np.sqrt(vector.multiply(vector).sum())
+        denominator = row_norms * vector_norm
+        similarity = np.zeros_like(dots, dtype=float)
+        np.divide(dots, denominator, out=similarity, where=denominator > 0)
+        return similarity
     
     def basic_similarity_score(self, donor, recipient):
         """Basic similarity scoring (ML model unavailable hone par)"""
-        score = 50  # Base score
+        return float(self.basic_similarity_scores([donor], recipient)[0])
+    
+    def basic_similarity_scores(self, donors, recipient):
+        """Basic scoring ka vectorized version - saare donors ek saath"""
+        donors = DonorSnapshot.build(donors)
+        blood_match, same_city, health = self.donor_feature_arrays(donors, recipient)
+        
+        score = np.full(len(donors), 50.0)  # Base score
         
         # Blood type compatibility
-        if self.check_blood_compatibility(donor.user.blood_type, recipient.user.blood_type):
-            score += 20
+        score += np.where(blood_match, 20, 0)
         
         # Location bonus (same city)
-        if donor.user.city == recipient.user.city:
-            score += 15
+        score += np.where(same_city, 15, 0)
         
         # Health factors
-        if donor.health_status == 'excellent':
-            score += 10
-        elif donor.health_status == 'good':
-            score += 5
+        score += np.select([health == 'excellent', health == 'good'], [10, 5], 0)
         
         # Urgency bonus
         if recipient.urgency_level in ['high', 'critical']:
             score += 5
         
-        return min(100, score)
+        return np.minimum(100, score)
+    
+    def donor_feature_arrays(self, donors, recipient):
+        """Business rules ke liye donor columns (snapshot se) numpy arrays mein"""
+        donors = DonorSnapshot.build(donors)
+        
+        same_city = np.asarray(donors.cities == recipient.user.city, dtype=bool)
+        health = donors.health
+        
+        # Blood compatibility precomputed table se ek vectorized lookup
+        blood_match = compatibility_mask(donors.blood_types, recipient.user.blood_type)
+        
+        return blood_match, same_city, health
+    
+    def reachable_mask(self, donors, recipient, max_distance=None, positions=None):
+        """
+        Haversine refinement: donor tabhi candidate hai jab distance donor aur recipient
+        dono ke max_travel_distance ke andar ho (aur recipient ki preference max_distance ke bhi).
+        Kisi ki location unknown ho to filter nahi lagta.
+        positions diye hon to sirf unhi donors ka mask (retrieved candidates)
+        """
+        donors = DonorSnapshot.build(donors)
+        if positions is None:
+            positions = slice(None)
+            count = len(donors)
+        else:
+            count = len(positions)
+        latitude, longitude = recipient.user.latitude, recipient.user.longitude
+        if latitude is None or longitude is None:
+            return np.ones(count, dtype=bool)
+        
+        distances = haversine_miles(latitude, longitude, donors.latitudes[positions], donors.longitudes[positions])
+        recipient_limit = travel_radius(recipient.max_travel_distance, max_distance)
+        limits = np.minimum(donors.travel_limits[positions], recipient_limit)
+        return np.isnan(distances) | (distances <= limits)
     
     def check_blood_compatibility(self, donor_blood, recipient_blood):
-        """Blood type compatibility check"""
-        compatibility_map = {
-            'O-': ['O-', 'O+', 'A-', 'A+', 'B-', 'B+', 'AB-', 'AB+'],
-            'O+': ['O+', 'A+', 'B+', 'AB+'],
-            'A-': ['A-', 'A+', 'AB-', 'AB+'],
-            'A+': ['A+', 'AB+'],
-            'B-': ['B-', 'B+', 'AB-', 'AB+'],
-            'B+': ['B+', 'AB+'],
-            'AB-': ['AB-', 'AB+'],
-            'AB+': ['AB+']
-        }
-        return donor_blood in compatibility_map.get(recipient_blood, [])
+        """Blood type compatibility check (shared ABO/Rh table)"""
+        return is_compatible(donor_blood, recipient_blood)
     
     def get_organ_list(self, organs_field):
         """
         Safely convert organs field to list of strings
         Handles both list and dict types from JSONField
         """
-        if isinstance(organs_field, list):
-            # If it's already a list, ensure all items are strings
-            return [str(organ) for organ in organs_field]
-        elif isinstance(organs_field, dict):
-            # If it's a dict, extract values or keys
-            return list(organs_field.values()) if organs_field.values() else list(organs_field.keys())
-        elif isinstance(organs_field, str):
-            # If it's a string, split by comma
-            return [organ.strip() for organ in organs_field.split(',') if organ.strip()]
-        else:
-            # Default empty list
-            return []
+        return organ_list(organs_field)
     
-    def find_matches(self, recipient, donors, top_n=10):
-        """Find best matches for a recipient - FIXED VERSION"""
-        matches = []
-        
+    def find_matches(self, recipient, donors, top_n=10, load_donors=True, min_score=None, max_distance=None,
+                     chunk_size=None, exhaustive=False):
+        """
+        Find best matches for a recipient - batch (vectorized) scoring
+        donors queryset ho to ek values_list query se columnar snapshot banta hai;
+        model instances sirf final top_n donors ke liye load hote hain.
+        load_donors=False par instances load nahi hote (batch matching ko sirf ids chahiye)
+        min_score / max_distance: recipient ki MatchPreference thresholds - max_distance scoring se
+        pehle donors hatata hai, min_score se neeche ke donors top-K selection se pehle
+        chunk_size: donors ko itne-itne ke chunks mein stream karega (QuerySet.iterator / generator) -
+        memory O(chunk_size + top_n), poora pool kabhi ek saath memory mein nahi aata
+        exhaustive: har eligible donor score hoga (approximate donor index retrieval nahi) - batch matching
+        """
         # Get recipient's needed organs as a list
         recipient_organs = self.get_organ_list(recipient.organs_needed)
         
-        for donor in donors:
-            # Get donor's organs as a list
-            donor_organs = self.get_organ_list(donor.organs_donating)
-            
-            # Check organ compatibility first - FIXED
-            organs_matched = [organ for organ in donor_organs if organ in recipient_organs]
-            
-            if not organs_matched:
-                continue
-            
-            # Calculate match score
-            ml_score = self.calculate_similarity_score(donor, recipient)
-            
-            # Apply business rules
-            final_score = self.apply_business_rules(ml_score, donor, recipient)
-            
-            matches.append({
-                'donor': donor,
+        # Bounded min-heap: (final_score, -chunk, -index, entry) - sabse kamzor match top par.
+        # chunk / index barabar score par original order rakhte hain (stable sort jaisa)
+        best = []
+        # Recipient vector ek baar - retrieval aur har chunk ki scoring dono isi ko use karte hain
+        recipient_vector = self.encode_recipient(recipient)
+        for chunk, snapshot in enumerate(DonorSnapshot.stream(donors, chunk_size)):
+            for index, final_score, entry in self.rank_chunk(
+                recipient, recipient_organs, snapshot, top_n, min_score, max_distance, recipient_vector, exhaustive
+            ):
+                item = (final_score, -chunk, -index, entry)
+                if len(best) < top_n:
+                    heapq.heappush(best, item)
+                elif item[:3] > best[0][:3]:
+                    heapq.heapreplace(best, item)
+        
+        ranked = [item[3] for item in sorted(best, key=lambda item: item[:3], reverse=True)]
+        
+        # Model instances sirf final top_n ke liye (ek in_bulk query)
+        donors_by_id = {}
+        if load_donors:
+            missing = [entry[0] for entry in ranked if entry[2] is None]
+            if missing:
+                donors_by_id = DonorProfile.objects.select_related('user').in_bulk(missing)
+        
+        results = []
+        for donor_id, donor_user_id, instance, ml_score, final_score, blood_match, organs_matched, same_city in ranked:
+            donor = instance if instance is not None else donors_by_id.get(donor_id)
+            if load_donors and donor is None:
+                continue  # scoring ke beech delete hua donor
+            results.append({
+                'donor': donor if load_donors else None,
+                'donor_id': donor_id,
+                'donor_user_id': donor_user_id,
                 'ml_score': ml_score,
                 'final_score': final_score,
                 'compatibility_details': {
-                    'blood_match': self.check_blood_compatibility(donor.user.blood_type, recipient.user.blood_type),
+                    'blood_match': blood_match,
                     'organs_matched': organs_matched,
-                    'location_same': donor.user.city == recipient.user.city
+                    'location_same': same_city
                 }
             })
+        return results
+    
+    def rank_chunk(self, recipient, recipient_organs, snapshot, top_n, min_score=None, max_distance=None,
+                   recipient_vector=None, exhaustive=False):
+        """
+        Donors ke ek snapshot (chunk) ke top_n eligible matches.
+        Returns [(index, final_score, entry)] - entry plain tuple, details dicts sirf final K ke liye bante hain
+        """
+        if recipient_vector is None:
+            recipient_vector = self.encode_recipient(recipient)
+        
+        # Organ overlap (bitmask AND) + travel limits - poore chunk par ek numpy pass;
+        # incompatible / door ke donors score hi nahi honge
+        eligible = snapshot.organ_mask(recipient_organs) & self.reachable_mask(snapshot, recipient, max_distance)
+        positions = np.flatnonzero(eligible)
+        
+        # Bade eligible pools mein index se sirf top candidates score honge (exhaustive par sab)
+        if (not exhaustive and self.donor_store is not None and recipient_vector is not None
+                and len(positions) > self.donor_index.exhaustive_threshold):
+            try:
+                positions = self.retrieve_candidates(recipient_vector, snapshot, eligible, top_n * self.RETRIEVAL_OVERFETCH)
+            except Exception as e:
+                print(f"Donor index retrieval failed, using exhaustive search: {e}")
+        
+        if not len(positions):
+            return []
+        
+        candidates = snapshot.take(positions)
+        
+        # Calculate match scores for all candidates in one pass
+        ml_scores = self.batch_similarity_scores(candidates, recipient, recipient_vector)
+        blood_match, same_city, health = self.donor_feature_arrays(candidates, recipient)
+        
+        # Apply business rules
+        final_scores = self.apply_business_rules_batch(ml_scores, blood_match, same_city, health, recipient)
+        
+        # Threshold se neeche wale donors sort / select hi nahi honge
+        eligible = np.arange(len(final_scores))
+        if min_score is not None:
+            eligible = np.flatnonzero(final_scores >= min_score)
+        
+        # Bounded top-K (argpartition) - barabar score par original order rahe
+        order = eligible[top_k_positions(final_scores[eligible], top_n)].tolist()
+        return [
+            (i, float(final_scores[i]), (
+                int(candidates.ids[i]),
+                int(candidates.user_ids[i]),
+                candidates.instances[i] if candidates.instances is not None else None,
+                float(ml_scores[i]),
+                float(final_scores[i]),
+                bool(blood_match[i]),
+                [organ for organ in candidates.organs[i] if organ in recipient_organs],
+                bool(same_city[i]),
+            ))
+            for i in order
+        ]
+    
+    def warm(self, snapshot, index=True):
+        """
+        Donor vectors aur retrieval index pehle se tayyar karega (batch matching workers fork hone se pehle),
+        taki har worker process store / index dobara na banaye. index=False: sirf vectors (exhaustive scoring)
+        """
+        if self.donor_store is None or not len(snapshot):
+            return
+        try:
+            self.donor_vectors(snapshot)
+            if index and len(snapshot) > self.donor_index.exhaustive_threshold:
+                self.sync_index(snapshot)
+        except Exception as e:
+            print(f"Engine warm-up failed, workers will encode lazily: {e}")
+    
+    def sync_index(self, snapshot):
+        """
+        Index ko snapshot ke donors ke saath milayega - ek snapshot par sirf ek baar (numpy version diff,
+        sirf naye / badle donors encode hote hain). Snapshot organ-filtered subset ho sakta hai, isliye
+        yahan delete nahi hota - unavailable / deleted donors signals se hatte hain.
+        """
+        if snapshot.index_synced:
+            return
+        self.donor_index.sync(
+            snapshot.ids, snapshot.versions,
+            lambda positions: self.donor_vectors(snapshot, positions),
+            prune=False
+        )
+        snapshot.index_synced = True
+    
+    def score_donor_for_recipients(self, donor, recipients, thresholds=None):
+        """
+        Ek donor ko kai recipients ke against score karega (incremental re-matching ke liye).
+        find_matches wale hi scoring rules, taki patched rankings consistent rahein - par ulti disha mein
+        vectorized: saare recipients ek batch encode, donor ke stored vector ke saath ek sparse mat-vec,
+        travel limits / thresholds arrays par.
+        thresholds: recipients ke order mein (min_score, max_distance) - find_matches jaise cut-offs
+        Returns [(ml_score, final_score, blood_match, location_same)] recipients ke order mein -
+        travel limits / thresholds se bahar wale recipient ke liye None
+        """
+        if not recipients:
+            return []
+        snapshot = DonorSnapshot.build([donor])
+        thresholds = thresholds or [(None, None)] * len(recipients)
+        min_scores = np.array([-np.inf if min_score is None else min_score for min_score, _ in thresholds], dtype=float)
+        
+        # Recipient columns
+        cities = np.array([recipient.user.city for recipient in recipients], dtype=object)
+        urgency = np.array([recipient.urgency_level for recipient in recipients], dtype=object)
+        latitudes = np.array([np.nan if recipient.user.latitude is None else recipient.user.latitude for recipient in recipients])
+        longitudes = np.array([np.nan if recipient.user.longitude is None else recipient.user.longitude for recipient in recipients])
+        limits = np.array([
+            travel_radius(recipient.max_travel_distance, max_distance)
+            for recipient, (_, max_distance) in zip(recipients, thresholds)
+        ])
+        
+        # reachable_mask jaisa: dono ke travel limits ke andar; kisi ki location unknown ho to filter nahi
+        distances = haversine_miles(snapshot.latitudes[0], snapshot.longitudes[0], latitudes, longitudes)
+        reachable = np.isnan(distances) | (distances <= np.minimum(limits, snapshot.travel_limits[0]))
+        
+        blood_match = recipient_compatibility_mask(snapshot.blood_types[0], [recipient.user.blood_type for recipient in recipients])
+        same_city = cities == snapshot.cities[0]
+        health = np.full(len(recipients), snapshot.health[0], dtype=object)
+        
+        ml_scores = None
+        if self.tf_model is not None:
+            try:
+                similarity = self.sparse_cosine_similarity(
+                    self.features.encode_recipients(recipients), self.donor_vectors(snapshot)
+                )
+                ml_scores = np.clip(np.round(similarity * 100, 2), 0, 100)
+            except Exception as e:
+                print(f"ML similarity calculation failed: {e}")
+        if ml_scores is None:
+            # basic_similarity_scores jaisa, recipients ke across
+            ml_scores = 50.0 + np.where(blood_match, 20, 0) + np.where(same_city, 15, 0)
+            ml_scores = ml_scores + np.select([health == 'excellent', health == 'good'], [10, 5], 0)
+            ml_scores = np.minimum(100, ml_scores + np.where(np.isin(urgency, ['high', 'critical']), 5, 0))
+        
+        final_scores = self.business_rule_scores(ml_scores, blood_match, same_city, health, urgency)
+        keep = reachable & (final_scores >= min_scores)
+        return [
+            (float(ml_scores[i]), float(final_scores[i]), bool(blood_match[i]), bool(same_city[i])) if keep[i] else None
+            for i in range(len(recipients))
+        ]
+    
+    def retrieve_candidates(self, recipient_vector, snapshot, eligible, k):
+        """
+        Donor index se recipient ke top-k most similar eligible donors ki snapshot positions (snapshot order mein).
+        eligible: snapshot ka bool mask - index sirf probe hue clusters ke donors par ise dekhta hai.
+        """
+        self.sync_index(snapshot)
+        
+        def allowed(donor_ids):
+            positions, found = snapshot.positions_of(donor_ids)
+            return found & eligible[positions]
+        
+        top_ids, _ = self.donor_index.search(recipient_vector, k, allowed=allowed)
         
-        # Sort by final score
-        matches.sort(key=lambda x: x['final_score'], reverse=True)
-        return matches[:top_n]
+        # Snapshot order - barabar score par exhaustive search jaisa tie order
+        positions, _ = snapshot.positions_of(top_ids)
+        return np.sort(positions)
     
     def apply_business_rules(self, ml_score, donor, recipient):
         """Apply additional business rules to ML score"""
-        final_score = ml_score
+        blood_match, same_city, health = self.donor_feature_arrays([donor], recipient)
+        return float(self.apply_business_rules_batch(np.array([ml_score], dtype=float), blood_match, same_city, health, recipient)[0])
+    
+    def apply_business_rules_batch(self, ml_scores, blood_match, same_city, health, recipient):
+        """Business rules ka vectorized version (numpy array operations)"""
+        return self.business_rule_scores(ml_scores, blood_match, same_city, health, recipient.urgency_level)
+    
+    def business_rule_scores(self, ml_scores, blood_match, same_city, health, urgency):
+        """
+        Business rules arrays par. urgency ek level (ek recipient, kai donors) ya
+        har row ka level (ek donor, kai recipients)
+        """
+        final_scores = np.asarray(ml_scores, dtype=float).copy()
         
         # Blood type compatibility bonus
-        if self.check_blood_compatibility(donor.user.blood_type, recipient.user.blood_type):
-            final_score += 10
+        final_scores += np.where(blood_match, 10, 0)
         
         # Distance penalty (simplified)
-        if donor.user.city != recipient.user.city:
-            final_score -= 5
+        final_scores -= np.where(same_city, 0, 5)
         
         # Health bonus
-        if donor.health_status == 'excellent':
-            final_score += 8
-        elif donor.health_status == 'good':
-            final_score += 4
+        final_scores += np.select([health == 'excellent', health == 'good'], [8, 4], 0)
         
         # Urgency bonus
-        if recipient.urgency_level == 'critical':
-            final_score += 12
-        elif recipient.urgency_level == 'high':
-            final_score += 8
+        urgency = np.asarray(urgency, dtype=object)
+        final_scores += np.select([urgency == 'critical', urgency == 'high'], [12, 8], 0)
         
-        return max(0, min(100, final_score))
\ No newline at end of file
+        return np.clip(final_scores, 0, 100)
+
+# Process-wide engine registry
+# Har worker process mein artifacts sirf ek baar load honge (pehli request par),
+# uske baad saare views same read-only engine share karenge.
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_matching_engine():
+    """
+    Shared OrganMatchingEngine return karega (lazy, thread-safe load).
+    Naya model version publish hua ho (current.json ka mtime badla) to engine reload hota hai.
+    """
+    global _engine
+    engine = _engine
+    if engine is None or engine.manifest_mtime != ArtifactStore().manifest_mtime():
+        with _engine_lock:
+            # Double-checked: lock ke andar dobara check, taki do threads load na karein
+            if _engine is None or _engine.manifest_mtime != ArtifactStore().manifest_mtime():
+                if _engine is not None:
+                    print("New model version detected, reloading matching engine...")
+                _engine = OrganMatchingEngine()
+            engine = _engine
+    return engine
+
+
+def get_loaded_matching_engine():
+    """Engine sirf tab return karega jab pehle se load ho (load trigger nahi karega)"""
+    return _engine
+
+
+def reset_matching_engine():
+    """Cached engine drop karega - retrain ke baad next request naye artifacts load karegi"""
+    global _engine
+    with _engine_lock:
+        _engine = None
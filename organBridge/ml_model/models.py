@@ -1,3 +1,107 @@
-from django.db import models
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
 
-# Create your models here.
+
+class TrainingJob(models.Model):
+    """
+    Background ML training job
+
+    WHY: Training (pandas + TF-IDF) request thread ya app startup ko block na kare
+    WHERE: Admin views job enqueue karte hain, `run_training_worker` command use chalata hai
+    HOW: Single-flight - ek time par ek hi job queued aur ek hi running ho sakti hai
+         (partial unique constraints), baaki requests usi queued job se jud jati hain
+    """
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    )
+    ACTIVE_STATUSES = ('queued', 'running')
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued', db_index=True)
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Progress percentage (0-100)")
+    message = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    dataset_path = models.CharField(max_length=500, blank=True, help_text="Custom dataset (blank = default KidneyData.csv)")
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    worker = models.CharField(max_length=100, blank=True, help_text="host:pid of the worker running this job")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['status'], condition=models.Q(status='queued'), name='single_queued_training_job'),
+            models.UniqueConstraint(fields=['status'], condition=models.Q(status='running'), name='single_running_training_job'),
+        ]
+
+    def __str__(self):
+        return f"Training job #{self.pk} ({self.status}, {self.progress}%)"
+
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
+
+    @classmethod
+    def enqueue(cls, dataset_path='', requested_by=None):
+        """
+        Naya job queue karega - agar pehle se queued job hai to wahi return hoga.
+        Returns (job, created)
+        """
+        existing = cls.objects.filter(status='queued').first()
+        if existing:
+            return existing, False
+
+        try:
+            with transaction.atomic():
+                return cls.objects.create(dataset_path=dataset_path, requested_by=requested_by), True
+        except IntegrityError:
+            # Kisi doosri request ne isi beech job queue kar di
+            return cls.objects.get(status='queued'), False
+
+    def claim(self, worker):
+        """Queued job ko running mark karega; doosra job chal raha ho to False"""
+        try:
+            with transaction.atomic():
+                claimed = TrainingJob.objects.filter(pk=self.pk, status='queued').update(
+                    status='running', worker=worker, started_at=timezone.now(),
+                    progress=0, message='Starting'
+                )
+        except IntegrityError:
+            return False
+
+        if claimed:
+            self.refresh_from_db()
+        return bool(claimed)
+
+    def update_progress(self, progress, message=''):
+        """Worker se progress update (single UPDATE query)"""
+        self.progress = progress
+        self.message = message[:255]
+        TrainingJob.objects.filter(pk=self.pk).update(
+            progress=self.progress, message=self.message, updated_at=timezone.now()
+        )
+
+    def finish(self, success, error=''):
+        self.status = 'succeeded' if success else 'failed'
+        self.progress = 100 if success else self.progress
+        self.message = 'Training completed' if success else 'Training failed'
+        self.error = error
+        self.finished_at = timezone.now()
+        self.save(update_fields=['status', 'progress', 'message', 'error', 'finished_at', 'updated_at'])
+
+    def as_dict(self):
+        """Status polling (JSON) ke liye"""
+        return {
+            'id': self.pk,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -0,0 +1,45 @@
+import logging
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from profiles.models import DonorProfile
+from .matching_algorithm import get_loaded_matching_engine
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=DonorProfile)
+def update_donor_index(sender, instance, **kwargs):
+    """Donor ka is_available toggle hote hi shared engine ke donor index ko update karega"""
+    engine = get_loaded_matching_engine()
+    if engine is None or engine.donor_store is None or not len(engine.donor_index):
+        return
+
+    if not instance.is_available:
+        engine.donor_index.remove(instance.id)
+        return
+
+    from .candidates import DonorSnapshot
+
+    try:
+        snapshot = DonorSnapshot.from_donors([instance])
+        engine.donor_index.add(instance.id, float(snapshot.versions[0]), engine.donor_vectors(snapshot))
+    except Exception as e:
+        # Next find_matches par sync ise theek kar dega
+        logger.error(f"Error updating donor index: {str(e)}")
+
+
+@receiver(post_delete, sender=DonorProfile)
+def remove_from_donor_index(sender, instance, **kwargs):
+    """Delete hue donor ko index se hatayega"""
+    engine = get_loaded_matching_engine()
+    if engine is not None:
+        engine.donor_index.remove(instance.id)
+
+
+# Bulk maintenance ke liye (matches.signals.receivers_disconnected) - index agli sync par theek hota hai
+INDEX_RECEIVERS = (
+    (post_save, update_donor_index, DonorProfile),
+    (post_delete, remove_from_donor_index, DonorProfile),
+)
@@ -1,3 +1,163 @@
-from django.test import TestCase
+import tempfile
+from datetime import date, timedelta
 
-# Create your tests here.
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from accounts.models import CustomUser
+from profiles.models import DonorProfile, RecipientProfile
+from .candidates import last_birthdays
+from .blood_compatibility import BLOOD_TYPES, compatible_donor_types, is_compatible
+from .evaluation import DEPLOYED_CONFIG, deployed_result, majority_baseline
+from .donor_store import DonorVectorStore
+from .features import ProfileFeatureEncoder, ages_from_dates, blood_text, flag_text, SMOKING_FLAGS
+from .hashing_encoder import HashingTfidfEncoder
+from .train_model import MLModelTrainer, TFIDF_PARAMS
+
+
+def kidney_corpus():
+    """Training jaisa hi KidneyData corpus (default dataset)"""
+    return list(MLModelTrainer(chunk_size=10_000).iter_corpus())
+
+
+def donor(city, date_of_birth, blood_type):
+    user = CustomUser(username='donor', user_type='donor', city=city, date_of_birth=date_of_birth, blood_type=blood_type)
+    return DonorProfile(
+        user=user, health_status='good', smoking_status='never', alcohol_use='occasional',
+        drug_use=False, avg_sleep=7.2, organs_donating=['kidney'],
+    )
+
+
+def recipient(city, date_of_birth, blood_type):
+    user = CustomUser(username='recipient', user_type='recipient', city=city, date_of_birth=date_of_birth, blood_type=blood_type)
+    return RecipientProfile(
+        user=user, urgency_level='high', smoking_status=False, alcohol_use=True,
+        drug_use=False, avg_sleep=6.8, organs_needed=['kidney'],
+    )
+
+
+class CorpusTextTests(SimpleTestCase):
+    def test_site_values_use_corpus_tokens(self):
+        self.assertEqual(blood_text('A+'), 'A Pos')
+        self.assertEqual(blood_text('ab-'), 'AB Neg')
+        smoking = flag_text('S', SMOKING_FLAGS)
+        self.assertEqual(smoking('never'), 'SFalse')
+        self.assertEqual(smoking('current'), 'STrue')
+        self.assertEqual(smoking(True), 'STrue')
+        self.assertEqual(smoking(None), '')
+
+
+class ProfileFeatureEncoderTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        corpus = kidney_corpus()
+        cls.tfidf = TfidfVectorizer(**TFIDF_PARAMS).fit(corpus)
+        cls.hashing = HashingTfidfEncoder()
+        cls.hashing.fit_transform(corpus)
+
+    def similarity(self, model, donor_profile, recipient_profile):
+        encoder = ProfileFeatureEncoder(model)
+        donor_vector = encoder.encode_donors([donor_profile])
+        recipient_vector = encoder.encode_recipients([recipient_profile])
+        return float((donor_vector @ recipient_vector.T).toarray()[0, 0])
+
+    def test_known_pair_has_nonzero_similarity(self):
+        # Dono Indian cities model vocabulary ke bahar (OOV column), umar same
+        pair = (donor('Dehradun', date(1985, 4, 2), 'AB+'), recipient('Roorkee', date(1985, 1, 20), 'AB+'))
+        for model in (self.tfidf, self.hashing):
+            with self.subTest(model=type(model).__name__):
+                self.assertGreater(self.similarity(model, *pair), 0.5)
+
+    def test_corpus_city_uses_vocabulary_column(self):
+        encoder = ProfileFeatureEncoder(self.tfidf)
+        vector = encoder.encode_donors([donor('Seattle', None, '')])
+        self.assertIn(self.tfidf.vocabulary_['seattle'], vector.indices.tolist())
+        self.assertNotIn(encoder.oov_column, vector.indices.tolist())
+
+    def test_unknown_city_uses_oov_column(self):
+        encoder = ProfileFeatureEncoder(self.tfidf)
+        vector = encoder.encode_recipients([recipient('Nainital', None, '')])
+        self.assertEqual(vector.indices.tolist(), [encoder.oov_column])
+
+
+class EvaluationSummaryTests(SimpleTestCase):
+    def test_majority_baseline(self):
+        self.assertAlmostEqual(majority_baseline([True, True, True, False]), 0.75)
+        self.assertAlmostEqual(majority_baseline([False, False, True, False, False]), 0.8)
+
+    def test_deployed_row_is_not_the_best_row(self):
+        best = {**DEPLOYED_CONFIG, 'max_features': 500, 'accuracy': 0.9, 'ndcg_at_k': 0.8}
+        deployed = {**DEPLOYED_CONFIG, 'accuracy': 0.84, 'ndcg_at_k': 0.7}
+        self.assertIs(deployed_result([best, deployed]), deployed)
+        self.assertIsNone(deployed_result([best, {**DEPLOYED_CONFIG, 'error': 'empty vocabulary'}]))
+
+
+# Recipient -> jo donor types use de sakte hain (donor ke saare antigens recipient mein hon)
+EXPECTED_DONORS = {
+    'O-': {'O-'},
+    'A+': {'A+', 'A-', 'O+', 'O-'},
+    'B-': {'B-', 'O-'},
+    'AB+': set(BLOOD_TYPES),
+}
+
+
+class BloodCompatibilityTests(SimpleTestCase):
+    def test_recipient_accepts_expected_donors(self):
+        for recipient, donors in EXPECTED_DONORS.items():
+            with self.subTest(recipient=recipient):
+                self.assertEqual(set(compatible_donor_types(recipient)), donors)
+                self.assertEqual({donor for donor in BLOOD_TYPES if is_compatible(donor, recipient)}, donors)
+
+    def test_o_negative_donor_gives_to_everyone(self):
+        self.assertTrue(all(is_compatible('O-', recipient) for recipient in BLOOD_TYPES))
+        self.assertFalse(is_compatible('A+', 'B+'))
+        self.assertFalse(is_compatible('AB-', 'A-'))
+
+    def test_unknown_type_has_no_donors(self):
+        self.assertEqual(compatible_donor_types(''), ())
+        self.assertFalse(is_compatible('O-', None))
+
+
+class BloodCompatibilityQueryTests(TestCase):
+    def test_blood_type_in_filter(self):
+        # find_matches jaisa SQL filter (user__blood_type__in=compatible_donor_types(...))
+        for blood_type in BLOOD_TYPES:
+            CustomUser.objects.create(username=f'donor_{blood_type}', user_type='donor', blood_type=blood_type)
+        for recipient, donors in EXPECTED_DONORS.items():
+            with self.subTest(recipient=recipient):
+                matched = CustomUser.objects.filter(blood_type__in=compatible_donor_types(recipient))
+                self.assertEqual(set(matched.values_list('blood_type', flat=True)), donors)
+
+
+class AgeVersionTests(SimpleTestCase):
+    def test_birthday_changes_exactly_when_age_changes(self):
+        born = [date(1980, 2, 29), date(1990, 3, 1), date(2001, 12, 31), date(1975, 1, 1), None]
+        day = date(2023, 1, 1)
+        while day < date(2025, 1, 5):
+            previous = day - timedelta(days=1)
+            age_changed = ages_from_dates(born, day) != ages_from_dates(born, previous)
+            version_changed = ~np.isclose(last_birthdays(born, day), last_birthdays(born, previous), equal_nan=True)
+            np.testing.assert_array_equal(age_changed, version_changed, err_msg=str(day))
+            day += timedelta(days=7) if day.month not in (1, 2, 3, 12) else timedelta(days=1)
+
+    def test_stored_row_reencoded_after_birthday(self):
+        updated = date(2024, 1, 10)
+        born = [date(1990, 6, 15)]
+        encoded = []
+
+        def version(today):
+            return np.fmax([float(np.datetime64(updated, 's').astype(np.int64))], last_birthdays(born, today))
+
+        def encode(positions):
+            encoded.append(list(positions))
+            return sparse.csr_matrix(np.ones((len(positions), 3)))
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = DonorVectorStore('vocab', path=f'{directory}/donor_vectors')
+            store.get_vectors([7], version(date(2024, 3, 1)), encode)
+            store.get_vectors([7], version(date(2024, 6, 14)), encode)
+            store.get_vectors([7], version(date(2024, 6, 15)), encode)
+        self.assertEqual(encoded, [[0], [0]])
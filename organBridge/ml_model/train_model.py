@@ -1,22 +1,77 @@
 import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from scipy import sparse
+from collections import Counter
+from numbers import Integral
 import pickle
 import os
 from django.conf import settings
 import logging
 
+from .hashing_encoder import HashingTfidfEncoder
+
 logger = logging.getLogger(__name__)
 
+SIMILARITY_MODES = ('topk', 'none', 'dense')
+FEATURE_BACKENDS = ('tfidf', 'hashing')
+
+# category string in columns se (isi order mein) banta hai
+FEATURE_COLUMNS = ['City', 'Gender', 'Race', 'Age', 'Blood Type', 'PosNeg', 'Smoke', 'Drug', 'Alcohol', 'AvgSleep']
+# Streaming mode: har column categorical - har chunk mein har distinct value sirf ek baar store hoti hai
+FEATURE_DTYPES = {column: 'category' for column in FEATURE_COLUMNS}
+
+# Training ke default TfidfVectorizer parameters (evaluate_matcher grid inhi ko override karta hai)
+TFIDF_PARAMS = dict(
+    max_features=200,
+    max_df=0.25,
+    min_df=0.01,
+    stop_words='english',
+    lowercase=True,
+    analyzer='word'
+)
+
+
 class MLModelTrainer:
-    def __init__(self):
+    def __init__(self, similarity_mode='topk', top_k=20, block_size=256, progress_callback=None, chunk_size=None,
+                 feature_backend=None, hash_features=HashingTfidfEncoder.DEFAULT_FEATURES):
+        """
+        similarity_mode:
+            'topk'  - har row ke top-k neighbours, blocks mein compute (default)
+            'none'  - similarity matrix skip
+            'dense' - purana poora n x n cosine_sim (sirf chhote datasets ke liye)
+        chunk_size: CSV ko itni rows ke chunks mein stream karega (default settings.ML_TRAINING_CHUNK_SIZE;
+            None = poora dataset memory mein)
+        feature_backend: 'tfidf' (vocabulary wala TfidfVectorizer) ya 'hashing' (HashingTfidfEncoder);
+            default settings.ML_FEATURE_BACKEND
+        hash_features: hashing backend ke columns ki sankhya
+        """
+        if similarity_mode not in SIMILARITY_MODES:
+            raise ValueError(f"similarity_mode must be one of {SIMILARITY_MODES}")
+        feature_backend = feature_backend or getattr(settings, 'ML_FEATURE_BACKEND', 'tfidf')
+        if feature_backend not in FEATURE_BACKENDS:
+            raise ValueError(f"feature_backend must be one of {FEATURE_BACKENDS}")
+        
+        self.similarity_mode = similarity_mode
+        self.top_k = top_k
+        self.block_size = block_size
+        self.progress_callback = progress_callback
+        self.chunk_size = chunk_size or getattr(settings, 'ML_TRAINING_CHUNK_SIZE', None)
+        self.feature_backend = feature_backend
+        self.hash_features = hash_features
+        self.last_error = ''
         self.dataset_path = os.path.join(settings.BASE_DIR, 'ml_model/data/KidneyData.csv')
         self.models_dir = os.path.join(settings.BASE_DIR, 'ml_model/trained_models/')
         
         # Create directories if they don't exist
         os.makedirs(self.models_dir, exist_ok=True)
         
+    def report_progress(self, progress, message):
+        """Background job ko progress batayega (callback diya ho to)"""
+        if self.progress_callback:
+            self.progress_callback(progress, message)
+    
     def load_and_preprocess_data(self):
         """Dataset load karega aur preprocess karega"""
         try:
@@ -39,7 +94,7 @@ class MLModelTrainer:
             data = data.astype(str)
             
             # Create combined category column
-            data['category'] = data['City'].str.cat(data[['Gender','Race','Age','Blood Type','PosNeg','Smoke','Drug','Alcohol','AvgSleep']], sep=',')
+            data['category'] = data[FEATURE_COLUMNS[0]].str.cat(data[FEATURE_COLUMNS[1:]], sep=',')
             
             logger.info("Data preprocessing completed successfully")
             return data
@@ -56,63 +111,270 @@ class MLModelTrainer:
             print(f"\nTraining TF-IDF model on {len(corpus)} records...")
             
             # TF-IDF Vectorizer with optimized parameters
-            tf_model = TfidfVectorizer(
-                max_features=200,
-                max_df=0.25,
-                min_df=0.01,
-                stop_words='english',
-                lowercase=True,
-                analyzer='word'
-            )
+            tf_model = self.build_vectorizer()
             
-            # Fit and transform the data - FIX: Use toarray() instead of todense()
-            tf_matrix = tf_model.fit_transform(corpus).toarray()  # CHANGED: todense() -> toarray()
+            # Fit and transform the data - matrix sparse (CSR) hi rahega
+            tf_matrix = sparse.csr_matrix(tf_model.fit_transform(corpus), dtype=np.float32)
             
-            print(f"TF-IDF Matrix shape: {tf_matrix.shape}")
+            print(f"TF-IDF Matrix shape: {tf_matrix.shape} (nnz: {tf_matrix.nnz})")
             print(f"Vocabulary size: {len(tf_model.vocabulary_)}")
             
-            # Calculate cosine similarity matrix - FIX: Use numpy array directly
-            cosine_sim = cosine_similarity(tf_matrix)  # CHANGED: No need for conversion
-            
-            print(f"Cosine similarity matrix shape: {cosine_sim.shape}")
-            
-            return tf_model, tf_matrix, cosine_sim
+            return tf_model, tf_matrix, self.compute_similarity(tf_matrix)
             
         except Exception as e:
             logger.error(f"Error training TF-IDF model: {str(e)}")
             raise e
     
-    def save_models(self, tf_model, tf_matrix, cosine_sim):
-        """Trained models save karega - FIXED VERSION"""
+    def build_vectorizer(self, **overrides):
+        """Training ke TF-IDF parameters (in-memory aur streaming dono modes ke liye same)"""
+        return TfidfVectorizer(**{**TFIDF_PARAMS, **overrides})
+    
+    def iter_corpus_chunks(self):
+        """
+        CSV ko chunk_size rows ke chunks mein padhega (sirf feature columns, categorical dtypes)
+        aur har chunk ke category strings ki Series yield karega - poora dataset kabhi memory mein nahi
+        """
+        reader = pd.read_csv(
+            self.dataset_path, usecols=FEATURE_COLUMNS, dtype=FEATURE_DTYPES, chunksize=self.chunk_size
+        )
+        for chunk in reader:
+            columns = [chunk[column].astype(str) for column in FEATURE_COLUMNS]
+            yield columns[0].str.cat(columns[1:], sep=',')
+    
+    def iter_corpus(self):
+        """Category corpus ek-ek row karke (generator)"""
+        for documents in self.iter_corpus_chunks():
+            yield from documents
+    
+    def train_tfidf_streaming(self):
+        """
+        Out-of-core TF-IDF training - dataset par do streaming passes
+
+        WHY: load_and_preprocess_data poori CSV + uski kai string copies memory mein rakhta hai;
+             RAM se bada dataset train hi nahi hota
+        WHERE: train_complete_pipeline jab chunk_size set ho
+        HOW: Pass 1 har chunk ke document / term frequencies jodta hai aur usse TfidfVectorizer wale hi
+             rules (max_df, min_df, max_features, smooth IDF) se vocabulary + IDF banata hai.
+             Pass 2 fixed vocabulary wale vectorizer se chunks transform karke CSR blocks jodta hai.
+             Peak memory = ek chunk + sparse matrix
+        """
+        tf_model = self.build_vectorizer()
+        analyze = tf_model.build_analyzer()
+        
+        # Pass 1: document / term frequencies
+        self.report_progress(10, 'Counting vocabulary (streaming pass 1)')
+        doc_freq, term_freq = Counter(), Counter()
+        n_docs = 0
+        for documents in self.iter_corpus_chunks():
+            n_docs += len(documents)
+            counter = CountVectorizer(analyzer=analyze)
+            try:
+                counts = counter.fit_transform(documents)
+            except ValueError:
+                continue  # is chunk mein ek bhi term nahi
+            terms = counter.get_feature_names_out()
+            dfs = np.diff(counts.tocsc().indptr)
+            tfs = np.asarray(counts.sum(axis=0)).ravel()
+            for term, df, tf in zip(terms, dfs.tolist(), tfs.tolist()):
+                doc_freq[term] += df
+                term_freq[term] += tf
+        
+        print(f"\nStreaming TF-IDF training on {n_docs} records (chunk size {self.chunk_size})...")
+        vocabulary, idf = self.select_vocabulary(tf_model, doc_freq, term_freq, n_docs)
+        
+        tf_model = self.build_vectorizer(vocabulary=vocabulary)
+        tf_model.idf_ = idf
+        
+        # Pass 2: fixed vocabulary se chunk-wise encoding
+        self.report_progress(25, 'Encoding dataset (streaming pass 2)')
+        blocks = [
+            sparse.csr_matrix(tf_model.transform(documents), dtype=np.float32)
+            for documents in self.iter_corpus_chunks()
+        ]
+        tf_matrix = sparse.vstack(blocks, format='csr') if blocks else sparse.csr_matrix((0, len(vocabulary)), dtype=np.float32)
+        
+        print(f"TF-IDF Matrix shape: {tf_matrix.shape} (nnz: {tf_matrix.nnz})")
+        print(f"Vocabulary size: {len(vocabulary)}")
+        
+        return tf_model, tf_matrix, self.compute_similarity(tf_matrix)
+    
+    def train_hashing_model(self, data=None):
+        """
+        Hashing encoder train karega - ek hi pass, vocabulary nahi banti
+
+        data diya ho to uska category column, warna CSV chunks stream hote hain.
+        Har chunk ek baar hash hota hai: usi se IDF doc counts (partial_fit) badhte hain aur
+        raw counts jama hote hain; IDF poora hone ke baad ek saath weight + normalize
+        """
+        encoder = HashingTfidfEncoder(self.hash_features)
+        chunks = [data['category']] if data is not None else self.iter_corpus_chunks()
+        
+        blocks = []
+        for documents in chunks:
+            counts = encoder.hash(documents)
+            encoder.partial_fit_counts(counts)
+            blocks.append(sparse.csr_matrix(counts, dtype=np.float32))
+        
+        print(f"\nTraining hashing encoder on {encoder.n_docs} records ({encoder.n_features} features)...")
+        counts = sparse.vstack(blocks, format='csr') if blocks else sparse.csr_matrix((0, encoder.n_features), dtype=np.float32)
+        tf_matrix = sparse.csr_matrix(encoder.apply_idf(counts), dtype=np.float32)
+        
+        print(f"Hashed TF-IDF Matrix shape: {tf_matrix.shape} (nnz: {tf_matrix.nnz})")
+        print(f"Active hash columns: {int(np.count_nonzero(encoder.doc_counts))}")
+        
+        return encoder, tf_matrix, self.compute_similarity(tf_matrix)
+    
+    def select_vocabulary(self, tf_model, doc_freq, term_freq, n_docs):
+        """
+        Aggregated frequencies se vocabulary aur smooth IDF - TfidfVectorizer.fit jaise hi rules
+        (terms alphabetical order mein, max_features ke liye corpus term frequency).
+        Returns ({term: column}, idf array)
+        """
+        terms = np.array(sorted(doc_freq), dtype=object)
+        dfs = np.array([doc_freq[term] for term in terms], dtype=np.int64)
+        tfs = np.array([term_freq[term] for term in terms], dtype=np.int64)
+        
+        max_df, min_df = tf_model.max_df, tf_model.min_df
+        max_doc_count = max_df if isinstance(max_df, Integral) else max_df * n_docs
+        min_doc_count = min_df if isinstance(min_df, Integral) else min_df * n_docs
+        if max_doc_count < min_doc_count:
+            raise ValueError("max_df corresponds to < documents than min_df")
+        
+        mask = (dfs <= max_doc_count) & (dfs >= min_doc_count)
+        if tf_model.max_features is not None and mask.sum() > tf_model.max_features:
+            keep = (-tfs[mask]).argsort()[:tf_model.max_features]
+            limited = np.zeros(len(terms), dtype=bool)
+            limited[np.where(mask)[0][keep]] = True
+            mask = limited
+        
+        if not mask.any():
+            raise ValueError("After pruning, no terms remain. Try a lower min_df or a higher max_df.")
+        
+        vocabulary = {term: column for column, term in enumerate(terms[mask].tolist())}
+        idf = np.log((n_docs + 1) / (dfs[mask] + 1).astype(np.float64)) + 1
+        return vocabulary, idf
+    
+    def compute_similarity(self, tf_matrix):
+        """similarity_mode ke hisaab se similarity artifact"""
+        if self.similarity_mode == 'dense':
+            # O(n^2) memory - sirf chhote datasets ke liye
+            similarity = cosine_similarity(tf_matrix)
+            print(f"Cosine similarity matrix shape: {similarity.shape}")
+        elif self.similarity_mode == 'topk':
+            similarity = self.compute_top_k_neighbours(tf_matrix)
+            print(f"Top-{similarity[0].shape[1]} neighbour list shape: {similarity[0].shape}")
+        else:
+            similarity = None
+            print("Similarity matrix skipped")
+        return similarity
+    
+    def compute_top_k_neighbours(self, tf_matrix):
+        """
+        Har row ke top-k most similar rows nikalega, blocks mein
+        Peak memory O(block_size x n) rehti hai, O(n^2) nahi
+        """
+        n_rows = tf_matrix.shape[0]
+        k = max(0, min(self.top_k, n_rows - 1))
+        indices = np.zeros((n_rows, k), dtype=np.int32)
+        scores = np.zeros((n_rows, k), dtype=np.float32)
+        
+        if k == 0:
+            return indices, scores
+        
+        # TF-IDF rows already L2-normalized hain, isliye dot product = cosine similarity
+        matrix_t = tf_matrix.T.tocsc()
+        
+        for start in range(0, n_rows, self.block_size):
+            end = min(start + self.block_size, n_rows)
+            block = (tf_matrix[start:end] @ matrix_t).toarray()
+            
+            # Row khud apna neighbour nahi hogi
+            block[np.arange(end - start), np.arange(start, end)] = -np.inf
+            
+            top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(block, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind='stable')
+            
+            indices[start:end] = np.take_along_axis(top, order, axis=1)
+            scores[start:end] = np.take_along_axis(top_scores, order, axis=1)
+        
+        return indices, scores
+    
+    def save_models(self, tf_model, tf_matrix, similarity):
+        """
+        Trained models ek naye version directory mein save karega - sparse / compact format.
+        Saari files likhne ke baad hi current pointer atomically swap hota hai.
+        """
+        from ml_model.artifacts import ArtifactStore, save_csr
+        from ml_model.donor_store import vocabulary_hash
+        
+        store = ArtifactStore(self.models_dir)
+        staging_dir = store.begin_version()
         try:
-            # Save TF-IDF model
-            tf_model_path = os.path.join(self.models_dir, 'tf_model.pkl')
-            with open(tf_model_path, 'wb') as f:
-                pickle.dump(tf_model, f)
+            if isinstance(tf_model, HashingTfidfEncoder):
+                # Hashing encoder: config JSON + IDF doc counts - workers ko unpickle nahi karna padta
+                tf_model.save(staging_dir)
+            else:
+                # Save TF-IDF model
+                tf_model_path = os.path.join(staging_dir, 'tf_model.pkl')
+                with open(tf_model_path, 'wb') as f:
+                    pickle.dump(tf_model, f)
             
-            # Save TF-IDF matrix as numpy array - FIXED
-            tf_matrix_path = os.path.join(self.models_dir, 'tf_matrix.npy')  # CHANGED: .pkl -> .npy
-            np.save(tf_matrix_path, tf_matrix)  # CHANGED: pickle.dump -> np.save
+            # TF-IDF matrix ke CSR arrays alag raw .npy files mein - workers inhe mmap karte hain
+            save_csr(staging_dir, 'tf_matrix', tf_matrix)
             
-            # Save cosine similarity matrix
-            cosine_sim_path = os.path.join(self.models_dir, 'cosine_sim.npy')
-            np.save(cosine_sim_path, cosine_sim)
+            # Similarity bhi uncompressed .npy (compressed .npz mmap nahi ho sakta)
+            if self.similarity_mode == 'dense':
+                np.save(os.path.join(staging_dir, 'cosine_sim.npy'), similarity)
+            elif self.similarity_mode == 'topk':
+                indices, scores = similarity
+                np.save(os.path.join(staging_dir, 'neighbour_indices.npy'), indices)
+                np.save(os.path.join(staging_dir, 'neighbour_scores.npy'), scores)
             
-            print("\nModels saved successfully:")
-            print(f"TF-IDF Model: {tf_model_path}")
-            print(f"TF-IDF Matrix: {tf_matrix_path}")
-            print(f"Cosine Similarity: {cosine_sim_path}")
+            manifest = store.publish(
+                staging_dir,
+                vocabulary_hash=vocabulary_hash(tf_model),
+                row_count=tf_matrix.shape[0],
+                extra={'similarity_mode': self.similarity_mode, 'feature_backend': self.feature_backend},
+            )
+            
+            print(f"\nModels saved successfully (version {manifest['version']}):")
+            print(f"Directory: {store.version_dir(manifest)}")
             
             # Check file sizes
             print(f"\nFile sizes:")
-            print(f"TF Model: {os.path.getsize(tf_model_path) / 1024:.2f} KB")
-            print(f"TF Matrix: {os.path.getsize(tf_matrix_path) / 1024:.2f} KB")
-            print(f"Cosine Sim: {os.path.getsize(cosine_sim_path) / 1024:.2f} KB")
+            for name, info in manifest['files'].items():
+                print(f"{name}: {info['size'] / 1024:.2f} KB")
+            
+            return manifest
             
         except Exception as e:
+            store.discard(staging_dir)
             logger.error(f"Error saving models: {str(e)}")
             raise e
     
+    def rebuild_donor_store(self):
+        """Donor vector store ko naye TF-IDF vocabulary ke saath dobara banayega"""
+        try:
+            from ml_model.candidates import DonorSnapshot
+            from ml_model.matching_algorithm import get_matching_engine
+            from profiles.models import DonorProfile
+            
+            engine = get_matching_engine()
+            if engine.donor_store is None:
+                return
+            
+            snapshot = DonorSnapshot.from_queryset(DonorProfile.objects.all())
+            engine.donor_store.rebuild(
+                snapshot.ids, snapshot.versions,
+                lambda positions: engine.encode_donors(snapshot.load_donors(positions))
+            )
+            print(f"Donor vector store rebuilt: {engine.donor_store.path}")
+            
+        except Exception as e:
+            # Store lazily bhi rebuild ho jata hai, isliye training fail nahi hogi
+            logger.error(f"Error rebuilding donor vector store: {str(e)}")
+    
     def test_model(self, tf_model):
         """Trained model ka basic test karega - FIXED VERSION"""
         try:
@@ -141,16 +403,39 @@ class MLModelTrainer:
             print("🚀 Starting ML Model Training Pipeline...")
             print("=" * 50)
             
-            # Step 1: Load and preprocess data
-            data = self.load_and_preprocess_data()
-            
-            # Step 2: Train TF-IDF model
-            tf_model, tf_matrix, cosine_sim = self.train_tfidf_model(data)
+            if self.feature_backend == 'hashing':
+                # Steps 1-2: Hashing encoder - single pass (chunk_size par streaming)
+                self.report_progress(5, 'Streaming dataset' if self.chunk_size else 'Loading dataset')
+                data = None if self.chunk_size else self.load_and_preprocess_data()
+                self.report_progress(25, 'Training hashing encoder')
+                tf_model, tf_matrix, similarity = self.train_hashing_model(data)
+            elif self.chunk_size:
+                # Steps 1-2: CSV stream karke out-of-core training
+                self.report_progress(5, 'Streaming dataset')
+                tf_model, tf_matrix, similarity = self.train_tfidf_streaming()
+            else:
+                # Step 1: Load and preprocess data
+                self.report_progress(5, 'Loading dataset')
+                data = self.load_and_preprocess_data()
+                
+                # Step 2: Train TF-IDF model
+                self.report_progress(25, 'Training TF-IDF model')
+                tf_model, tf_matrix, similarity = self.train_tfidf_model(data)
             
             # Step 3: Save trained models
-            self.save_models(tf_model, tf_matrix, cosine_sim)
+            self.report_progress(60, 'Saving model artifacts')
+            self.save_models(tf_model, tf_matrix, similarity)
+            
+            # Is process ka shared engine naye artifacts load kare
+            from ml_model.matching_algorithm import reset_matching_engine
+            reset_matching_engine()
             
-            # Step 4: Test the model
+            # Step 4: Naye vocabulary ke saath donor vectors rebuild karo
+            self.report_progress(75, 'Rebuilding donor vector store')
+            self.rebuild_donor_store()
+            
+            # Step 5: Test the model
+            self.report_progress(90, 'Testing model')
             self.test_model(tf_model)
             
             print("\n✅ Training completed successfully!")
@@ -160,14 +445,21 @@ class MLModelTrainer:
             
         except Exception as e:
             logger.error(f"Training pipeline failed: {str(e)}")
+            self.last_error = str(e)
             print(f"❌ Training failed: {str(e)}")
             return False
 
 
+def trained_models_exist():
+    """Kya trained TF-IDF model disk par maujood hai"""
+    from ml_model.artifacts import ArtifactStore
+    return ArtifactStore().has_model()
+
+
 # Django management command ke liye utility function
-def train_ml_model():
+def train_ml_model(**trainer_options):
     """Django se call karne ke liye function"""
-    trainer = MLModelTrainer()
+    trainer = MLModelTrainer(**trainer_options)
     return trainer.train_complete_pipeline()
 
 
@@ -21,8 +21,10 @@ import numpy as np
 import pandas as pd
 from django.conf import settings
 
-from .matching_algorithm import OrganMatchingEngine
-from .train_model import MLModelTrainer
+from .artifacts import ArtifactStore
+from .evaluation import deployed_result, load_results
+from .matching_algorithm import get_matching_engine
+from .models import TrainingJob
 from profiles.models import DonorProfile, RecipientProfile
 
 def is_admin(user):
@@ -35,14 +37,14 @@ def train_model_view(request):
     """Admin ke liye ML model training interface"""
     if request.method == 'POST':
         try:
-            trainer = MLModelTrainer()
-            success = trainer.train_complete_pipeline()
+            # Training background worker karega, request turant return hogi
+            job, created = TrainingJob.enqueue(requested_by=request.user)
             
-            if success:
-                messages.success(request, 'ML model trained successfully!')
-                return redirect('model_status')
+            if created:
+                messages.success(request, f'Training job #{job.id} queued. Progress is shown on this page.')
             else:
-                messages.error(request, 'ML model training failed!')
+                messages.info(request, f'Training job #{job.id} is already queued.')
+            return redirect('model_status')
                 
         except Exception as e:
             messages.error(request, f'Training error: {str(e)}')
@@ -65,19 +67,17 @@ def retrain_model_view(request):
         dataset_path = request.POST.get('dataset_path', '')
         
         try:
-            trainer = MLModelTrainer()
+            # Custom dataset path diya hai to woh exist karna chahiye - default par fallback nahi
+            if dataset_path and not os.path.exists(dataset_path):
+                return JsonResponse({'success': False, 'message': f'Dataset not found: {dataset_path}'})
             
-            # If custom dataset path provided
-            if dataset_path and os.path.exists(dataset_path):
-                trainer.dataset_path = dataset_path
+            job, created = TrainingJob.enqueue(dataset_path=dataset_path, requested_by=request.user)
             
-            success = trainer.train_complete_pipeline()
-            
-            if success:
-                messages.success(request, 'Model retrained successfully!')
-                return JsonResponse({'success': True, 'message': 'Model retrained successfully!'})
-            else:
-                return JsonResponse({'success': False, 'message': 'Retraining failed!'})
+            return JsonResponse({
+                'success': True,
+                'message': 'Retraining queued!' if created else 'Retraining is already queued.',
+                'job': job.as_dict(),
+            })
                 
         except Exception as e:
             return JsonResponse({'success': False, 'message': f'Error: {str(e)}'})
@@ -88,23 +88,44 @@ def retrain_model_view(request):
 @login_required
 def model_status_view(request):
     """ML model ka current status show karega"""
+    training_job = TrainingJob.objects.first()
+    
+    # Training progress polling (AJAX) - sirf job status, model load nahi
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({
+            'model_exists': check_model_exists(),
+            'job': training_job.as_dict() if training_job else None,
+        })
+    
     model_exists = check_model_exists()
     model_info = {}
     
     if model_exists:
         try:
-            # Load model info
-            models_dir = os.path.join(settings.BASE_DIR, 'ml_model/trained_models/')
+            # Load model info - current artifact version se
+            store = ArtifactStore()
+            manifest = store.current_manifest()
+            models_dir = store.current_dir()
+            
             model_info = {
-                'tf_model_size': f"{os.path.getsize(os.path.join(models_dir, 'tf_model.pkl')) / 1024:.1f} KB",
-                'tf_matrix_size': f"{os.path.getsize(os.path.join(models_dir, 'tf_matrix.pkl')) / 1024:.1f} KB",
-                'cosine_sim_size': f"{os.path.getsize(os.path.join(models_dir, 'cosine_sim.npy')) / 1024:.1f} KB",
-                'last_trained': get_file_modification_time(models_dir),  # This should return datetime object
+                'last_trained': manifest['created_at'] if manifest else get_file_modification_time(models_dir),
             }
+            for key, layouts in ARTIFACT_FILES.items():
+                for filenames in layouts:
+                    file_paths = [os.path.join(models_dir, filename) for filename in filenames]
+                    if all(os.path.exists(file_path) for file_path in file_paths):
+                        total_size = sum(os.path.getsize(file_path) for file_path in file_paths)
+                        model_info[f'{key}_size'] = f"{total_size / 1024:.1f} KB"
+                        break
+            
+            if manifest:
+                model_info['version'] = manifest['version']
+                model_info['row_count'] = manifest['row_count']
+                model_info['vocabulary_hash'] = manifest['vocabulary_hash'][:12]
             
             # Test model functionality
-            matching_engine = OrganMatchingEngine()
-            model_info['model_loaded'] = True
+            matching_engine = get_matching_engine()
+            model_info['model_loaded'] = matching_engine.tf_model is not None
             
         except Exception as e:
             model_info['error'] = str(e)
@@ -122,6 +143,7 @@ def model_status_view(request):
     return render(request, 'ml_model/model_status.html', {
         'model_exists': model_exists,
         'model_info': model_info,
+        'training_job': training_job,
         'is_admin': is_admin(request.user)
     })
 
@@ -145,7 +167,7 @@ def predict_match_api(request):
                 return JsonResponse({'error': 'Permission denied'}, status=403)
             
             # Get prediction
-            matching_engine = OrganMatchingEngine()
+            matching_engine = get_matching_engine()
             match_score = matching_engine.calculate_similarity_score(donor, recipient)
             
             return JsonResponse({
@@ -181,23 +203,27 @@ def batch_predict_api(request):
             if request.user != recipient.user and not is_admin(request.user):
                 return JsonResponse({'error': 'Permission denied'}, status=403)
             
-            matching_engine = OrganMatchingEngine()
+            matching_engine = get_matching_engine()
             results = []
             
-            for donor_id in donor_ids:
-                try:
-                    donor = DonorProfile.objects.get(id=donor_id)
-                    score = matching_engine.calculate_similarity_score(donor, recipient)
-                    
-                    results.append({
-                        'donor_id': donor_id,
-                        'donor_name': donor.user.get_full_name() or donor.user.username,
-                        'match_score': score,
-                        'compatibility': get_compatibility_level(score),
-                        'organs_match': list(set(donor.organs_donating) & set(recipient.organs_needed))
-                    })
-                except DonorProfile.DoesNotExist:
-                    continue
+            # Saare donors ek query mein, scores ek batch mein
+            donors_by_id = {
+                str(pk): donor for pk, donor in
+                DonorProfile.objects.select_related('user').in_bulk(donor_ids).items()
+            }
+            found = [(donor_id, donors_by_id[str(donor_id)]) for donor_id in donor_ids if str(donor_id) in donors_by_id]
+            donors = [donor for _, donor in found]
+            scores = matching_engine.batch_similarity_scores(donors, recipient) if donors else []
+            
+            for (donor_id, donor), score in zip(found, scores):
+                score = float(score)
+                results.append({
+                    'donor_id': donor_id,
+                    'donor_name': donor.user.get_full_name() or donor.user.username,
+                    'match_score': score,
+                    'compatibility': get_compatibility_level(score),
+                    'organs_match': list(set(donor.organs_donating) & set(recipient.organs_needed))
+                })
             
             # Sort by match score
             results.sort(key=lambda x: x['match_score'], reverse=True)
@@ -220,7 +246,7 @@ def batch_predict_api(request):
 def model_stats_view(request):
     """ML model ka performance statistics"""
     try:
-        matching_engine = OrganMatchingEngine()
+        matching_engine = get_matching_engine()
         
         # Basic stats
         total_donors = DonorProfile.objects.count()
@@ -242,10 +268,30 @@ def model_stats_view(request):
             'active_matches': active_matches,
             'dataset_size': f"{dataset_size / 1024:.1f} KB",
             'dataset_records': dataset_records,
-            'model_accuracy': '95%',  # This would come from your model evaluation
-            'avg_prediction_time': '0.2s',
+            'model_accuracy': 'Not evaluated',
+            'avg_prediction_time': 'Not evaluated',
         }
         
+        # `manage.py evaluate_matcher` ke held-out results. Accuracy deployed config (TFIDF_PARAMS +
+        # engine weights) ki offline sweep row se - sweep ki best row deployed model nahi hai - aur
+        # hamesha majority-class baseline + AUC ke saath, warna akela number gumraah karta hai
+        evaluation = load_results()
+        if evaluation and evaluation.get('results'):
+            deployed = evaluation.get('deployed') or deployed_result(evaluation['results'])
+            stats['evaluation'] = evaluation
+            if deployed:
+                stats['model_accuracy'] = f"{deployed['accuracy'] * 100:.1f}%"
+                stats['model_accuracy_value'] = round(deployed['accuracy'] * 100, 1)
+                stats['model_auc'] = f"{deployed['auc']:.3f}" if deployed.get('auc') is not None else None
+                stats['avg_prediction_time'] = f"{deployed['latency_p50_ms']:.2f} ms"
+                stats['p99_prediction_time'] = f"{deployed['latency_p99_ms']:.2f} ms"
+                stats['deployed_evaluation'] = deployed
+            else:
+                stats['model_accuracy'] = 'Deployed config not in sweep'
+            if evaluation.get('majority_baseline') is not None:
+                stats['majority_baseline'] = f"{evaluation['majority_baseline'] * 100:.1f}%"
+            stats['evaluation_results'] = [result for result in evaluation['results'] if 'error' not in result][:10]
+        
     except Exception as e:
         stats = {'error': str(e)}
     
@@ -259,7 +305,7 @@ def test_model_view(request):
     if request.method == 'POST':
         try:
             test_data = request.POST.get('test_data', '')
-            matching_engine = OrganMatchingEngine()
+            matching_engine = get_matching_engine()
             
             # Simple test - you can expand this
             if test_data:
@@ -298,9 +344,8 @@ def update_dataset_view(request):
                 
                 # Optionally retrain the model
                 if request.POST.get('retrain_after_update'):
-                    trainer = MLModelTrainer()
-                    trainer.train_complete_pipeline()
-                    messages.success(request, 'Model retrained with new data!')
+                    job, _ = TrainingJob.enqueue(requested_by=request.user)
+                    messages.success(request, f'Retraining with new data queued (job #{job.id})!')
                     
             else:
                 messages.error(request, 'No file provided!')
@@ -312,22 +357,35 @@ def update_dataset_view(request):
 
 
 # Utility Functions
+# Status page par dikhne wali artifact files (naya layout pehle, purane layouts baad mein).
+# Ek layout ki saari files milkar ek artifact hain (jaise CSR ke data/indices/indptr)
+ARTIFACT_FILES = {
+    'tf_model': [('tf_model.pkl',), ('encoder.json', 'encoder_doc_counts.npy')],
+    'tf_matrix': [
+        ('tf_matrix_data.npy', 'tf_matrix_indices.npy', 'tf_matrix_indptr.npy', 'tf_matrix_shape.npy'),
+        ('tf_matrix.npz',),
+        ('tf_matrix.npy',),
+    ],
+    'cosine_sim': [('cosine_sim.npy',)],
+    'neighbours': [('neighbour_indices.npy', 'neighbour_scores.npy'), ('neighbours.npz',)],
+}
+
+
 def check_model_exists():
-    """Check if ML model files exist"""
-    models_dir = os.path.join(settings.BASE_DIR, 'ml_model/trained_models/')
-    required_files = ['tf_model.pkl', 'tf_matrix.pkl', 'cosine_sim.npy']
-    
-    if not os.path.exists(models_dir):
-        return False
-    
-    return all(os.path.exists(os.path.join(models_dir, f)) for f in required_files)
+    """Check if ML model files exist (current version ya purana flat layout)"""
+    return ArtifactStore().has_model()
 
 
 
 def get_file_modification_time(directory):
     """Get the latest modification time of model files"""
     try:
-        files = ['tf_model.pkl', 'tf_matrix.pkl', 'cosine_sim.npy']
+        files = [
+            filename
+            for layouts in ARTIFACT_FILES.values()
+            for filenames in layouts
+            for filename in filenames
+        ]
         mod_times = []
         
         for file in files:
@@ -146,6 +146,28 @@ STATICFILES_DIRS = [
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache (per-recipient ranked match cache - matches/match_cache.py)
+# Local-memory cache har process ka alag hota hai; multiple workers ke saath
+# FileBasedCache / Redis jaisa shared backend use karein taki invalidation sab workers tak pahunche
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'organbridge-default',
+    }
+}
+
+# ML training: dataset ko itni rows ke chunks mein stream karke train karega (None = poori CSV memory mein)
+# RAM se bade datasets (TrainingJob.dataset_path) ke liye set karein, e.g. 100_000
+ML_TRAINING_CHUNK_SIZE = None
+
+# ML feature encoder: 'tfidf' (pickled TfidfVectorizer, 200 term vocabulary) ya
+# 'hashing' (HashingTfidfEncoder - fixed width hashed features + stored IDF, pickle nahi)
+ML_FEATURE_BACKEND = 'tfidf'
+
+# Engine load par artifacts ke sha256 checksums verify karega (har load par har file poori padhi jaati hai).
+# False = sirf size + mtime check; checksums publish ke waqt manifest mein likhe jaate hain
+ML_VERIFY_ARTIFACT_CHECKSUMS = False
+
 
 
 
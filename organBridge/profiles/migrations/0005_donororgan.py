@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-17 20:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_donor_organs(apps, schema_editor):
+    """Existing donors ke organs_donating se DonorOrgan rows banayega"""
+    DonorProfile = apps.get_model('profiles', 'DonorProfile')
+    DonorOrgan = apps.get_model('profiles', 'DonorOrgan')
+
+    entries = []
+    for donor_id, organs in DonorProfile.objects.values_list('id', 'organs_donating').iterator():
+        if isinstance(organs, dict):
+            organs = list(organs.values()) or list(organs.keys())
+        elif isinstance(organs, str):
+            organs = [organ.strip() for organ in organs.split(',') if organ.strip()]
+        elif not isinstance(organs, list):
+            organs = []
+        entries.extend(DonorOrgan(donor_id=donor_id, organ=str(organ)) for organ in set(map(str, organs)))
+
+    DonorOrgan.objects.bulk_create(entries, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0004_alter_recipientprofile_preferred_hospitals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DonorOrgan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('organ', models.CharField(choices=[('kidney', 'Kidney'), ('liver', 'Liver'), ('heart', 'Heart'), ('lungs', 'Lungs'), ('pancreas', 'Pancreas'), ('intestine', 'Intestine'), ('cornea', 'Cornea'), ('skin', 'Skin'), ('bone', 'Bone')], max_length=50)),
+                ('donor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='organ_entries', to='profiles.donorprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organ', 'donor'], name='donor_organ_lookup_idx')],
+                'unique_together': {('donor', 'organ')},
+            },
+        ),
+        migrations.RunPython(populate_donor_organs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-17 20:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_recipient_organs(apps, schema_editor):
+    """Existing recipients ke organs_needed se RecipientOrgan rows banayega"""
+    RecipientProfile = apps.get_model('profiles', 'RecipientProfile')
+    RecipientOrgan = apps.get_model('profiles', 'RecipientOrgan')
+
+    entries = []
+    for recipient_id, organs in RecipientProfile.objects.values_list('id', 'organs_needed').iterator():
+        if isinstance(organs, dict):
+            organs = list(organs.values()) or list(organs.keys())
+        elif isinstance(organs, str):
+            organs = [organ.strip() for organ in organs.split(',') if organ.strip()]
+        elif not isinstance(organs, list):
+            organs = []
+        entries.extend(RecipientOrgan(recipient_id=recipient_id, organ=str(organ)) for organ in set(map(str, organs)))
+
+    RecipientOrgan.objects.bulk_create(entries, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0005_donororgan'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipientOrgan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('organ', models.CharField(choices=[('kidney', 'Kidney'), ('liver', 'Liver'), ('heart', 'Heart'), ('lungs', 'Lungs'), ('pancreas', 'Pancreas'), ('intestine', 'Intestine'), ('cornea', 'Cornea'), ('skin', 'Skin'), ('bone', 'Bone')], max_length=50)),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='organ_entries', to='profiles.recipientprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organ', 'recipient'], name='recipient_organ_lookup_idx')],
+                'unique_together': {('recipient', 'organ')},
+            },
+        ),
+        migrations.RunPython(populate_recipient_organs, migrations.RunPython.noop),
+    ]
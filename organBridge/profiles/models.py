@@ -1,8 +1,44 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 
 CustomUser = get_user_model()
 
+
+def organ_list(organs_field):
+    """
+    Safely convert organs JSONField to list of strings
+    Handles list, dict aur comma-separated string - matching engine bhi yahi use karta hai
+    """
+    if isinstance(organs_field, list):
+        # If it's already a list, ensure all items are strings
+        return [str(organ) for organ in organs_field]
+    elif isinstance(organs_field, dict):
+        # If it's a dict, extract values or keys
+        return list(organs_field.values()) if organs_field.values() else list(organs_field.keys())
+    elif isinstance(organs_field, str):
+        # If it's a string, split by comma
+        return [organ.strip() for organ in organs_field.split(',') if organ.strip()]
+    else:
+        # Default empty list
+        return []
+
+
+def sync_organ_entries(profile, entry_model, owner_field, organs_field):
+    """
+    Profile ke organ rows (DonorOrgan / RecipientOrgan) ko JSON organs field ke saath milayega.
+    Sirf diff insert/delete hota hai.
+    """
+    organs = set(organ_list(organs_field))
+    existing = set(profile.organ_entries.values_list('organ', flat=True))
+    if organs == existing:
+        return
+    
+    profile.organ_entries.exclude(organ__in=organs).delete()
+    entry_model.objects.bulk_create(
+        [entry_model(**{owner_field: profile, 'organ': organ}) for organ in organs - existing],
+        ignore_conflicts=True
+    )
+
 class BaseProfile(models.Model):
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, related_name='%(class)s_profile')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -75,7 +111,17 @@ class DonorProfile(BaseProfile):
         # Calculate BMI automatically
         if self.height and self.weight and self.height > 0:
             self.bmi = round(self.weight / ((self.height/100) ** 2), 2)
-        super().save(*args, **kwargs)
+        
+        update_fields = kwargs.get('update_fields')
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # organs_donating (JSON) ka indexed copy DonorOrgan table mein
+            if update_fields is None or 'organs_donating' in update_fields:
+                self.sync_organ_entries()
+    
+    def sync_organ_entries(self):
+        """DonorOrgan rows ko organs_donating ke saath milayega (sirf diff insert/delete)"""
+        sync_organ_entries(self, DonorOrgan, 'donor', self.organs_donating)
     
     def __str__(self):
         return f"Donor: {self.user.username}"
@@ -86,6 +132,27 @@ class DonorProfile(BaseProfile):
 
 
 
+class DonorOrgan(models.Model):
+    """
+    Donor -> organ normalized relation (organs_donating ka indexed copy)
+    
+    WHY: organs_donating JSONField hai, database (khaas kar SQLite) us par efficiently filter nahi kar sakta
+    WHERE: find_matches sirf un donors ko fetch karta hai jo recipient ke kisi organ ko donate kar rahe hain
+    HOW: DonorProfile.save har save par rows sync karta hai; (organ, donor) index se lookup
+    """
+    donor = models.ForeignKey(DonorProfile, on_delete=models.CASCADE, related_name='organ_entries')
+    organ = models.CharField(max_length=50, choices=DonorProfile.ORGANS_CHOICES)
+    
+    class Meta:
+        unique_together = ['donor', 'organ']
+        indexes = [
+            models.Index(fields=['organ', 'donor'], name='donor_organ_lookup_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.donor.user.username} - {self.organ}"
+
+
 class RecipientProfile(BaseProfile):
     URGENCY_CHOICES = [
         ('low', 'Low - Can wait months'),
@@ -122,6 +189,18 @@ class RecipientProfile(BaseProfile):
     preferred_hospital = models.CharField(max_length=255, blank=True, verbose_name="Preferred Hospital")
     insurance_provider = models.CharField(max_length=255, blank=True, verbose_name="Insurance Provider")
     
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # organs_needed (JSON) ka indexed copy RecipientOrgan table mein
+            if update_fields is None or 'organs_needed' in update_fields:
+                self.sync_organ_entries()
+    
+    def sync_organ_entries(self):
+        """RecipientOrgan rows ko organs_needed ke saath milayega (sirf diff insert/delete)"""
+        sync_organ_entries(self, RecipientOrgan, 'recipient', self.organs_needed)
+    
     def __str__(self):
         return f"Recipient: {self.user.username}"
     
@@ -137,4 +216,25 @@ class RecipientProfile(BaseProfile):
             'high': 'red',
             'critical': 'darkred'
         }
-        return colors.get(self.urgency_level, 'black')
\ No newline at end of file
+        return colors.get(self.urgency_level, 'black')
+
+
+class RecipientOrgan(models.Model):
+    """
+    Recipient -> needed organ normalized relation (organs_needed ka indexed copy)
+    
+    WHY: Ek donor badalne par sirf unhi recipients ko re-score karna hai jinhe uska koi organ chahiye
+    WHERE: matches.incremental (donor change par incremental re-matching)
+    HOW: RecipientProfile.save har save par rows sync karta hai; (organ, recipient) index se lookup
+    """
+    recipient = models.ForeignKey(RecipientProfile, on_delete=models.CASCADE, related_name='organ_entries')
+    organ = models.CharField(max_length=50, choices=DonorProfile.ORGANS_CHOICES)
+    
+    class Meta:
+        unique_together = ['recipient', 'organ']
+        indexes = [
+            models.Index(fields=['organ', 'recipient'], name='recipient_organ_lookup_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.recipient.user.username} - {self.organ}"